@@ -0,0 +1,46 @@
+"""
+Benchmark for ResourceManager.allocate_resources.
+
+Measures per-call admission latency while the number of live allocations
+grows. With the capacity ledger the latency should stay flat.
+
+Usage:
+    python benchmarks/bench_allocate_resources.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tests", "mocks"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from smart_hive.services.agents.resource_manager import ResourceManager
+
+SIZES = [1_000, 10_000, 100_000, 200_000]
+SAMPLE = 1_000
+
+async def bench(size: int) -> float:
+    """Return the mean allocate latency in microseconds with `size` live allocations."""
+    manager = ResourceManager(nodes={"bench": {"cpu": 10**9, "memory": 10**12}})
+    for i in range(size):
+        await manager.allocate_resources(f"bench_{i}", {"cpu": 1, "memory": 512})
+
+    start = time.perf_counter()
+    for i in range(SAMPLE):
+        await manager.allocate_resources(f"probe_{i}", {"cpu": 1, "memory": 512})
+    elapsed = time.perf_counter() - start
+    return elapsed / SAMPLE * 1e6
+
+async def main():
+    """Run the benchmark for every fleet size."""
+    print(f"{'allocations':>12} | {'us/call':>8}")
+    print("-" * 23)
+    for size in SIZES:
+        latency = await bench(size)
+        print(f"{size:>12} | {latency:>8.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+"""
+Micro-benchmarks for control-plane lifecycle operations at scale.
+
+For every fleet size the orchestrator is populated with that many agents
+(using the test mocks for llama-agents) and each operation is timed call
+by call:
+
+    create_agent, destroy_agent, get_agent, list_agents (one 100-agent page),
+    allocate_resources, state_save, state_load
+
+Reported per operation: ops/sec, p50/p99 latency and peak traced memory
+over a 100-call sample. State operations run against a SQLite-backed
+StateManager; the orchestrator itself keeps state in memory so its
+numbers are not dominated by disk.
+
+Results are written as JSON and can be compared against a stored
+baseline; the comparison exits with status 1 on regressions.
+
+Usage:
+    python benchmarks/bench_lifecycle.py run [--sizes 100 10000 100000] [--ops 1000] [--output FILE]
+    python benchmarks/bench_lifecycle.py compare RESULTS [--baseline FILE] [--threshold 0.25]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tests", "mocks"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from smart_hive.configs.agent_configs import AGENT_VALIDATION
+from smart_hive.configs.state_config import StateConfig
+from smart_hive.services.agents.resource_manager import ResourceManager
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+from smart_hive.services.control_plane.state_manager import StateManager
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "lifecycle.json")
+NODES = {"bench": {"cpu": 10**9, "memory": 10**12, "storage": 10**12}}
+MEMORY_SAMPLE = 100
+PAGE = 100
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+async def measure(operation: Callable[[int], Awaitable], ops: int) -> Dict[str, float]:
+    """Time `ops` calls of operation(i), then trace memory over a short sample."""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(ops):
+        call_start = time.perf_counter_ns()
+        await operation(i)
+        latencies.append(time.perf_counter_ns() - call_start)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    tracemalloc.start()
+    for i in range(ops, ops + MEMORY_SAMPLE):
+        await operation(i)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": ops / elapsed,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "peak_kb": peak / 1024
+    }
+
+async def bench_size(size: int, ops: int, state_dir: str) -> Dict[str, Dict[str, float]]:
+    """Run every operation against a fleet of `size` agents."""
+    orchestrator = SmartHiveOrchestrator(
+        resource_manager=ResourceManager(nodes=NODES),
+        state_manager=StateManager(config=StateConfig())
+    )
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(size):
+        await orchestrator.create_agent(f"agent{i:07d}", "backend")
+    elapsed = time.perf_counter() - start
+    populate_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    ids = list(orchestrator.snapshot)
+    rng = random.Random(size)
+    results = {"populate": {
+        "ops_per_sec": size / elapsed,
+        "p50_us": 0.0,
+        "p99_us": 0.0,
+        "peak_kb": populate_peak / 1024
+    }}
+
+    results["create_agent"] = await measure(
+        lambda i: orchestrator.create_agent(f"probe{i:07d}", "backend"), ops
+    )
+    results["destroy_agent"] = await measure(
+        lambda i: orchestrator.destroy_agent(f"backend_probe{i:07d}"), ops
+    )
+    results["get_agent"] = await measure(
+        lambda i: orchestrator.get_agent(rng.choice(ids)), ops
+    )
+    results["list_agents"] = await measure(
+        lambda i: orchestrator.list_agents(after=rng.choice(ids), limit=PAGE), ops
+    )
+    results["allocate_resources"] = await measure(
+        lambda i: orchestrator.resource_manager.allocate_resources(f"alloc_{i}", {"cpu": 1, "memory": 512}), ops
+    )
+
+    state_manager = StateManager(config=StateConfig(state_dir=state_dir, durability="sync"))
+    state = {"agent": None, "status": "running", "type": "backend", "resources": {"cpu": 2, "memory": 1024}}
+    await state_manager.save_states({agent_id: state for agent_id in ids})
+    results["state_save"] = await measure(
+        lambda i: state_manager.save_state(ids[i % len(ids)], state), ops
+    )
+    results["state_load"] = await measure(
+        lambda i: state_manager.load_state(rng.choice(ids)), ops
+    )
+    await state_manager.close()
+    return results
+
+async def run(sizes: List[int], ops: int, output: str):
+    """Run the suite, print it and write the results to `output`."""
+    # The default instance limits would stop the fleet at a handful of agents
+    AGENT_VALIDATION["max_instances"]["backend"] = max(sizes) + 2 * (ops + MEMORY_SAMPLE)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ops": ops
+        },
+        "results": {}
+    }
+    print(f"{'agents':>8} | {'operation':<20} | {'ops/sec':>11} | {'p50 us':>9} | {'p99 us':>9} | {'peak KiB':>9}")
+    print("-" * 82)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as state_dir:
+            results = await bench_size(size, ops, state_dir)
+        report["results"][str(size)] = results
+        for operation, r in results.items():
+            print(
+                f"{size:>8} | {operation:<20} | {r['ops_per_sec']:>11.0f} | "
+                f"{r['p50_us']:>9.1f} | {r['p99_us']:>9.1f} | {r['peak_kb']:>9.1f}"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+def compare(results_path: str, baseline_path: str, threshold: float) -> int:
+    """Print the change against the baseline; return 1 if anything regressed past `threshold`."""
+    with open(results_path) as f:
+        current = json.load(f)["results"]
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'agents':>8} | {'operation':<20} | {'ops/sec':>9} | {'p99':>9} | {'peak':>9}")
+    print("-" * 68)
+    for size, operations in current.items():
+        for operation, r in operations.items():
+            base = baseline.get(size, {}).get(operation)
+            if base is None:
+                continue
+            changes = {
+                "ops_per_sec": r["ops_per_sec"] / base["ops_per_sec"] - 1 if base["ops_per_sec"] else 0.0,
+                "p99_us": r["p99_us"] / base["p99_us"] - 1 if base["p99_us"] else 0.0,
+                "peak_kb": r["peak_kb"] / base["peak_kb"] - 1 if base["peak_kb"] else 0.0
+            }
+            regressed = (
+                changes["ops_per_sec"] < -threshold
+                or changes["p99_us"] > threshold
+                or changes["peak_kb"] > threshold
+            )
+            regressions += regressed
+            print(
+                f"{size:>8} | {operation:<20} | {changes['ops_per_sec']:>+9.1%} | "
+                f"{changes['p99_us']:>+9.1%} | {changes['peak_kb']:>+9.1%}"
+                + ("  REGRESSION" if regressed else "")
+            )
+
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_run = subparsers.add_parser("run", help="Run the suite and save the results")
+    parser_run.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser_run.add_argument("--ops", type=int, default=1000)
+    parser_run.add_argument("--output", default=BASELINE)
+
+    parser_compare = subparsers.add_parser("compare", help="Compare results against the baseline")
+    parser_compare.add_argument("results")
+    parser_compare.add_argument("--baseline", default=BASELINE)
+    parser_compare.add_argument("--threshold", type=float, default=0.25)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args.sizes, args.ops, args.output))
+    else:
+        sys.exit(compare(args.results, args.baseline, args.threshold))
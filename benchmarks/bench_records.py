@@ -0,0 +1,96 @@
+"""
+Benchmark for the per-agent record layout.
+
+Builds N agents both as the nested dicts the orchestrator used to keep
+({"agent", "status", "type", "resources": {...}}) and as AgentRecords,
+and reports the traced memory per agent plus the cost of one read as the
+API does it: a dict copy with the resources looked up again for the old
+layout, the shared record for the new one.
+
+Usage:
+    python benchmarks/bench_records.py [--size 1000000] [--reads 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tests", "mocks"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from smart_hive.configs.agent_configs import RESOURCE_DIMENSIONS
+from smart_hive.services.control_plane.records import AgentRecord
+
+LAYOUT = tuple(RESOURCE_DIMENSIONS)
+
+def build_dicts(size: int):
+    """Agents in the old nested dict layout, strings built per agent as parsed requests do."""
+    return {
+        f"backend_agent{i}": {
+            "agent": None,
+            "status": "".join(["run", "ning"]),
+            "type": "".join(["back", "end"]),
+            "resources": {"cpu": 2, "memory": 1024, "node": "node-0"}
+        }
+        for i in range(size)
+    }
+
+def build_records(size: int):
+    """The same agents as AgentRecords keyed by their own id string."""
+    records = {}
+    for i in range(size):
+        agent_id = f"backend_agent{i}"
+        records[agent_id] = AgentRecord.from_allocation(
+            agent_id, "".join(["back", "end"]), None, {"cpu": 2, "memory": 1024, "node": "node-0"}, LAYOUT
+        )
+    return records
+
+def traced_size(build, size: int):
+    """Return (structure, bytes per agent) for build(size)."""
+    tracemalloc.start()
+    structure = build(size)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return structure, current / size
+
+def time_reads(read, ids, reads: int) -> float:
+    """Mean microseconds per read of random ids."""
+    sample = random.Random(0).choices(ids, k=reads)
+    start = time.perf_counter()
+    for agent_id in sample:
+        read(agent_id)
+    return (time.perf_counter() - start) / reads * 1e6
+
+def main(size: int, reads: int):
+    dicts, dict_bytes = traced_size(build_dicts, size)
+    ids = list(dicts)
+
+    def read_dict(agent_id):
+        info = dicts[agent_id].copy()
+        info["resources"] = dict(info["resources"])
+        return info
+    dict_read = time_reads(read_dict, ids, reads)
+    del dicts
+
+    records, record_bytes = traced_size(build_records, size)
+    record_read = time_reads(records.get, ids, reads)
+    record_render = time_reads(lambda agent_id: records[agent_id].resources, ids, reads)
+
+    print(f"{size} agents, key strings included")
+    print(f"{'layout':<14} | {'bytes/agent':>11} | {'read us':>8}")
+    print("-" * 40)
+    print(f"{'dict':<14} | {dict_bytes:>11.0f} | {dict_read:>8.3f}")
+    print(f"{'AgentRecord':<14} | {record_bytes:>11.0f} | {record_read:>8.3f}")
+    print(f"\nRendering the resources dict of a record for a response: {record_render:.3f} us")
+    print(f"Memory per agent: {record_bytes / dict_bytes - 1:+.1%}, read: {record_read / dict_read - 1:+.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--reads", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.size, args.reads)
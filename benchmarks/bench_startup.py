@@ -0,0 +1,75 @@
+"""
+Benchmark for control-plane startup cost.
+
+Reports, each measured in a fresh interpreter:
+    - import time of smart_hive.services.control_plane.main
+    - time and memory to construct one SmartHiveOrchestrator
+    - LLM clients built by the process after construction (should be 0)
+
+The real llama-agents / llama-index packages are used when installed,
+otherwise the test mocks are.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import importlib.util, json, sys, time, tracemalloc
+sys.path.insert(0, {src!r})
+if importlib.util.find_spec("llama_agents") is None:
+    sys.path.insert(0, {mocks!r})
+
+start = time.perf_counter()
+from smart_hive.services.control_plane import main
+imported = time.perf_counter()
+
+from smart_hive.services.llm.provider import get_llm_provider
+tracemalloc.start()
+before = tracemalloc.take_snapshot()
+start_create = time.perf_counter()
+orchestrator = main.SmartHiveOrchestrator()
+created = time.perf_counter()
+after = tracemalloc.take_snapshot()
+memory = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "create_ms": (created - start_create) * 1000,
+    "create_kb": memory / 1024,
+    "llm_clients": get_llm_provider().clients_built
+}}))
+"""
+
+def run_child() -> dict:
+    """Measure startup in a fresh interpreter."""
+    code = CHILD.format(src=os.path.join(ROOT, "src"), mocks=os.path.join(ROOT, "tests", "mocks"))
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(runs: int):
+    """Run the benchmark and print the medians."""
+    results = [run_child() for _ in range(runs)]
+    print(f"runs: {runs}")
+    for key, label in [
+        ("import_ms", "import control_plane.main (ms)"),
+        ("create_ms", "construct orchestrator (ms)"),
+        ("create_kb", "orchestrator memory (KiB)"),
+        ("llm_clients", "LLM clients built")
+    ]:
+        print(f"{label:>32}: {statistics.median(r[key] for r in results):.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    main(parser.parse_args().runs)
@@ -0,0 +1,314 @@
+"""
+HTTP load generator for the control plane.
+
+Drives the FastAPI app in-process through httpx's ASGI transport (or a
+local uvicorn server with --uvicorn) with a mix of create / get / list /
+destroy requests against /agents, using the test mocks for llama-agents.
+
+Two load models:
+    closed loop: --concurrency workers each send the next request as soon
+        as the previous one returns.
+    open loop: --rate requests/sec arrive as a Poisson process regardless
+        of how fast they are served; latency is measured from the scheduled
+        arrival so queueing delay is not hidden. --rate takes several values
+        to sweep and report the saturation point.
+
+Reported per run: throughput, error rate per operation, latency
+percentiles and histogram, and event-loop lag (how late a 10 ms timer
+fires), which shows handlers blocking the loop. With --uvicorn the server
+runs in its own thread, so the lag is that of the generator's loop.
+
+Usage:
+    python benchmarks/load_control_plane.py [--concurrency 32] [--duration 10]
+    python benchmarks/load_control_plane.py --rate 500 1000 2000 4000 [--duration 5]
+    python benchmarks/load_control_plane.py --mix create=1,get=4,list=1,destroy=1 [--uvicorn]
+"""
+
+import argparse
+import asyncio
+import bisect
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "tests", "mocks"))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import httpx
+
+from smart_hive.configs.agent_configs import AGENT_CONFIGS, AGENT_VALIDATION
+from smart_hive.configs.state_config import StateConfig
+from smart_hive.services.agents.resource_manager import ResourceManager
+from smart_hive.services.control_plane import main as control_plane
+from smart_hive.services.control_plane.state_manager import StateManager
+
+NODES = {"load": {"cpu": 10**9, "memory": 10**12, "storage": 10**12}}
+AGENT_TYPES = [agent_type for agent_type in AGENT_CONFIGS if agent_type != "resource_manager"]
+PAGE = 100
+LAG_INTERVAL = 0.01
+# Histogram bucket upper bounds in milliseconds
+BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf")]
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse 'create=1,get=4' into normalized operation weights."""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("create", "get", "list", "destroy"):
+            raise ValueError(f"Unknown operation {name!r}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, int(q * len(samples)))] if samples else 0.0
+
+class Recorder:
+    """Latencies and errors per operation."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, operation: str, latency: float, ok: bool):
+        self.latencies.setdefault(operation, []).append(latency)
+        if not ok:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+class LoadGenerator:
+    """Sends the operation mix to the control plane and tracks live agents."""
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], seed: int = 0):
+        self.client = client
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.rng = random.Random(seed)
+        self.live: List[str] = []
+        self.counter = 0
+        self.recorder = Recorder()
+
+    async def request(self, operation: str) -> bool:
+        """Send one request, returning whether it succeeded."""
+        if operation in ("get", "destroy") and not self.live:
+            operation = "create"
+        if operation == "create":
+            self.counter += 1
+            response = await self.client.post("/agents/create", json={
+                "name": f"load{self.counter}",
+                "agent_type": self.rng.choice(AGENT_TYPES)
+            })
+            if response.status_code == 200:
+                self.live.append(response.json()["agent_id"])
+        elif operation == "get":
+            response = await self.client.get(f"/agents/{self.rng.choice(self.live)}")
+        elif operation == "list":
+            params = {"limit": PAGE}
+            if self.live:
+                params["after"] = self.rng.choice(self.live)
+            response = await self.client.get("/agents", params=params)
+        else:
+            index = self.rng.randrange(len(self.live))
+            self.live[index], self.live[-1] = self.live[-1], self.live[index]
+            response = await self.client.delete(f"/agents/{self.live.pop()}")
+        return response.status_code == 200
+
+    async def timed(self, operation: str, scheduled: float):
+        """Run one request and record its latency from `scheduled`."""
+        try:
+            ok = await self.request(operation)
+        except Exception:
+            ok = False
+        self.recorder.record(operation, time.perf_counter() - scheduled, ok)
+
+    def pick(self) -> str:
+        return self.rng.choices(self.operations, self.weights)[0]
+
+    async def closed_loop(self, concurrency: int, duration: float):
+        """`concurrency` workers sending back-to-back requests for `duration` seconds."""
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.timed(self.pick(), time.perf_counter())
+                # In-process requests may never suspend; let other tasks run
+                await asyncio.sleep(0)
+
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    async def open_loop(self, rate: float, duration: float):
+        """Poisson arrivals at `rate` per second for `duration` seconds."""
+        tasks = set()
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival < start + duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self.timed(self.pick(), next_arrival))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_arrival += self.rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+
+async def monitor_loop_lag(lags: List[float], stop: asyncio.Event):
+    """Record how late a short timer fires while the load runs."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+async def setup_control_plane(preload: int):
+    """Install a fresh orchestrator sized for load and preload agents."""
+    AGENT_VALIDATION["max_instances"]["default"] = 10**9
+    orchestrator = control_plane.SmartHiveOrchestrator(
+        resource_manager=ResourceManager(nodes=NODES),
+        state_manager=StateManager(config=StateConfig())
+    )
+    control_plane.set_orchestrator(orchestrator)
+    for i in range(preload):
+        await orchestrator.create_agent(f"preload{i}", AGENT_TYPES[i % len(AGENT_TYPES)])
+    return list(orchestrator.snapshot)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def run_once(args, rate: Optional[float]) -> Dict:
+    """Run one load test and return its summary."""
+    preloaded = await setup_control_plane(args.preload)
+    server = thread = None
+    if args.uvicorn:
+        import uvicorn
+
+        # Served from its own thread and event loop so the generator does
+        # not compete with the server for the loop being measured
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(
+            control_plane.create_app(), port=port, log_level="warning", lifespan="off"
+        ))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            await asyncio.sleep(0.01)
+        client = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            limits=httpx.Limits(max_connections=args.concurrency),
+            trust_env=False
+        )
+    else:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=control_plane.create_app()),
+            base_url="http://control-plane"
+        )
+
+    generator = LoadGenerator(client, args.mix, args.seed)
+    generator.live = preloaded
+    lags: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(lags, stop))
+    start = time.perf_counter()
+    if rate is None:
+        await generator.closed_loop(args.concurrency, args.duration)
+    else:
+        await generator.open_loop(rate, args.duration)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+    await client.aclose()
+    if server is not None:
+        server.should_exit = True
+        thread.join()
+
+    recorder = generator.recorder
+    latencies = sorted(latency for samples in recorder.latencies.values() for latency in samples)
+    lags.sort()
+    return {
+        "rate": rate,
+        "offered": len(latencies) / args.duration,
+        "elapsed": elapsed,
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "errors": sum(recorder.errors.values()),
+        "latencies": latencies,
+        "per_operation": {
+            operation: (len(samples), recorder.errors.get(operation, 0), sorted(samples))
+            for operation, samples in recorder.latencies.items()
+        },
+        "lag_p99_ms": percentile(lags, 0.99) * 1000,
+        "lag_max_ms": (lags[-1] if lags else 0.0) * 1000
+    }
+
+def print_report(summary: Dict):
+    """Print throughput, errors, latency percentiles and the histogram of one run."""
+    mode = "closed loop" if summary["rate"] is None else f"open loop at {summary['rate']:.0f} req/s"
+    latencies = summary["latencies"]
+    print(f"\n== {mode}: {summary['requests']} requests in {summary['elapsed']:.1f} s ==")
+    print(f"throughput: {summary['throughput']:.0f} req/s, errors: {summary['errors'] / max(summary['requests'], 1):.2%}")
+    print(f"event-loop lag: p99 {summary['lag_p99_ms']:.1f} ms, max {summary['lag_max_ms']:.1f} ms")
+    print(f"\n{'operation':<10} | {'count':>7} | {'errors':>7} | {'p50 ms':>8} | {'p90 ms':>8} | {'p99 ms':>8} | {'max ms':>8}")
+    print("-" * 72)
+    rows = list(summary["per_operation"].items()) + [("all", (len(latencies), summary["errors"], latencies))]
+    for operation, (count, errors, samples) in rows:
+        print(
+            f"{operation:<10} | {count:>7} | {errors / max(count, 1):>7.2%} | "
+            f"{percentile(samples, 0.5) * 1000:>8.2f} | {percentile(samples, 0.9) * 1000:>8.2f} | "
+            f"{percentile(samples, 0.99) * 1000:>8.2f} | {(samples[-1] if samples else 0) * 1000:>8.2f}"
+        )
+
+    print("\nlatency histogram")
+    counts = [0] * len(BUCKETS)
+    for latency in latencies:
+        counts[bisect.bisect_left(BUCKETS, latency * 1000)] += 1
+    lower = 0.0
+    for bound, count in zip(BUCKETS, counts):
+        label = f"{lower:g}-{bound:g} ms" if bound != float("inf") else f">{lower:g} ms"
+        bar = "#" * round(40 * count / max(len(latencies), 1))
+        print(f"{label:>14} | {count:>7} {bar}")
+        lower = bound
+
+async def main(args):
+    """Run the closed-loop test or the open-loop rate sweep."""
+    if not args.rate:
+        print_report(await run_once(args, None))
+        return
+
+    summaries = []
+    for rate in args.rate:
+        summary = await run_once(args, rate)
+        print_report(summary)
+        summaries.append(summary)
+
+    print(f"\n{'rate':>8} | {'offered':>8} | {'achieved':>8} | {'p99 ms':>8} | {'errors':>7}")
+    print("-" * 53)
+    saturation = None
+    for summary in summaries:
+        p99 = percentile(summary["latencies"], 0.99) * 1000
+        print(
+            f"{summary['rate']:>8.0f} | {summary['offered']:>8.0f} | {summary['throughput']:>8.0f} | {p99:>8.2f} | "
+            f"{summary['errors'] / max(summary['requests'], 1):>7.2%}"
+        )
+        if saturation is None and (summary["throughput"] < 0.95 * summary["offered"] or p99 > args.slo_ms):
+            saturation = summary["rate"]
+    if saturation is None:
+        print("\nNot saturated at any offered rate")
+    else:
+        print(f"\nSaturated at {saturation:.0f} req/s (throughput below 95% of arrivals or p99 over {args.slo_ms:g} ms)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="Closed-loop workers (and uvicorn connections)")
+    parser.add_argument("--rate", type=float, nargs="+", help="Open-loop arrival rates to sweep, in req/s")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("create=2,get=5,list=1,destroy=2"))
+    parser.add_argument("--preload", type=int, default=1000, help="Agents created before the run")
+    parser.add_argument("--slo-ms", type=float, default=100.0, help="p99 that counts as saturated")
+    parser.add_argument("--uvicorn", action="store_true", help="Serve over a local uvicorn instead of ASGI")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -56,6 +56,22 @@ AGENT_CONFIGS = {
     }
 }
 
+# Resource dimensions tracked for every node. Nodes may declare extra
+# custom dimensions (e.g. "gpu") which are appended after these.
+RESOURCE_DIMENSIONS = ["cpu", "memory", "storage"]
+
+# Nodes available to the hive and their capacity
+NODE_CAPACITIES = {
+    "node-0": {
+        "cpu": 8,          # Max 8 CPUs
+        "memory": 8192,    # Max 8GB RAM
+        "storage": 102400  # Max 100GB disk
+    }
+}
+
+# Placement policy used to choose a node: first_fit, best_fit or worst_fit
+PLACEMENT_POLICY = "first_fit"
+
 # Validation rules for agent creation
 AGENT_VALIDATION = {
     "name_pattern": r"^[a-zA-Z0-9_-]+$",
@@ -63,5 +79,7 @@ AGENT_VALIDATION = {
         "resource_manager": 1,  # Only one resource manager allowed
         "default": 5           # Default max instances per type
     },
+    "max_batch_size": 100,     # Max agents per batch request
+    "max_page_size": 1000,     # Max agents per page when listing
     "required_fields": ["name", "agent_type"]
 }
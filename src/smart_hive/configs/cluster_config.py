@@ -0,0 +1,73 @@
+"""
+Configuration module for running the control plane across processes.
+"""
+
+import os
+import tempfile
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+def _parse_shards(value: str) -> Dict[str, str]:
+    """Parse "id=url,id=url" into a dict of shard id to base URL."""
+    shards = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        shard_id, _, url = item.partition("=")
+        shards[shard_id.strip()] = url.strip()
+    return shards
+
+
+class ClusterConfig(BaseModel):
+    """Configuration for running the control plane across worker processes and shards."""
+    shared_ledger: Optional[str] = Field(
+        default=None,
+        description=(
+            "Name of the shared memory segment holding the resource ledger of every process on the host. "
+            "Each process must serve its own shard. If not provided, each process keeps its own ledger."
+        )
+    )
+    ledger_slots: int = Field(
+        default=65536,
+        description="Agents the shared ledger can index; fixed when the segment is created.",
+        ge=1
+    )
+    ledger_lock_dir: str = Field(
+        default_factory=tempfile.gettempdir,
+        description="Directory of the lock file guarding the shared ledger."
+    )
+
+    shard_id: Optional[str] = Field(
+        default=None,
+        description="Id of this control plane shard among `shards`. Sharding is disabled when not set."
+    )
+    shards: Dict[str, str] = Field(
+        default_factory=dict,
+        description=(
+            "Base URL of every control plane shard by shard id, this one included. Without a shared "
+            "ledger each shard admits against an equal share of the node capacities."
+        )
+    )
+    virtual_nodes: int = Field(
+        default=128,
+        description="Points per shard on the consistent-hash ring; more points spread agents more evenly.",
+        ge=1
+    )
+    forward_timeout: float = Field(
+        default=10.0,
+        description="Seconds to wait for another shard when forwarding a request to it.",
+        gt=0.0
+    )
+
+    @classmethod
+    def from_env(cls) -> "ClusterConfig":
+        """Create config from environment variables."""
+        return cls(
+            shared_ledger=os.getenv("SMART_HIVE_SHARED_LEDGER"),
+            ledger_slots=int(os.getenv("SMART_HIVE_LEDGER_SLOTS", "65536")),
+            ledger_lock_dir=os.getenv("SMART_HIVE_LEDGER_LOCK_DIR", tempfile.gettempdir()),
+            shard_id=os.getenv("SMART_HIVE_SHARD_ID"),
+            shards=_parse_shards(os.getenv("SMART_HIVE_SHARDS", "")),
+            virtual_nodes=int(os.getenv("SMART_HIVE_VIRTUAL_NODES", "128")),
+            forward_timeout=float(os.getenv("SMART_HIVE_FORWARD_TIMEOUT", "10"))
+        )
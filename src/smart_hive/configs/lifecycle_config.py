@@ -0,0 +1,59 @@
+"""
+Configuration module for agent lifecycle background work.
+"""
+
+import os
+
+from pydantic import BaseModel, Field
+
+
+class LifecycleConfig(BaseModel):
+    """Configuration for background provisioning and the reaper finishing agent teardowns."""
+    provisioning_workers: int = Field(
+        default=4,
+        description="Workers creating agents from the provisioning queue.",
+        ge=1
+    )
+    provisioning_queue_size: int = Field(
+        default=1000,
+        description="High-water mark of the provisioning queue; submissions past it are rejected with 429.",
+        ge=1
+    )
+    provisioning_job_history: int = Field(
+        default=10000,
+        description="Finished provisioning jobs kept for GET /jobs/{id}, oldest dropped first.",
+        ge=1
+    )
+    reaper_interval: float = Field(
+        default=1.0,
+        description="Longest seconds the reaper sleeps between passes.",
+        gt=0.0
+    )
+    reaper_base_backoff: float = Field(
+        default=0.5,
+        description="Seconds before the first retry of a failed teardown, doubled on every failure.",
+        gt=0.0
+    )
+    reaper_max_backoff: float = Field(
+        default=60.0,
+        description="Longest seconds between retries of a failed teardown.",
+        gt=0.0
+    )
+    reconcile_interval: float = Field(
+        default=30.0,
+        description="Seconds between sweeps releasing allocations and states of agents no longer in the fleet.",
+        gt=0.0
+    )
+
+    @classmethod
+    def from_env(cls) -> "LifecycleConfig":
+        """Create config from environment variables."""
+        return cls(
+            provisioning_workers=int(os.getenv("SMART_HIVE_PROVISIONING_WORKERS", "4")),
+            provisioning_queue_size=int(os.getenv("SMART_HIVE_PROVISIONING_QUEUE_SIZE", "1000")),
+            provisioning_job_history=int(os.getenv("SMART_HIVE_PROVISIONING_JOB_HISTORY", "10000")),
+            reaper_interval=float(os.getenv("SMART_HIVE_REAPER_INTERVAL", "1.0")),
+            reaper_base_backoff=float(os.getenv("SMART_HIVE_REAPER_BASE_BACKOFF", "0.5")),
+            reaper_max_backoff=float(os.getenv("SMART_HIVE_REAPER_MAX_BACKOFF", "60")),
+            reconcile_interval=float(os.getenv("SMART_HIVE_RECONCILE_INTERVAL", "30"))
+        )
@@ -0,0 +1,47 @@
+"""
+Configuration module for tracing and profiling.
+"""
+
+import os
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ObservabilityConfig(BaseModel):
+    """Configuration for tracing spans and the sampling profiler."""
+    trace_file: Optional[str] = Field(
+        default=None,
+        description="JSON lines file spans are exported to. Tracing is disabled when not set."
+    )
+    trace_sample_rate: float = Field(
+        default=1.0,
+        description="Fraction of root spans (and their children) that are recorded.",
+        ge=0.0,
+        le=1.0
+    )
+    profiler_enabled: bool = Field(
+        default=False,
+        description="Expose the sampling profiler endpoint."
+    )
+    profiler_interval: float = Field(
+        default=0.005,
+        description="Seconds between profiler stack samples.",
+        gt=0.0
+    )
+    profiler_max_seconds: float = Field(
+        default=60.0,
+        description="Longest profile a single request may capture.",
+        gt=0.0
+    )
+
+    @classmethod
+    def from_env(cls) -> "ObservabilityConfig":
+        """Create config from environment variables."""
+        return cls(
+            trace_file=os.getenv("SMART_HIVE_TRACE_FILE"),
+            trace_sample_rate=float(os.getenv("SMART_HIVE_TRACE_SAMPLE_RATE", "1.0")),
+            profiler_enabled=os.getenv("SMART_HIVE_PROFILER_ENABLED", "false").lower() in ("1", "true", "yes"),
+            profiler_interval=float(os.getenv("SMART_HIVE_PROFILER_INTERVAL", "0.005")),
+            profiler_max_seconds=float(os.getenv("SMART_HIVE_PROFILER_MAX_SECONDS", "60"))
+        )
@@ -8,6 +8,12 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 
+def _optional_int(name: str) -> Optional[int]:
+    """Read an integer env var, None when unset or empty."""
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
 class OpenAIConfig(BaseModel):
     """Configuration for OpenAI API."""
     api_key: Optional[str] = Field(
@@ -24,6 +30,104 @@ class OpenAIConfig(BaseModel):
         ge=0.0,
         le=2.0
     )
+    cache_enabled: bool = Field(
+        default=False,
+        description="Cache LLM responses for identical model, temperature and prompt."
+    )
+    cache_max_entries: int = Field(
+        default=1024,
+        description="Maximum responses kept in the in-memory cache tier.",
+        ge=1
+    )
+    cache_ttl: float = Field(
+        default=3600.0,
+        description="Seconds a cached response stays valid.",
+        gt=0.0
+    )
+    cache_path: Optional[str] = Field(
+        default=None,
+        description="SQLite file for the on-disk cache tier. Disabled when not set."
+    )
+    cache_sampled: bool = Field(
+        default=False,
+        description="Also cache responses sampled at a temperature above 0, which are not deterministic."
+    )
+    http_max_connections: int = Field(
+        default=100,
+        description="Maximum open connections in the shared HTTP pool.",
+        ge=1
+    )
+    http_max_keepalive_connections: int = Field(
+        default=20,
+        description="Idle connections kept alive in the shared HTTP pool.",
+        ge=0
+    )
+    http_keepalive_expiry: float = Field(
+        default=30.0,
+        description="Seconds an idle connection is kept alive.",
+        ge=0.0
+    )
+    http_timeout: float = Field(
+        default=60.0,
+        description="Timeout in seconds for LLM HTTP requests.",
+        gt=0.0
+    )
+    http2: bool = Field(
+        default=False,
+        description="Use HTTP/2 for LLM requests. Requires the h2 package (httpx[http2])."
+    )
+    scheduler_enabled: bool = Field(
+        default=False,
+        description="Route async LLM calls through the central scheduler."
+    )
+    max_concurrency: int = Field(
+        default=8,
+        description="Maximum concurrent requests per model.",
+        ge=1
+    )
+    requests_per_minute: Optional[int] = Field(
+        default=None,
+        description="Request-per-minute budget per model. Unlimited when not set.",
+        ge=1
+    )
+    tokens_per_minute: Optional[int] = Field(
+        default=None,
+        description="Prompt token-per-minute budget per model. Unlimited when not set.",
+        ge=1
+    )
+    max_retries: int = Field(
+        default=3,
+        description="Retries for throttled or failed LLM requests.",
+        ge=0
+    )
+    retry_base_delay: float = Field(
+        default=0.5,
+        description="Base delay in seconds of the jittered exponential backoff.",
+        ge=0.0
+    )
+    retry_max_delay: float = Field(
+        default=20.0,
+        description="Maximum backoff delay in seconds.",
+        ge=0.0
+    )
+    embedding_model: str = Field(
+        default="text-embedding-ada-002",
+        description="OpenAI model used for embeddings."
+    )
+    coalesce_enabled: bool = Field(
+        default=False,
+        description="Single-flight identical concurrent LLM calls and micro-batch embeddings."
+    )
+    batch_window: float = Field(
+        default=0.005,
+        description="Seconds embedding calls are collected before being sent as one batch.",
+        ge=0.0
+    )
+    max_batch_size: int = Field(
+        default=64,
+        description="Maximum texts per embedding batch.",
+        ge=1
+    )
 
     @classmethod
     def from_env(cls) -> "OpenAIConfig":
@@ -31,7 +135,28 @@ class OpenAIConfig(BaseModel):
         return cls(
             api_key=os.getenv("OPENAI_API_KEY"),
             model=os.getenv("OPENAI_MODEL", "gpt-4-1106-preview"),
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.0"))
+            temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.0")),
+            cache_enabled=os.getenv("OPENAI_CACHE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            cache_max_entries=int(os.getenv("OPENAI_CACHE_MAX_ENTRIES", "1024")),
+            cache_ttl=float(os.getenv("OPENAI_CACHE_TTL", "3600")),
+            cache_path=os.getenv("OPENAI_CACHE_PATH"),
+            cache_sampled=os.getenv("OPENAI_CACHE_SAMPLED", "false").lower() in ("1", "true", "yes"),
+            http_max_connections=int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "100")),
+            http_max_keepalive_connections=int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            http_keepalive_expiry=float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30")),
+            http_timeout=float(os.getenv("OPENAI_HTTP_TIMEOUT", "60")),
+            http2=os.getenv("OPENAI_HTTP2", "false").lower() in ("1", "true", "yes"),
+            scheduler_enabled=os.getenv("OPENAI_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes"),
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+            requests_per_minute=_optional_int("OPENAI_REQUESTS_PER_MINUTE"),
+            tokens_per_minute=_optional_int("OPENAI_TOKENS_PER_MINUTE"),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "3")),
+            retry_base_delay=float(os.getenv("OPENAI_RETRY_BASE_DELAY", "0.5")),
+            retry_max_delay=float(os.getenv("OPENAI_RETRY_MAX_DELAY", "20")),
+            embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002"),
+            coalesce_enabled=os.getenv("OPENAI_COALESCE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            batch_window=float(os.getenv("OPENAI_BATCH_WINDOW", "0.005")),
+            max_batch_size=int(os.getenv("OPENAI_MAX_BATCH_SIZE", "64"))
         )
 
     def validate_api_key(self) -> bool:
@@ -0,0 +1,54 @@
+"""
+Configuration module for agent state persistence.
+"""
+
+import os
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class StateConfig(BaseModel):
+    """Configuration for StateManager persistence."""
+    state_dir: Optional[str] = Field(
+        default=None,
+        description="Directory for the persisted agent state. If not provided, state is kept in memory only."
+    )
+    backend: Literal["sqlite", "journal"] = Field(
+        default="sqlite",
+        description="sqlite keeps one row per agent, journal appends every change to a log compacted by snapshots."
+    )
+    durability: Literal["sync", "batched", "async"] = Field(
+        default="batched",
+        description=(
+            "sync writes every change before returning, batched groups concurrent changes into "
+            "one transaction and waits for it, async returns immediately and flushes in the background."
+        )
+    )
+    batch_size: int = Field(
+        default=100,
+        description="Number of buffered changes that triggers a flush.",
+        ge=1
+    )
+    flush_interval: float = Field(
+        default=0.01,
+        description="Maximum seconds a buffered change waits before it is flushed.",
+        gt=0.0
+    )
+    snapshot_every: int = Field(
+        default=10000,
+        description="Number of journal records after which a compacted snapshot is written.",
+        ge=1
+    )
+
+    @classmethod
+    def from_env(cls) -> "StateConfig":
+        """Create config from environment variables."""
+        return cls(
+            state_dir=os.getenv("SMART_HIVE_STATE_DIR"),
+            backend=os.getenv("SMART_HIVE_STATE_BACKEND", "sqlite"),
+            durability=os.getenv("SMART_HIVE_STATE_DURABILITY", "batched"),
+            batch_size=int(os.getenv("SMART_HIVE_STATE_BATCH_SIZE", "100")),
+            flush_interval=float(os.getenv("SMART_HIVE_STATE_FLUSH_INTERVAL", "0.01")),
+            snapshot_every=int(os.getenv("SMART_HIVE_STATE_SNAPSHOT_EVERY", "10000"))
+        )
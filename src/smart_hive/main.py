@@ -1,5 +1,50 @@
-def main():
+import argparse
+import json
+import sys
+
+DEFAULT_IMPORTTIME_MODULE = "smart_hive.services.control_plane.main"
+
+def importtime(args) -> int:
+    """Print the import-time report of a module and check it against a budget."""
+    from smart_hive.utils.importtime import format_report, measure_import_time
+
+    try:
+        report = measure_import_time(args.module)
+    except RuntimeError as e:
+        print(f"Error measuring import time: {str(e)}")
+        return 1
+
+    if args.json:
+        report["entries"] = report["entries"][:args.top]
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report, top=args.top))
+
+    if args.budget_ms is not None and report["import_ms"] > args.budget_ms:
+        print(f"Import of {args.module} took {report['import_ms']:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="smart-hive")
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser_importtime = subparsers.add_parser(
+        "importtime", help="Report where the import time of a module goes"
+    )
+    parser_importtime.add_argument("module", nargs="?", default=DEFAULT_IMPORTTIME_MODULE)
+    parser_importtime.add_argument("--top", type=int, default=15, help="Rows to show per table")
+    parser_importtime.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser_importtime.add_argument(
+        "--budget-ms", type=float, default=None, help="Exit with status 1 if the import takes longer"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "importtime":
+        return importtime(args)
+
     print("Welcome to SmartHive!")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
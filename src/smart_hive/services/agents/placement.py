@@ -0,0 +1,137 @@
+"""
+Placement Engine
+
+Bin-packing placement of agent allocations across the nodes of the hive.
+
+Node capacities and usage are kept as (nodes x dimensions) NumPy arrays so
+feasibility checks and policy scoring run as single vectorized operations
+across every node, for one request or a whole batch. Every policy is served
+by that one scan; there are no per-policy indexes of free capacity to keep
+in sync with usage.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from smart_hive.utils.lazy_import import lazy_import
+
+# Loaded on first use; annotations are quoted so they do not trigger the load
+np = lazy_import("numpy")
+
+PLACEMENT_POLICIES = ("first_fit", "best_fit", "worst_fit")
+
+class PlacementEngine:
+    """
+    Chooses a node for each allocation according to a placement policy.
+
+    Policies:
+        first_fit: the first node, in configuration order, with room.
+        best_fit: the node left with the least normalized free capacity.
+        worst_fit: the node left with the most normalized free capacity, spreading load.
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[str, Dict[str, float]],
+        policy: str = "first_fit",
+        dimensions: Optional[Iterable[str]] = None
+    ):
+        if policy not in PLACEMENT_POLICIES:
+            raise ValueError(f"Invalid placement policy. Must be one of: {list(PLACEMENT_POLICIES)}")
+        if not nodes:
+            raise ValueError("At least one node is required")
+        self.policy = policy
+
+        # Configured dimensions first, then any custom keys declared by nodes
+        self.dimensions: List[str] = list(dimensions or [])
+        for capacity in nodes.values():
+            for key in capacity:
+                if key not in self.dimensions:
+                    self.dimensions.append(key)
+        self._dim_index: Dict[str, int] = {dim: i for i, dim in enumerate(self.dimensions)}
+
+        self.nodes: List[str] = list(nodes)
+        self._node_index: Dict[str, int] = {name: i for i, name in enumerate(self.nodes)}
+        self.capacity = np.array(
+            [[nodes[name].get(dim, 0) for dim in self.dimensions] for name in self.nodes],
+            dtype=np.float64
+        )
+        # Scale every dimension to [0, 1] so scoring is not dominated by memory
+        self._scale = 1.0 / np.maximum(self.capacity.max(axis=0), 1.0)
+        self.reset()
+
+    def reset(self):
+        """Mark every node as completely free."""
+        self.usage = np.zeros_like(self.capacity)
+
+    def vector(self, requirements: Dict[str, float]) -> Optional["np.ndarray"]:
+        """Convert a requirements dict to a resource vector, or None if it uses an unknown dimension."""
+        vector = np.zeros(len(self.dimensions), dtype=np.float64)
+        for key, value in requirements.items():
+            if key in self._dim_index:
+                vector[self._dim_index[key]] = value
+            elif value:
+                return None
+        return vector
+
+    def feasibility(self, requests: "np.ndarray", usage: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """
+        Return a boolean (requests x nodes) matrix telling which node can hold
+        which request. Accepts a single vector too, returning one row per node.
+        """
+        free = self.capacity - (self.usage if usage is None else usage)
+        return np.all(free >= requests[..., np.newaxis, :], axis=-1)
+
+    def _choose(self, request: "np.ndarray", usage: "np.ndarray") -> Optional[int]:
+        """Pick a node index for one request against the given usage matrix."""
+        free = self.capacity - usage
+        fits = np.all(free >= request, axis=1)
+        if not fits.any():
+            return None
+        if self.policy == "first_fit":
+            return int(np.argmax(fits))
+
+        score = ((free - request) * self._scale).sum(axis=1)
+        if self.policy == "best_fit":
+            return int(np.argmin(np.where(fits, score, np.inf)))
+        return int(np.argmax(np.where(fits, score, -np.inf)))
+
+    def place(self, request: "np.ndarray") -> Optional[str]:
+        """Return the node chosen for the request, or None if nothing fits."""
+        index = self._choose(request, self.usage)
+        return None if index is None else self.nodes[index]
+
+    def place_batch(self, requests: "np.ndarray") -> Optional[List[str]]:
+        """
+        Place a batch of requests as a unit. Returns one node per request, or
+        None if the whole batch does not fit. Usage is not modified.
+        """
+        requests = np.atleast_2d(requests)
+        if not self.feasibility(requests).any(axis=1).all():
+            return None
+
+        usage = self.usage.copy()
+        placements = []
+        for request in requests:
+            index = self._choose(request, usage)
+            if index is None:
+                return None
+            usage[index] += request
+            placements.append(self.nodes[index])
+        return placements
+
+    def node_index(self, node: str) -> int:
+        """Position of a node in the usage and capacity arrays."""
+        return self._node_index[node]
+
+    def reserve(self, node: str, request: "np.ndarray"):
+        """Take capacity from a node."""
+        self.usage[self._node_index[node]] += request
+
+    def release(self, node: str, request: "np.ndarray"):
+        """Return capacity to a node."""
+        self.usage[self._node_index[node]] -= request
+
+    def free_capacity(self, node: str) -> Dict[str, float]:
+        """Return the free capacity of a node per dimension."""
+        free = self.capacity[self._node_index[node]] - self.usage[self._node_index[node]]
+        return {dim: free[i].item() for i, dim in enumerate(self.dimensions)}
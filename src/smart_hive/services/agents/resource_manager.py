@@ -4,69 +4,371 @@ Resource Manager Service
 Basic resource management for agents using llama-agents framework.
 """
 
-from typing import Dict, Optional
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
 from llama_agents import AgentService
-from llama_index.llms.openai import OpenAI
 
-from smart_hive.configs.agent_configs import AGENT_CONFIGS
+from smart_hive.configs.agent_configs import (
+    AGENT_CONFIGS,
+    AGENT_VALIDATION,
+    NODE_CAPACITIES,
+    PLACEMENT_POLICY,
+    RESOURCE_DIMENSIONS,
+)
+from smart_hive.configs.cluster_config import ClusterConfig
+from smart_hive.services.agents.placement import PlacementEngine
+from smart_hive.services.agents.shared_ledger import TYPE_CODES, SharedLedger
+from smart_hive.services.llm.provider import get_llm_provider
+from smart_hive.services.llm.scheduler import PRIORITY_LOW
+from smart_hive.utils.lazy_import import lazy_import
+from smart_hive.utils.metrics import REGISTRY
+from smart_hive.utils.tracing import traced
+
+np = lazy_import("numpy")
+
+ALLOCATIONS = REGISTRY.counter("smart_hive_allocations_total", "Resource allocations granted.")
+ALLOCATION_REJECTIONS = REGISTRY.counter(
+    "smart_hive_allocation_rejections_total", "Resource allocations rejected.", ["reason"]
+)
+
+def max_instances(agent_type: str) -> int:
+    """Maximum number of live agents of a type."""
+    return AGENT_VALIDATION["max_instances"].get(agent_type, AGENT_VALIDATION["max_instances"]["default"])
 
 class ResourceManager(AgentService):
     """
     Basic resource manager for agent lifecycle management.
+
+    Keeps a capacity ledger with running totals per resource so admission
+    does not depend on the number of allocations, and places every
+    allocation on a node through a PlacementEngine. Every dimension in the
+    requirements (cpu, memory, storage and custom ones) is enforced.
+
+    Allocations can also be taken in two steps: reserve() holds the
+    capacity in one atomic step, then commit() makes it an allocation or
+    cancel() gives it back.
+
+    With a SharedLedger (SMART_HIVE_SHARED_LEDGER) node usage lives in
+    shared memory and every agent holding capacity is indexed there, so
+    processes admit against one global capacity, agent ids are unique
+    across them and the instance limit of each type holds across them.
+    The allocations dict and running totals still cover only the agents
+    of this process; sweep_shared() gives back those of dead processes.
+    A control plane shard without a shared ledger gets an equal share of
+    the default node capacities.
     """
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        nodes: Optional[Dict[str, Dict[str, float]]] = None,
+        policy: Optional[str] = None,
+        ledger: Optional[SharedLedger] = None
+    ):
         config = AGENT_CONFIGS["resource_manager"]
         super().__init__(
             description=config["description"],
             service_name=config["name"],
-            llm=OpenAI()
+            llm=get_llm_provider().lazy(PRIORITY_LOW)
+        )
+        cluster = ClusterConfig.from_env()
+        if nodes is None:
+            nodes = NODE_CAPACITIES
+            if ledger is None and not cluster.shared_ledger and cluster.shard_id and cluster.shards:
+                # Shards admitting on their own each get an equal share, so together they fit the nodes
+                nodes = {
+                    node: {dim: amount / len(cluster.shards) for dim, amount in capacity.items()}
+                    for node, capacity in nodes.items()
+                }
+        self.placement = PlacementEngine(
+            nodes,
+            policy or PLACEMENT_POLICY,
+            RESOURCE_DIMENSIONS
         )
+        # Resource vector layout of the records built from these allocations
+        self.layout = tuple(self.placement.dimensions)
         self.resource_allocations: Dict[str, Dict] = {}
+        # Capacity held for agents still being created
+        self.reservations: Dict[str, Dict] = {}
+        self.allocated: Dict[str, float] = dict.fromkeys(self.placement.dimensions, 0)
 
-    async def allocate_resources(self, agent_id: str, requirements: Dict):
-        """Allocate resources to an agent."""
-        if agent_id in self.resource_allocations:
-            return False
-            
+        if ledger is None and cluster.shared_ledger:
+            ledger = SharedLedger.open(
+                cluster.shared_ledger,
+                len(self.placement.nodes),
+                len(self.placement.dimensions),
+                cluster.ledger_slots,
+                cluster.ledger_lock_dir
+            )
+        self.ledger = ledger
+        if ledger is not None:
+            self.placement.usage = ledger.usage
+
+    def _exclusive(self):
+        """Async context holding the shared ledger, if any, for an admission or release."""
+        return self.ledger.alock() if self.ledger is not None else nullcontext()
+
+    def reset(self):
+        """Release every allocation and reservation and zero the ledger."""
+        if self.ledger is not None:
+            # Other processes keep theirs
+            with self.ledger.lock():
+                for agent_id, alloc in [*self.resource_allocations.items(), *self.reservations.items()]:
+                    self._release_shared(agent_id, alloc)
+        else:
+            self.placement.reset()
+        self.resource_allocations = {}
+        self.reservations = {}
+        self.allocated = dict.fromkeys(self.placement.dimensions, 0)
+
+    def rebuild_ledger(self):
+        """Recompute the running totals and node usage from the current allocations and reservations."""
+        self.allocated = dict.fromkeys(self.placement.dimensions, 0)
+        allocs = [*self.resource_allocations.items(), *self.reservations.items()]
+        if self.ledger is not None:
+            # Workers recovering the same states add each agent to the shared ledger once
+            with self.ledger.lock():
+                for agent_id, alloc in allocs:
+                    requirements = self._requirements(alloc)
+                    vector = self.placement.vector(requirements)
+                    node = self.placement.node_index(alloc["node"])
+                    if self.ledger.add(agent_id, self._agent_type(agent_id), node, vector):
+                        self.placement.reserve(alloc["node"], vector)
+                    self._account(requirements, 1)
+            return
+
+        self.placement.reset()
+        node_usage: Dict[str, Dict[str, float]] = {}
+        for _, alloc in allocs:
+            usage = node_usage.setdefault(alloc["node"], {})
+            for key, value in alloc.items():
+                if key != "node" and key != "status":
+                    usage[key] = usage.get(key, 0) + value
+        for node, usage in node_usage.items():
+            self.placement.reserve(node, self.placement.vector(usage))
+            self._account(usage, 1)
+
+    def _release_shared(self, agent_id: str, alloc: Dict):
+        """Give back the shared capacity of an agent; the caller holds the ledger lock."""
+        if self.ledger.remove(agent_id):
+            self.placement.release(alloc["node"], self.placement.vector(self._requirements(alloc)))
+
+    async def shared_allocation(self, agent_id: str) -> Optional[Dict]:
+        """
+        Type and resources of an agent held by any process, from the shared
+        ledger, as {"type": ..., "resources": {dimension: amount, "node": name}}.
+        """
+        if self.ledger is None:
+            return None
+        async with self.ledger.alock():
+            entry = self.ledger.get(agent_id)
+        if entry is None:
+            return None
+        agent_type, node, vector = entry
+        resources = {dim: amount.item() for dim, amount in zip(self.placement.dimensions, vector)}
+        return {"type": agent_type, "resources": {**resources, "node": self.placement.nodes[node]}}
+
+    def _account(self, requirements: Dict[str, float], sign: int):
+        """Add (sign=1) or subtract (sign=-1) requirements from the running totals."""
+        for key, value in requirements.items():
+            if key in self.allocated:
+                self.allocated[key] += sign * value
+
+    @staticmethod
+    def _agent_type(agent_id: str) -> str:
+        return agent_id.split("_")[0]
+
+    @staticmethod
+    def _requirements(alloc: Dict) -> Dict[str, float]:
+        """Extract the resource dimensions from an allocation record."""
+        return {key: value for key, value in alloc.items() if key not in ("node", "status")}
+
+    def resolve_requirements(self, agent_id: str, requirements: Dict) -> Dict[str, float]:
+        """Merge requirements with the agent type defaults."""
         # Use default requirements from config if not specified
-        agent_type = agent_id.split("_")[0]
+        agent_type = self._agent_type(agent_id)
         default_requirements = AGENT_CONFIGS.get(agent_type, {}).get("requirements", {})
-        final_requirements = {**default_requirements, **requirements}
-            
-        # Check if we have enough resources
-        total_cpu = sum(alloc["cpu"] for alloc in self.resource_allocations.values())
-        total_memory = sum(alloc["memory"] for alloc in self.resource_allocations.values())
-        
-        requested_cpu = final_requirements.get("cpu", 1)
-        requested_memory = final_requirements.get("memory", 512)
-        
-        # Simple resource limits
-        if total_cpu + requested_cpu > 8:  # Max 8 CPUs
+        return {"cpu": 1, "memory": 512, **default_requirements, **requirements}
+
+    def _held(self, agent_id: str) -> bool:
+        """
+        Whether the agent already has an allocation or a reservation, in
+        any process when the ledger is shared (the caller holds its lock).
+        """
+        if agent_id in self.resource_allocations or agent_id in self.reservations:
+            return True
+        return self.ledger is not None and agent_id in self.ledger
+
+    def _over_limit(self, agent_types: List[str]) -> bool:
+        """
+        Whether adding agents of these types would exceed an instance limit
+        across the processes sharing the ledger (the caller holds its lock).
+        """
+        if self.ledger is None:
             return False
-        if total_memory + requested_memory > 8192:  # Max 8GB RAM
+        return any(
+            agent_type in TYPE_CODES
+            and self.ledger.count(agent_type) + agent_types.count(agent_type) > max_instances(agent_type)
+            for agent_type in set(agent_types)
+        )
+
+    async def sweep_shared(self) -> int:
+        """Give back the shared capacity of processes that died holding it. Returns how many agents it covered."""
+        if self.ledger is None:
+            return 0
+        async with self.ledger.alock():
+            return self.ledger.sweep()
+
+    async def _release(self, agent_id: str, alloc: Dict):
+        """Give back the capacity of an allocation or reservation already dropped from the dicts."""
+        requirements = self._requirements(alloc)
+        async with self._exclusive():
+            if self.ledger is not None:
+                self._release_shared(agent_id, alloc)
+            else:
+                self.placement.release(alloc["node"], self.placement.vector(requirements))
+        self._account(requirements, -1)
+
+    @traced("ResourceManager.reserve")
+    async def reserve(self, agent_id: str, requirements: Dict) -> Optional[Dict]:
+        """
+        Hold capacity for an agent on a node, as one step with no await in
+        between the check and the update. Returns the reserved resources,
+        or None if the agent already holds some or nothing fits.
+        """
+        async with self._exclusive():
+            if self._held(agent_id):
+                ALLOCATION_REJECTIONS.labels("duplicate").inc()
+                return None
+            if self._over_limit([self._agent_type(agent_id)]):
+                ALLOCATION_REJECTIONS.labels("type_limit").inc()
+                return None
+
+            final_requirements = self.resolve_requirements(agent_id, requirements)
+            vector = self.placement.vector(final_requirements)
+            if vector is None:
+                ALLOCATION_REJECTIONS.labels("unknown_resource").inc()
+                return None
+
+            # Find a node with enough resources
+            node = self.placement.place(vector)
+            if node is None:
+                ALLOCATION_REJECTIONS.labels("capacity").inc()
+                return None
+
+            if self.ledger is not None and not self.ledger.add(
+                agent_id, self._agent_type(agent_id), self.placement.node_index(node), vector
+            ):
+                ALLOCATION_REJECTIONS.labels("ledger_full").inc()
+                return None
+            self.placement.reserve(node, vector)
+
+        self._account(final_requirements, 1)
+        self.reservations[agent_id] = {
+            **final_requirements,
+            "node": node,
+            "status": "reserved"
+        }
+        return {**final_requirements, "node": node}
+
+    @traced("ResourceManager.commit")
+    async def commit(self, agent_id: str) -> bool:
+        """Turn the reservation of an agent into an allocation."""
+        alloc = self.reservations.pop(agent_id, None)
+        if alloc is None:
+            return False
+        alloc["status"] = "allocated"
+        self.resource_allocations[agent_id] = alloc
+        ALLOCATIONS.inc()
+        return True
+
+    @traced("ResourceManager.cancel")
+    async def cancel(self, agent_id: str) -> bool:
+        """Give back the capacity held by the reservation of an agent."""
+        alloc = self.reservations.pop(agent_id, None)
+        if alloc is None:
+            return False
+        await self._release(agent_id, alloc)
+        return True
+
+    @traced("ResourceManager.allocate_resources")
+    async def allocate_resources(self, agent_id: str, requirements: Dict):
+        """Allocate resources to an agent."""
+        if await self.reserve(agent_id, requirements) is None:
             return False
-            
-        self.resource_allocations[agent_id] = {
-            "cpu": requested_cpu,
-            "memory": requested_memory,
-            "status": "allocated"
+        return await self.commit(agent_id)
+
+    @traced("ResourceManager.allocate_batch")
+    async def allocate_batch(self, requests: Dict[str, Dict]) -> bool:
+        """
+        Allocate resources to several agents as one atomic step.
+        Either every agent gets a node or nothing is allocated.
+        """
+        if not requests:
+            return True
+        resolved = {
+            agent_id: self.resolve_requirements(agent_id, requirements)
+            for agent_id, requirements in requests.items()
         }
+        vectors = [self.placement.vector(requirements) for requirements in resolved.values()]
+        if any(vector is None for vector in vectors):
+            ALLOCATION_REJECTIONS.labels("unknown_resource").inc(len(requests))
+            return False
+
+        async with self._exclusive():
+            if any(self._held(agent_id) for agent_id in requests):
+                ALLOCATION_REJECTIONS.labels("duplicate").inc(len(requests))
+                return False
+            if self._over_limit([self._agent_type(agent_id) for agent_id in requests]):
+                ALLOCATION_REJECTIONS.labels("type_limit").inc(len(requests))
+                return False
+
+            nodes = self.placement.place_batch(np.stack(vectors))
+            if nodes is None:
+                ALLOCATION_REJECTIONS.labels("capacity").inc(len(requests))
+                return False
+            if self.ledger is not None and len(self.ledger) + len(requests) > self.ledger.slots:
+                ALLOCATION_REJECTIONS.labels("ledger_full").inc(len(requests))
+                return False
+
+            for agent_id, vector, node in zip(resolved, vectors, nodes):
+                if self.ledger is not None:
+                    self.ledger.add(agent_id, self._agent_type(agent_id), self.placement.node_index(node), vector)
+                self.placement.reserve(node, vector)
+
+        for (agent_id, requirements), node in zip(resolved.items(), nodes):
+            self.resource_allocations[agent_id] = {
+                **requirements,
+                "node": node,
+                "status": "allocated"
+            }
+            self._account(requirements, 1)
+        ALLOCATIONS.inc(len(requests))
         return True
 
+    @traced("ResourceManager.deallocate_resources")
     async def deallocate_resources(self, agent_id: str):
         """Clean up resources when an agent is destroyed."""
         if agent_id not in self.resource_allocations:
             return False
-            
-        del self.resource_allocations[agent_id]
+
+        await self._release(agent_id, self.resource_allocations.pop(agent_id))
         return True
 
+    @traced("ResourceManager.deallocate_batch")
+    async def deallocate_batch(self, agent_ids: List[str]) -> bool:
+        """Clean up resources for several agents at once."""
+        released = True
+        for agent_id in agent_ids:
+            released = await self.deallocate_resources(agent_id) and released
+        return released
+
+    @traced("ResourceManager.get_resource_status")
     async def get_resource_status(self, agent_id: str) -> Optional[Dict]:
         """Get the current resource allocation for an agent."""
         if agent_id not in self.resource_allocations:
             return None
-            
+
         status = self.resource_allocations[agent_id].copy()
         del status["status"]  # Remove status from resources
         return status
@@ -0,0 +1,328 @@
+"""
+Shared Resource Ledger
+
+Capacity accounting shared by every worker process of the control plane.
+Node usage and an index of the agents holding capacity live in a single
+multiprocessing.shared_memory segment with a fixed layout, read and
+written in place as NumPy arrays. Every change is made while holding an
+exclusive fcntl lock on a file, so admission in one worker sees the
+allocations of all the others.
+
+Each entry records the pid of the process that added it, so sweep() can
+give back the capacity of a process that died without releasing it. The
+live agents of every type are counted too, so instance limits hold across
+processes. Agent records themselves stay in the process that created
+them: processes sharing a ledger must each serve their own shard, and
+join() refuses a second live process for the same shard.
+
+Segment layout:
+
+    header   int64[5]               magic, nodes, dimensions, slots, agents
+    usage    float64[nodes, dims]   capacity in use per node
+    counts   int64[256]             agents per type code
+    members  uint64[64, 2]          pid and shard key of every process joined
+    index    open-addressing hash table of `slots` agents, one array per
+             field: vector float64[dims], key uint64[2] (BLAKE2b of the
+             agent id), owner int32 (pid), node int16, state uint8, type uint8
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+from smart_hive.configs.agent_configs import AGENT_CONFIGS
+from smart_hive.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Changed whenever the layout changes, so older segments are refused
+MAGIC = 0x53484C45
+HEADER_FIELDS = 5
+TYPE_SLOTS = 256
+MEMBERS = 64
+EMPTY, USED, DELETED = 0, 1, 2
+
+# Agent types are stored as their position in the configuration
+AGENT_TYPES = list(AGENT_CONFIGS)
+TYPE_CODES = {agent_type: code for code, agent_type in enumerate(AGENT_TYPES)}
+UNKNOWN_TYPE = 255
+
+def _key(agent_id: str) -> Tuple[int, int]:
+    """Fixed-size key of an agent id, stable across processes unlike hash()."""
+    digest = hashlib.blake2b(agent_id.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+def _segment_size(nodes: int, dims: int, slots: int) -> int:
+    fixed = 8 * HEADER_FIELDS + 8 * nodes * dims + 8 * TYPE_SLOTS + 16 * MEMBERS
+    return fixed + slots * (8 * dims + 16 + 4 + 2 + 1 + 1)
+
+def _alive(pid: int) -> bool:
+    """Whether a process exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class SharedLedger:
+    """
+    Node usage and agent index in shared memory.
+
+    Methods other than lock(), alock() and join() expect the caller to
+    hold the lock. The lock is not reentrant. lock() blocks the calling
+    thread; coroutines use alock(), which waits for a contended lock in a
+    worker thread instead of blocking the event loop.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, lock_path: str):
+        self.segment = segment
+        self.lock_path = lock_path
+        buffer = segment.buf
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buffer)
+        _, nodes, dims, slots, _ = (int(value) for value in self.header)
+        self.slots = slots
+
+        offset = self.header.nbytes
+        self.usage = np.ndarray((nodes, dims), dtype=np.float64, buffer=buffer, offset=offset)
+        offset += self.usage.nbytes
+        self.counts = np.ndarray((TYPE_SLOTS,), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += self.counts.nbytes
+        self.members = np.ndarray((MEMBERS, 2), dtype=np.uint64, buffer=buffer, offset=offset)
+        offset += self.members.nbytes
+        self.vectors = np.ndarray((slots, dims), dtype=np.float64, buffer=buffer, offset=offset)
+        offset += self.vectors.nbytes
+        self.keys = np.ndarray((slots, 2), dtype=np.uint64, buffer=buffer, offset=offset)
+        offset += self.keys.nbytes
+        self.owners = np.ndarray((slots,), dtype=np.int32, buffer=buffer, offset=offset)
+        offset += self.owners.nbytes
+        self.nodes = np.ndarray((slots,), dtype=np.int16, buffer=buffer, offset=offset)
+        offset += self.nodes.nbytes
+        self.states = np.ndarray((slots,), dtype=np.uint8, buffer=buffer, offset=offset)
+        offset += self.states.nbytes
+        self.types = np.ndarray((slots,), dtype=np.uint8, buffer=buffer, offset=offset)
+
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(lock_path, "a+b")
+
+    @classmethod
+    def open(cls, name: str, nodes: int, dims: int, slots: int, lock_dir: str) -> "SharedLedger":
+        """
+        Attach to the ledger segment `name`, creating it if this is the
+        first process. Raises ValueError if an existing segment was created
+        for another layout.
+        """
+        lock_path = os.path.join(lock_dir, f"{name}.lock")
+        with open(lock_path, "a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                segment = shared_memory.SharedMemory(name, create=True, size=_segment_size(nodes, dims, slots))
+                header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=segment.buf)
+                header[:] = (MAGIC, nodes, dims, slots, 0)
+                del header
+            except FileExistsError:
+                segment = shared_memory.SharedMemory(name)
+                header = tuple(int(value) for value in np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=segment.buf))
+                if header[:4] != (MAGIC, nodes, dims, slots):
+                    segment.close()
+                    raise ValueError(
+                        f"Shared ledger {name} has another layout (nodes, dims, slots = {header[1:4]})"
+                    ) from None
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        # The segment outlives any single worker; it is removed by unlink() only
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return cls(segment, lock_path)
+
+    def _acquire(self):
+        self._thread_lock.acquire()
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def _try_acquire(self) -> bool:
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._thread_lock.release()
+            return False
+        return True
+
+    def _unlock(self):
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Hold the ledger exclusively, against other threads and processes."""
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._unlock()
+
+    @asynccontextmanager
+    async def alock(self) -> AsyncIterator[None]:
+        """lock() for coroutines: a contended lock is awaited in a worker thread."""
+        if not self._try_acquire():
+            waiter = asyncio.ensure_future(asyncio.to_thread(self._acquire))
+            try:
+                await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # The thread may still get the lock; give it back once it does
+                waiter.add_done_callback(lambda done: done.exception() is None and self._unlock())
+                raise
+        try:
+            yield
+        finally:
+            self._unlock()
+
+    def __len__(self) -> int:
+        """Agents in the index."""
+        return int(self.header[4])
+
+    def _find(self, agent_id: str) -> Tuple[int, int]:
+        """(slot of `agent_id` or -1, first slot it could be inserted at or -1)."""
+        k0, k1 = _key(agent_id)
+        slot = k0 % self.slots
+        free = -1
+        for _ in range(self.slots):
+            state = self.states[slot]
+            if state == EMPTY:
+                return -1, slot if free < 0 else free
+            if state == DELETED:
+                if free < 0:
+                    free = slot
+            elif self.keys[slot, 0] == k0 and self.keys[slot, 1] == k1:
+                return slot, free
+            slot = (slot + 1) % self.slots
+        return -1, free
+
+    def __contains__(self, agent_id: str) -> bool:
+        return self._find(agent_id)[0] >= 0
+
+    def get(self, agent_id: str) -> Optional[Tuple[str, int, "np.ndarray"]]:
+        """(agent type, node index, resource vector) of an indexed agent."""
+        slot = self._find(agent_id)[0]
+        if slot < 0:
+            return None
+        code = int(self.types[slot])
+        agent_type = AGENT_TYPES[code] if code < len(AGENT_TYPES) else None
+        return agent_type, int(self.nodes[slot]), self.vectors[slot].copy()
+
+    def count(self, agent_type: str) -> int:
+        """Indexed agents of a type, across every process."""
+        return int(self.counts[TYPE_CODES.get(agent_type, UNKNOWN_TYPE)])
+
+    def add(self, agent_id: str, agent_type: str, node: int, vector: "np.ndarray") -> bool:
+        """Index an agent owned by this process. Returns False if it is already indexed or the index is full."""
+        slot, free = self._find(agent_id)
+        if slot >= 0 or free < 0:
+            return False
+        code = TYPE_CODES.get(agent_type, UNKNOWN_TYPE)
+        self.keys[free] = _key(agent_id)
+        self.types[free] = code
+        self.owners[free] = os.getpid()
+        self.nodes[free] = node
+        self.vectors[free] = vector
+        self.states[free] = USED
+        self.counts[code] += 1
+        self.header[4] += 1
+        return True
+
+    def remove(self, agent_id: str) -> bool:
+        """Drop an agent from the index. Returns False if it was not indexed."""
+        slot = self._find(agent_id)[0]
+        if slot < 0:
+            return False
+        self._drop(slot)
+        return True
+
+    def _drop(self, slot: int):
+        self.counts[self.types[slot]] -= 1
+        # A slot followed by an empty one ends no probe chain, so it can be emptied
+        following = (slot + 1) % self.slots
+        self.states[slot] = EMPTY if self.states[following] == EMPTY else DELETED
+        while self.states[slot] == EMPTY:
+            slot = (slot - 1) % self.slots
+            if self.states[slot] != DELETED:
+                break
+            self.states[slot] = EMPTY
+        self.header[4] -= 1
+
+    def sweep(self) -> int:
+        """
+        Give back the capacity of agents whose owner process is gone, and
+        forget the processes that joined but are gone. Returns how many
+        agents were dropped.
+        """
+        used = np.flatnonzero(self.states == USED)
+        dead = {pid for pid in np.unique(self.owners[used]).tolist() if not _alive(pid)}
+        dropped = 0
+        for slot in used.tolist():
+            if int(self.owners[slot]) in dead:
+                self.usage[self.nodes[slot]] -= self.vectors[slot]
+                self._drop(slot)
+                dropped += 1
+        for member in self.members:
+            if member[0] and not _alive(int(member[0])):
+                member[:] = 0
+        return dropped
+
+    def join(self, shard: str):
+        """
+        Register this process as the one serving `shard` ("" when not
+        sharded). Raises RuntimeError if a live process already does, as
+        agent records are not shared: two processes behind one address
+        would each see only half the agents.
+        """
+        pid, key = os.getpid(), _key(shard)[0]
+        with self.lock():
+            self.sweep()
+            for member_pid, member_key in self.members.tolist():
+                if member_key != key or not member_pid:
+                    continue
+                if member_pid == pid:
+                    return
+                raise RuntimeError(
+                    f"Process {member_pid} already serves shard {shard!r} from shared ledger "
+                    f"{self.segment.name}; run each worker process as its own shard"
+                )
+            free = np.flatnonzero(self.members[:, 0] == 0)
+            if len(free) == 0:
+                raise RuntimeError(f"Shared ledger {self.segment.name} has no room for another process")
+            self.members[free[0]] = (pid, key)
+
+    def leave(self):
+        """Unregister this process."""
+        with self.lock():
+            self.members[self.members[:, 0] == os.getpid()] = 0
+
+    def clear(self):
+        """Zero the usage and counts and empty the index."""
+        self.usage[:] = 0
+        self.counts[:] = 0
+        self.states[:] = EMPTY
+        self.header[4] = 0
+
+    def close(self, unlink: bool = False):
+        """Detach from the segment, removing it too if `unlink`."""
+        # Views must be released before the buffer can be closed
+        self.header = self.usage = self.counts = self.members = None
+        self.vectors = self.keys = self.owners = self.nodes = self.states = self.types = None
+        self._lock_file.close()
+        self.segment.close()
+        if unlink:
+            # unlink() unregisters the segment from the resource tracker again
+            resource_tracker.register(self.segment._name, "shared_memory")
+            self.segment.unlink()
@@ -0,0 +1,85 @@
+"""
+Control Plane Locks
+
+Concurrency primitives of the orchestrator. Changes to one agent id are
+serialized by a lock picked from a fixed set of shards, so independent
+creates and destroys still run concurrently, and per-type instance slots
+are claimed before any await.
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+class ShardedLocks:
+    """A fixed set of asyncio locks, one picked per key by hash."""
+
+    def __init__(self, shards: int = 64):
+        self.locks = [asyncio.Lock() for _ in range(shards)]
+
+    def shards(self, keys: Iterable[str]) -> List[int]:
+        """Distinct shard indexes of `keys`, in the order they must be taken."""
+        return sorted({hash(key) % len(self.locks) for key in keys})
+
+    def hold(self, *keys: str):
+        """
+        Async context manager holding the locks of every key. Shards are
+        taken in index order so two holders of overlapping key sets cannot
+        deadlock. A single key is held by its lock itself.
+        """
+        if len(keys) == 1:
+            return self.locks[hash(keys[0]) % len(self.locks)]
+        return _Held([self.locks[shard] for shard in self.shards(keys)])
+
+class _Held:
+    """Several locks taken in order and released in reverse."""
+
+    __slots__ = ("locks", "taken")
+
+    def __init__(self, locks: List[asyncio.Lock]):
+        self.locks = locks
+        self.taken = 0
+
+    async def __aenter__(self):
+        try:
+            for lock in self.locks:
+                await lock.acquire()
+                self.taken += 1
+        except BaseException:
+            self._release()
+            raise
+
+    async def __aexit__(self, *exc_info):
+        self._release()
+
+    def _release(self):
+        for lock in reversed(self.locks[:self.taken]):
+            lock.release()
+        self.taken = 0
+
+class TypeCounters:
+    """
+    Instances per agent type, counting the ones still being created.
+
+    The count is read, checked against the limit and written back without
+    an await in between, so concurrent creates on the event loop can never
+    overshoot the limit.
+    """
+
+    def __init__(self, counts: Optional[Dict[str, int]] = None):
+        self.counts: Dict[str, int] = dict(counts or {})
+
+    def try_acquire(self, agent_type: str, count: int, limit: int) -> bool:
+        """Claim `count` slots of `agent_type` if that stays within `limit`."""
+        current = self.counts.get(agent_type, 0)
+        if current + count > limit:
+            return False
+        self.counts[agent_type] = current + count
+        return True
+
+    def release(self, agent_type: str, count: int = 1):
+        """Give back `count` slots of `agent_type`."""
+        current = self.counts.get(agent_type, 0) - count
+        if current > 0:
+            self.counts[agent_type] = current
+        else:
+            self.counts.pop(agent_type, None)
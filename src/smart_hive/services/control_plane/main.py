@@ -4,10 +4,16 @@ Control Plane Service
 This module implements the central control plane for SmartHive using llama-agents.
 """
 
+import asyncio
+import heapq
+import logging
 import re
+import threading
 from contextlib import asynccontextmanager
-from typing import Dict, List, Optional
-from fastapi import FastAPI, HTTPException, status
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, ConfigDict, field_validator
 from llama_agents import (
     AgentService,
@@ -15,11 +21,46 @@ from llama_agents import (
     SimpleMessageQueue,
     AgentOrchestrator,
 )
-from llama_index.llms.openai import OpenAI
 
 from smart_hive.configs.agent_configs import AGENT_CONFIGS, AGENT_VALIDATION
-from smart_hive.services.agents.resource_manager import ResourceManager
+from smart_hive.configs.cluster_config import ClusterConfig
+from smart_hive.configs.lifecycle_config import LifecycleConfig
+from smart_hive.configs.observability_config import ObservabilityConfig
+from smart_hive.services.agents.resource_manager import ResourceManager, max_instances
+from smart_hive.services.control_plane.metrics import (
+    AGENT_REJECTIONS,
+    BATCH_AGENT_SERVICE,
+    BATCH_ALLOCATE,
+    BATCH_DESTROY_DEALLOCATE,
+    BATCH_DESTROY_PERSIST,
+    BATCH_DESTROY_QUEUE,
+    BATCH_PERSIST,
+    BATCH_VALIDATE,
+    CREATE_AGENT_SERVICE,
+    CREATE_ALLOCATE,
+    CREATE_PERSIST,
+    CREATE_VALIDATE,
+    DESTROY_DEALLOCATE,
+    DESTROY_PERSIST,
+    DESTROY_QUEUE,
+    RECONCILED,
+    TEARDOWN_FAILURES,
+    MetricsMiddleware,
+)
+from smart_hive.services.control_plane.locks import ShardedLocks, TypeCounters
+from smart_hive.services.control_plane.provisioning import ProvisioningJob, ProvisioningQueue, QueueFull
+from smart_hive.services.control_plane.reaper import Reaper
+from smart_hive.services.control_plane.sharding import ShardRouter, ShardUnavailable
+from smart_hive.services.control_plane.records import AgentRecord, AgentStatus
+from smart_hive.services.control_plane.snapshot import FleetSnapshot
 from smart_hive.services.control_plane.state_manager import StateManager
+from smart_hive.services.llm.provider import get_llm_provider
+from smart_hive.services.llm.scheduler import PRIORITY_HIGH
+from smart_hive.utils.metrics import REGISTRY, MetricsRegistry, Stopwatch
+from smart_hive.utils.profiler import SamplingProfiler
+from smart_hive.utils.tracing import TRACER, TracingMiddleware, configure_tracing, traced
+
+logger = logging.getLogger(__name__)
 
 class AgentRequest(BaseModel):
     """Request model for agent operations with validation."""
@@ -60,140 +101,450 @@ class AgentResponse(BaseModel):
     resources: Optional[Dict] = None
     error: Optional[str] = None
 
-# Initialize components
-message_queue = SimpleMessageQueue()
-resource_manager = ResourceManager()
-state_manager = StateManager()
+class JobResponse(BaseModel):
+    """Response model for asynchronous provisioning jobs."""
+    job_id: str
+    status: str
+    agent_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_job(cls, job: ProvisioningJob) -> "JobResponse":
+        return cls(job_id=job.job_id, status=job.status, agent_id=job.agent_id, error=job.error)
+
+class BatchAgentRequest(BaseModel):
+    """Request model for creating several agents at once."""
+    agents: List[AgentRequest]
+
+    @field_validator("agents")
+    @classmethod
+    def validate_batch_size(cls, v):
+        """Validate batch size."""
+        if not v:
+            raise ValueError("Batch must contain at least one agent")
+        if len(v) > AGENT_VALIDATION["max_batch_size"]:
+            raise ValueError(f"Batch cannot contain more than {AGENT_VALIDATION['max_batch_size']} agents")
+        return v
+
+class BatchDestroyRequest(BaseModel):
+    """Request model for destroying several agents at once."""
+    agent_ids: List[str]
+    wait: bool = True
+
+# Created on first use so importing this module stays cheap
+message_queue: Optional[SimpleMessageQueue] = None
+
+def get_message_queue() -> SimpleMessageQueue:
+    """Return the shared message queue, creating it on first call."""
+    global message_queue
+    if message_queue is None:
+        message_queue = SimpleMessageQueue()
+    return message_queue
+
+# Allocations held by the control plane itself rather than by an agent
+SYSTEM_ALLOCATIONS = frozenset({"resource_manager"})
+
+DESTROY_STAGES = (DESTROY_QUEUE, DESTROY_DEALLOCATE, DESTROY_PERSIST)
+BATCH_DESTROY_STAGES = (BATCH_DESTROY_QUEUE, BATCH_DESTROY_DEALLOCATE, BATCH_DESTROY_PERSIST)
 
 class SmartHiveOrchestrator(AgentOrchestrator):
-    """Custom orchestrator with enhanced error handling and state management."""
-    
-    def __init__(self):
-        super().__init__(llm=OpenAI())
-        self.resource_manager = resource_manager
-        self.state_manager = state_manager
-        self._agents: Dict[str, Dict] = {}
+    """
+    Custom orchestrator with enhanced error handling and state management.
+
+    Creates and destroys of one agent id are serialized by a sharded lock,
+    while those of different ids run concurrently. Instance slots per type
+    are claimed before resources are reserved, and resources are only
+    committed once the agent state is saved.
+
+    Creates can also be queued as provisioning jobs, run by a worker pool.
+    Teardown runs every cleanup step even if one fails. An agent destroyed
+    without waiting, or whose cleanup fails, stays in the fleet as
+    terminating until the reaper finishes its teardown.
+    """
+
+    def __init__(
+        self,
+        resource_manager: Optional[ResourceManager] = None,
+        state_manager: Optional[StateManager] = None,
+        lifecycle: Optional[LifecycleConfig] = None
+    ):
+        super().__init__(llm=get_llm_provider().lazy(PRIORITY_HIGH))
+        self.resource_manager = resource_manager or ResourceManager()
+        self.state_manager = state_manager or StateManager()
+        self.snapshot = FleetSnapshot()
+        self.locks = ShardedLocks()
+        self.type_counters = TypeCounters()
+        self.provisioning = ProvisioningQueue(self, lifecycle)
+        self.reaper = Reaper(self, lifecycle)
 
     @classmethod
     async def create(cls):
         """Create a new orchestrator."""
-        instance = cls()
-        instance.resource_manager = ResourceManager()
-        instance.state_manager = StateManager()
-        instance._agents = {}
-        return instance
+        return cls()
+
+    def _publish(self, added: List[AgentRecord] = (), removed: List[str] = ()):
+        """Replace the published snapshot with the next version including a change."""
+        self.snapshot = self.snapshot.evolve(added, removed)
 
     async def reset(self):
         """Reset orchestrator state."""
-        self._agents = {}
-        self.resource_manager.resource_allocations = {}
+        await self.provisioning.close()
+        await self.reaper.close()
+        self.reaper.pending.clear()
+        self.snapshot = FleetSnapshot(self.snapshot.version + 1)
+        self.type_counters = TypeCounters()
+        self.resource_manager.reset()
         await self.state_manager.clear()
 
     async def _initialize_from_state(self):
-        """Initialize agents from saved state."""
+        """
+        Initialize agents from saved state, rebuilding the per-type index
+        and the resource ledger from the recovered records, and hand agents
+        saved as terminating back to the reaper.
+        """
         try:
             saved_states = await self.state_manager.list_states()
-            if isinstance(saved_states, dict):
-                self._agents = saved_states
+            saved_states = saved_states if isinstance(saved_states, dict) else {}
         except Exception as e:
             print(f"Error loading saved states: {e}")
-            self._agents = {}
+            saved_states = {}
+
+        layout = self.resource_manager.layout
+        records = {}
+        allocations = {}
+        for agent_id, agent_state in saved_states.items():
+            if isinstance(agent_state, AgentRecord):
+                record, resources = agent_state, agent_state.resources
+            else:
+                record, resources = AgentRecord.from_state(agent_id, agent_state, layout), agent_state.get("resources")
+            # Live services are not persisted, build them again
+            if record.agent is None:
+                record.agent = AgentService(
+                    description=AGENT_CONFIGS[record.type]["description"],
+                    service_name=agent_id[len(record.type) + 1:]
+                )
+            if resources:
+                allocations[agent_id] = {**resources, "status": "allocated"}
+            records[agent_id] = record
+        # Share the records with the state store instead of keeping the dicts
+        self.state_manager.states.update(records)
+        self.resource_manager.resource_allocations = allocations
+        self.resource_manager.rebuild_ledger()
+        self.snapshot = FleetSnapshot.build(records, self.snapshot.version + 1)
+        self.type_counters = TypeCounters(self.snapshot.type_counts())
+        # Teardowns interrupted by the restart are resumed
+        for agent_id, record in records.items():
+            if record.status == AgentStatus.TERMINATING:
+                self.reaper.schedule(agent_id)
 
+    @traced("SmartHiveOrchestrator.create_agent")
     async def create_agent(self, name: str, agent_type: str, requirements: Optional[Dict] = None) -> str:
         """Create a new agent with resource allocation and state persistence."""
-        agent_id = None
-        try:
-            # Create base agent
-            agent_id = f"{agent_type}_{name}"
-            if agent_id in self._agents:
+        stopwatch = Stopwatch()
+        agent_id = f"{agent_type}_{name}"
+        async with self.locks.hold(agent_id):
+            if agent_id in self.snapshot:
+                AGENT_REJECTIONS.labels("duplicate").inc()
                 raise ValueError(f"Agent {agent_id} already exists")
 
-            # Check instance limits
-            agent_count = sum(1 for a in self._agents.values() if a["type"] == agent_type)
-            max_instances = AGENT_VALIDATION["max_instances"].get(
-                agent_type,
-                AGENT_VALIDATION["max_instances"]["default"]
-            )
-            if agent_count >= max_instances:
-                raise ValueError(f"Maximum number of {agent_type} instances ({max_instances}) reached")
+            # Claim an instance slot
+            limit = max_instances(agent_type)
+            if not self.type_counters.try_acquire(agent_type, 1, limit):
+                AGENT_REJECTIONS.labels("limit").inc()
+                raise ValueError(f"Maximum number of {agent_type} instances ({limit}) reached")
+            stopwatch.lap(CREATE_VALIDATE)
 
             # Use default requirements if none provided
             if requirements is None:
                 requirements = AGENT_CONFIGS[agent_type]["requirements"]
 
-            # Allocate resources
-            if not await self.resource_manager.allocate_resources(agent_id, requirements):
-                raise ValueError(f"Failed to allocate resources for agent {agent_id}")
+            resources = None
+            try:
+                # Reserve resources
+                resources = await self.resource_manager.reserve(agent_id, requirements)
+                if resources is None:
+                    AGENT_REJECTIONS.labels("resources").inc()
+                    raise ValueError(f"Failed to allocate resources for agent {agent_id}")
+                stopwatch.lap(CREATE_ALLOCATE)
 
-            # Initialize agent
-            agent = AgentService(
-                description=AGENT_CONFIGS[agent_type]["description"],
-                service_name=name
-            )
-            
-            # Save state
-            agent_state = {
-                "agent": agent,
-                "status": "running",
-                "type": agent_type,
-                "resources": await self.resource_manager.get_resource_status(agent_id)
-            }
-            self._agents[agent_id] = agent_state
-            await self.state_manager.save_state(agent_id, agent_state)
-            
-            return agent_id
-            
-        except Exception as e:
-            # Cleanup on failure
-            if agent_id and agent_id in self._agents:
-                await self.destroy_agent(agent_id)
-            raise e
-
-    async def destroy_agent(self, agent_id: str) -> bool:
-        """Destroy an agent with complete cleanup."""
-        if agent_id not in self._agents:
+                # Initialize agent
+                with TRACER.span("AgentService.__init__", agent_type=agent_type):
+                    agent = AgentService(
+                        description=AGENT_CONFIGS[agent_type]["description"],
+                        service_name=name
+                    )
+                stopwatch.lap(CREATE_AGENT_SERVICE)
+
+                # Save state, then make the agent visible
+                record = AgentRecord.from_allocation(
+                    agent_id, agent_type, agent, resources, self.resource_manager.layout
+                )
+                await self.state_manager.save_state(agent_id, record)
+                await self.resource_manager.commit(agent_id)
+                self._publish(added=[record])
+                stopwatch.lap(CREATE_PERSIST)
+            except Exception:
+                # Cleanup on failure
+                if resources is not None:
+                    await self.resource_manager.cancel(agent_id)
+                    await self.state_manager.delete_state(agent_id)
+                self.type_counters.release(agent_type)
+                raise
+
+        return agent_id
+
+    @traced("SmartHiveOrchestrator.create_agents")
+    async def create_agents(self, agents: List[Dict]) -> List[str]:
+        """
+        Create several agents as one unit. The batch is validated once,
+        resources are reserved atomically and state is saved in one write.
+        If any agent fails the whole batch is rolled back.
+        """
+        # Validate the whole batch before touching any manager
+        stopwatch = Stopwatch()
+        agent_ids = [f"{agent['agent_type']}_{agent['name']}" for agent in agents]
+        if len(set(agent_ids)) != len(agent_ids):
+            AGENT_REJECTIONS.labels("duplicate").inc(len(agents))
+            raise ValueError("Batch contains duplicate agents")
+
+        async with self.locks.hold(*agent_ids):
+            snapshot = self.snapshot
+            for agent_id in agent_ids:
+                if agent_id in snapshot:
+                    AGENT_REJECTIONS.labels("duplicate").inc(len(agents))
+                    raise ValueError(f"Agent {agent_id} already exists")
+
+            batch_counts: Dict[str, int] = {}
+            for agent in agents:
+                batch_counts[agent["agent_type"]] = batch_counts.get(agent["agent_type"], 0) + 1
+            claimed: Dict[str, int] = {}
+            for agent_type, count in batch_counts.items():
+                limit = max_instances(agent_type)
+                if not self.type_counters.try_acquire(agent_type, count, limit):
+                    for claimed_type, claimed_count in claimed.items():
+                        self.type_counters.release(claimed_type, claimed_count)
+                    AGENT_REJECTIONS.labels("limit").inc(len(agents))
+                    raise ValueError(f"Maximum number of {agent_type} instances ({limit}) reached")
+                claimed[agent_type] = count
+            stopwatch.lap(BATCH_VALIDATE)
+
+            try:
+                # Reserve capacity for the whole batch in one step
+                requests = {
+                    agent_id: agent.get("requirements") or AGENT_CONFIGS[agent["agent_type"]]["requirements"]
+                    for agent_id, agent in zip(agent_ids, agents)
+                }
+                if not await self.resource_manager.allocate_batch(requests):
+                    AGENT_REJECTIONS.labels("resources").inc(len(agents))
+                    raise ValueError("Failed to allocate resources for batch")
+                stopwatch.lap(BATCH_ALLOCATE)
+
+                try:
+                    agent_states = {}
+                    layout = self.resource_manager.layout
+                    for agent_id, agent in zip(agent_ids, agents):
+                        with TRACER.span("AgentService.__init__", agent_type=agent["agent_type"]):
+                            service = AgentService(
+                                description=AGENT_CONFIGS[agent["agent_type"]]["description"],
+                                service_name=agent["name"]
+                            )
+                        agent_states[agent_id] = AgentRecord.from_allocation(
+                            agent_id,
+                            agent["agent_type"],
+                            service,
+                            await self.resource_manager.get_resource_status(agent_id),
+                            layout
+                        )
+                    stopwatch.lap(BATCH_AGENT_SERVICE)
+                    await self.state_manager.save_states(agent_states)
+                    stopwatch.lap(BATCH_PERSIST)
+                except Exception:
+                    # Roll back the whole batch
+                    await self.resource_manager.deallocate_batch(agent_ids)
+                    await self.state_manager.delete_states(agent_ids)
+                    raise
+            except Exception:
+                for agent_type, count in claimed.items():
+                    self.type_counters.release(agent_type, count)
+                raise
+
+            self._publish(added=list(agent_states.values()))
+        return agent_ids
+
+    async def _teardown(self, agent_ids: List[str], stages=DESTROY_STAGES) -> bool:
+        """
+        Unsubscribe agents, release their resources and delete their state.
+        Each step runs even if an earlier one failed. Every step is
+        idempotent, so a failed teardown can be run again. Returns whether
+        every step succeeded.
+        """
+        queue = get_message_queue()
+
+        async def unsubscribe():
+            for agent_id in agent_ids:
+                await queue.remove_subscriber(agent_id)
+
+        # Only the state deletion may do I/O, so the steps are simply awaited in turn
+        steps = (
+            unsubscribe,
+            lambda: self.resource_manager.deallocate_batch(agent_ids),
+            lambda: self.state_manager.delete_states(agent_ids)
+        )
+        errors = []
+        stopwatch = Stopwatch()
+        for stage, step in zip(stages, steps):
+            try:
+                await step()
+            except Exception as e:
+                logger.exception("Error during cleanup of agents %s", agent_ids)
+                errors.append(e)
+            stopwatch.lap(stage)
+        if errors:
+            TEARDOWN_FAILURES.inc(len(agent_ids))
+        return not errors
+
+    async def _finish(self, records: List[AgentRecord], stages=DESTROY_STAGES) -> bool:
+        """Tear agents down and remove them from the fleet if that succeeds."""
+        agent_ids = [record.agent_id for record in records]
+        if not await self._teardown(agent_ids, stages):
             return False
+        self._publish(removed=agent_ids)
+        for record in records:
+            self.type_counters.release(record.type)
+        return True
 
-        try:
-            # Get agent info for cleanup
-            agent_info = self._agents[agent_id]
-            
-            # Cleanup message queue
-            await message_queue.remove_subscriber(agent_id)
-            
-            # Cleanup resources
-            await self.resource_manager.deallocate_resources(agent_id)
-            
-            # Cleanup state
-            await self.state_manager.delete_state(agent_id)
-            
-            # Remove from memory
-            del self._agents[agent_id]
-            
+    async def _hand_to_reaper(self, records: List[AgentRecord]):
+        """
+        Mark agents as terminating and let the reaper finish their teardown.
+        The status is saved too, so a restart resumes the teardown instead
+        of reloading the agents as running.
+        """
+        terminating = [
+            record.with_status(AgentStatus.TERMINATING)
+            for record in records
+            if record.status != AgentStatus.TERMINATING
+        ]
+        self._publish(added=terminating)
+        if terminating:
+            try:
+                await self.state_manager.save_states({record.agent_id: record for record in terminating})
+            except Exception:
+                # The reaper still finishes the teardown; only a restart before then loses it
+                logger.exception("Error saving terminating agents %s", [record.agent_id for record in terminating])
+        for record in records:
+            self.reaper.schedule(record.agent_id)
+
+    @traced("SmartHiveOrchestrator.destroy_agents")
+    async def destroy_agents(self, agent_ids: List[str], wait: bool = True) -> List[str]:
+        """
+        Destroy several agents as one unit. If any agent does not exist
+        nothing is destroyed. Without `wait`, or if the cleanup fails, the
+        agents are left terminating for the reaper.
+        """
+        async with self.locks.hold(*agent_ids):
+            snapshot = self.snapshot
+            missing = [agent_id for agent_id in agent_ids if agent_id not in snapshot]
+            if missing:
+                raise ValueError(f"Agents not found: {missing}")
+
+            records = [snapshot[agent_id] for agent_id in agent_ids]
+            if not wait or not await self._finish(records, BATCH_DESTROY_STAGES):
+                await self._hand_to_reaper(records)
+        return agent_ids
+
+    @traced("SmartHiveOrchestrator.destroy_agent")
+    async def destroy_agent(self, agent_id: str, wait: bool = True) -> bool:
+        """
+        Destroy an agent with complete cleanup. Without `wait` the agent is
+        marked terminating and torn down by the reaper; so is an agent whose
+        cleanup fails, to be retried. Returns False if it does not exist.
+        """
+        async with self.locks.hold(agent_id):
+            record = self.snapshot.get(agent_id)
+            if record is None:
+                return False
+            if wait and record.status != AgentStatus.TERMINATING and await self._finish([record]):
+                return True
+            await self._hand_to_reaper([record])
             return True
-            
-        except Exception as e:
-            # Log error but don't re-raise
-            print(f"Error during agent cleanup: {str(e)}")
-            return False
 
-    async def get_agent(self, agent_id: str) -> Optional[Dict]:
-        """Get agent details including resource status."""
-        if agent_id not in self._agents:
-            return None
-            
-        agent_info = self._agents[agent_id].copy()
-        agent_info["resources"] = await self.resource_manager.get_resource_status(agent_id)
-        return agent_info
-
-    async def list_agents(self) -> List[Dict]:
-        """List all agents and their status."""
-        agents = []
-        for agent_id, info in self._agents.items():
-            agent_info = info.copy()
-            agent_info["resources"] = await self.resource_manager.get_resource_status(agent_id)
-            agents.append({"agent_id": agent_id, **agent_info})
-        return agents
+    async def reap(self, agent_id: str) -> bool:
+        """Finish the teardown of a terminating agent. Returns whether it is gone."""
+        async with self.locks.hold(agent_id):
+            record = self.snapshot.get(agent_id)
+            if record is None or record.status != AgentStatus.TERMINATING:
+                return True
+            return await self._finish([record])
+
+    async def reconcile(self) -> int:
+        """
+        Release allocations and states of agents that are not in the fleet,
+        left behind by failed cleanups, and shared capacity left by dead
+        processes. Returns how many were released.
+        """
+        released = await self.resource_manager.sweep_shared()
+        if released:
+            RECONCILED.labels("ledger").inc(released)
+        snapshot = self.snapshot
+        candidates = set(self.resource_manager.resource_allocations) | set(self.state_manager.states)
+        for agent_id in candidates - SYSTEM_ALLOCATIONS:
+            if agent_id in snapshot:
+                continue
+            # Creates hold the lock until their agent is published
+            async with self.locks.hold(agent_id):
+                if agent_id in self.snapshot:
+                    continue
+                if await self.resource_manager.deallocate_resources(agent_id):
+                    RECONCILED.labels("allocation").inc()
+                    released += 1
+                if await self.state_manager.delete_state(agent_id):
+                    RECONCILED.labels("state").inc()
+                    released += 1
+        return released
+
+    @traced("SmartHiveOrchestrator.get_agent")
+    async def get_agent(self, agent_id: str) -> Optional[AgentRecord]:
+        """
+        Get the record of an agent, including its resources, from the
+        current snapshot. The record is shared, not copied. Agents of other
+        worker processes are read from the shared ledger, without a service.
+        """
+        record = self.snapshot.get(agent_id)
+        if record is None:
+            shared = await self.resource_manager.shared_allocation(agent_id)
+            if shared is not None and shared["type"] is not None:
+                record = AgentRecord.from_allocation(
+                    agent_id, shared["type"], None, shared["resources"], self.resource_manager.layout
+                )
+        return record
+
+    async def iter_agents(
+        self,
+        agent_type: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        snapshot: Optional[FleetSnapshot] = None
+    ) -> AsyncIterator[AgentRecord]:
+        """
+        Yield agents in agent id order, starting after the `after` cursor.
+        The walk reads one snapshot (the current one unless given), so
+        agents created or destroyed meanwhile never affect it.
+        """
+        snapshot = snapshot if snapshot is not None else self.snapshot
+        for agent_id in islice(snapshot.ids(agent_type).after(after), limit):
+            yield snapshot[agent_id]
+
+    @traced("SmartHiveOrchestrator.list_agents")
+    async def list_agents(
+        self,
+        agent_type: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        snapshot: Optional[FleetSnapshot] = None
+    ) -> List[AgentRecord]:
+        """List agents and their status, optionally only those of one type."""
+        snapshot = snapshot if snapshot is not None else self.snapshot
+        return [snapshot[agent_id] for agent_id in islice(snapshot.ids(agent_type).after(after), limit)]
 
 # Global variables for components
 orchestrator = None
@@ -209,34 +560,134 @@ async def initialize_components():
     global orchestrator, control_plane
     if orchestrator is None:
         orchestrator = await SmartHiveOrchestrator.create()
-        # Reset state
-        orchestrator.resource_manager.resource_allocations = {}
-        orchestrator._agents = {}
-        await orchestrator.state_manager.clear()
+        # Recover agents persisted by a previous run
+        await orchestrator._initialize_from_state()
         # Initialize resource manager
         await orchestrator.resource_manager.allocate_resources(
             "resource_manager",
             AGENT_CONFIGS["resource_manager"]["requirements"]
         )
     control_plane = ControlPlaneServer(
-        message_queue=message_queue,
+        message_queue=get_message_queue(),
         agent_orchestrator=orchestrator
     )
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan manager for FastAPI app."""
-    await initialize_components()
+    config = app.state.observability
+    configure_tracing(config.trace_file, config.trace_sample_rate)
+    if app.state.orchestrator is None:
+        await initialize_components()
+    hive = _orchestrator_of(app)
+    ledger = hive.resource_manager.ledger
+    if ledger is not None:
+        # Agent records are per process, so each process sharing the ledger must be its own shard
+        ledger.join(app.state.shards.shard_id if app.state.shards is not None else "")
+    hive.reaper.start()
     yield
-    # Cleanup code here if needed
+    await hive.provisioning.close()
+    await hive.reaper.close()
+    await hive.state_manager.close()
+    if ledger is not None:
+        ledger.leave()
+        ledger.close()
+    if app.state.shards is not None:
+        await app.state.shards.aclose()
+    await get_llm_provider().aclose()
+    configure_tracing(None)
 
-# Initialize FastAPI app
-app = FastAPI(title="SmartHive Control Plane", lifespan=lifespan)
+def _orchestrator_of(app: FastAPI) -> SmartHiveOrchestrator:
+    """Orchestrator of an app: its own if it was given one, else the global one."""
+    return app.state.orchestrator if app.state.orchestrator is not None else orchestrator
+
+def current_orchestrator(request: Request) -> SmartHiveOrchestrator:
+    """Dependency resolving the orchestrator serving a request."""
+    return _orchestrator_of(request.app)
+
+async def _forward(request: Request, agent_id: str) -> Optional[Response]:
+    """
+    Response of the shard owning `agent_id`, or None if the request is to
+    be served here.
+    """
+    shards: Optional[ShardRouter] = request.app.state.shards
+    if shards is None:
+        return None
+    try:
+        return await shards.route(request, shards.owner(agent_id))
+    except ShardUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+async def _locate(
+    request: Request, agent_id: str, orchestrator: SmartHiveOrchestrator
+) -> Optional[Response]:
+    """
+    Response of the shard holding an existing agent, or None if the request
+    is to be served here. Agents stay on the shard that created them when
+    the ring changes, so the owner is not always the one holding it.
+    """
+    shards: Optional[ShardRouter] = request.app.state.shards
+    if shards is None:
+        return None
+    try:
+        return await shards.route_agent(request, agent_id, agent_id in orchestrator.snapshot)
+    except ShardUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+async def _forward_batch(request: Request, agent_ids: List[str], held: bool = False) -> Optional[Response]:
+    """
+    Response of the shard owning every agent of a batch, or None if the
+    batch is to be served here, as it is when every agent is `held` here.
+    Batches spanning shards are refused, as they could not be applied
+    atomically.
+    """
+    shards: Optional[ShardRouter] = request.app.state.shards
+    if shards is None or held or shards.is_forwarded(request):
+        return None
+    owners = {shards.owner(agent_id) for agent_id in agent_ids}
+    if len(owners) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch spans shards {sorted(owners)}; send one batch per shard"
+        )
+    if not owners:
+        return None
+    return await _forward(request, agent_ids[0])
+
+router = APIRouter()
 
 # API Endpoints
-@app.post("/agents/create", response_model=AgentResponse)
-async def create_agent(request: AgentRequest):
-    """Create a new agent."""
+@router.post("/agents/create", response_model=Union[AgentResponse, JobResponse])
+async def create_agent(
+    request: AgentRequest,
+    http_request: Request,
+    response: Response,
+    wait: bool = True,
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
+    """
+    Create a new agent. With `wait=false` the creation is queued as a job
+    and the request returns at once with 202 and the job id to poll at
+    GET /jobs/{job_id}, or 429 when the provisioning queue is full.
+    """
+    forwarded = await _forward(http_request, f"{request.agent_type}_{request.name}")
+    if forwarded is not None:
+        return forwarded
+
+    if not wait:
+        shards = http_request.app.state.shards
+        prefix = f"{shards.shard_id}." if shards is not None else ""
+        try:
+            job = orchestrator.provisioning.submit(request.name, request.agent_type, request.requirements, prefix)
+        except QueueFull as e:
+            AGENT_REJECTIONS.labels("backpressure").inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e), headers={"Retry-After": "1"}
+            )
+        response.status_code = status.HTTP_202_ACCEPTED
+        response.headers["Location"] = f"/jobs/{job.job_id}"
+        return JobResponse.from_job(job)
+
     try:
         agent_id = await orchestrator.create_agent(
             name=request.name,
@@ -247,37 +698,339 @@ async def create_agent(request: AgentRequest):
         return AgentResponse(
             agent_id=agent_id,
             status="created",
-            resources=agent_info["resources"]
+            resources=agent_info.resources
         )
     except Exception as e:
         # Log the error for debugging
         print(f"Error creating agent: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.delete("/agents/{agent_id}", response_model=AgentResponse)
-async def destroy_agent(agent_id: str):
-    """Destroy an agent."""
-    if await orchestrator.destroy_agent(agent_id):
-        return AgentResponse(agent_id=agent_id, status="destroyed")
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Agent {agent_id} not found")
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    request: Request,
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
+    """
+    Get the progress of a provisioning job. Jobs of a sharded control plane
+    are prefixed with the id of the shard that runs them.
+    """
+    shards: Optional[ShardRouter] = request.app.state.shards
+    if shards is not None and "." in job_id:
+        try:
+            forwarded = await shards.route(request, job_id.partition(".")[0])
+        except ShardUnavailable as e:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+        if forwarded is not None:
+            return forwarded
+    job = orchestrator.provisioning.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return JobResponse.from_job(job)
+
+@router.post("/agents/batch", response_model=List[AgentResponse])
+async def create_agents(
+    request: BatchAgentRequest,
+    http_request: Request,
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
+    """Create several agents in one request. All of them must belong to one shard."""
+    forwarded = await _forward_batch(
+        http_request, [f"{agent.agent_type}_{agent.name}" for agent in request.agents]
+    )
+    if forwarded is not None:
+        return forwarded
+    try:
+        agent_ids = await orchestrator.create_agents([agent.model_dump() for agent in request.agents])
+    except Exception as e:
+        print(f"Error creating agents: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    responses = []
+    for agent_id in agent_ids:
+        agent_info = await orchestrator.get_agent(agent_id)
+        responses.append(AgentResponse(agent_id=agent_id, status="created", resources=agent_info.resources))
+    return responses
 
-@app.get("/agents/{agent_id}", response_model=AgentResponse)
-async def get_agent(agent_id: str):
+@router.delete("/agents/batch", response_model=List[AgentResponse])
+async def destroy_agents(
+    request: BatchDestroyRequest,
+    http_request: Request,
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
+    """Destroy several agents in one request. All of them must belong to one shard."""
+    snapshot = orchestrator.snapshot
+    forwarded = await _forward_batch(
+        http_request, request.agent_ids, all(agent_id in snapshot for agent_id in request.agent_ids)
+    )
+    if forwarded is not None:
+        return forwarded
+    try:
+        agent_ids = await orchestrator.destroy_agents(request.agent_ids, request.wait)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    return [
+        AgentResponse(agent_id=agent_id, status=_destroy_status(orchestrator, agent_id))
+        for agent_id in agent_ids
+    ]
+
+def _destroy_status(orchestrator: SmartHiveOrchestrator, agent_id: str) -> str:
+    """Status to report for a destroyed agent: terminating while the reaper still owns it."""
+    record = orchestrator.snapshot.get(agent_id)
+    if record is not None and record.status == AgentStatus.TERMINATING:
+        return AgentStatus.TERMINATING
+    return "destroyed"
+
+@router.delete("/agents/{agent_id}", response_model=AgentResponse)
+async def destroy_agent(
+    agent_id: str,
+    request: Request,
+    response: Response,
+    wait: bool = True,
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
+    """
+    Destroy an agent. With `wait=false` the request returns at once with
+    202 and the agent terminating, its teardown left to the reaper.
+    """
+    forwarded = await _locate(request, agent_id, orchestrator)
+    if forwarded is not None:
+        return forwarded
+    if not await orchestrator.destroy_agent(agent_id, wait):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Agent {agent_id} not found")
+    agent_status = _destroy_status(orchestrator, agent_id)
+    if agent_status == AgentStatus.TERMINATING:
+        response.status_code = status.HTTP_202_ACCEPTED
+    return AgentResponse(agent_id=agent_id, status=agent_status)
+
+@router.get("/agents/{agent_id}", response_model=AgentResponse)
+async def get_agent(
+    agent_id: str,
+    request: Request,
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
     """Get agent status."""
+    forwarded = await _locate(request, agent_id, orchestrator)
+    if forwarded is not None:
+        return forwarded
     agent_info = await orchestrator.get_agent(agent_id)
     if agent_info:
-        return AgentResponse(agent_id=agent_id, **agent_info)
+        return AgentResponse(agent_id=agent_id, status=agent_info.status, resources=agent_info.resources)
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Agent {agent_id} not found")
 
-@app.get("/agents", response_model=List[AgentResponse])
-async def list_agents():
-    """List all agents."""
-    agents = await orchestrator.list_agents()
+@router.get("/agents", response_model=List[AgentResponse])
+async def list_agents(
+    request: Request,
+    response: Response,
+    agent_type: Optional[str] = Query(None, alias="type"),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=AGENT_VALIDATION["max_page_size"]),
+    orchestrator: SmartHiveOrchestrator = Depends(current_orchestrator)
+):
+    """
+    List agents in agent id order, optionally filtered by type.
+
+    Without `limit` every agent is listed. With it, a page that has more
+    agents after it carries an `X-Next-Cursor` header, to pass as `after`
+    for the next page. Send `Accept: application/x-ndjson` to stream one
+    JSON agent per line instead of a single list, paginated the same way.
+    Every response reads a single fleet snapshot, whose version is sent as
+    `X-Fleet-Version`.
+
+    A sharded control plane lists the whole fleet: the page of every shard
+    is fetched and merged, and `X-Fleet-Version` lists the snapshot version
+    of each shard as `id=version,...`.
+    """
+    snapshot = orchestrator.snapshot
+    shards: Optional[ShardRouter] = request.app.state.shards
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    if shards is not None and not shards.is_forwarded(request):
+        agents, version, cursor = await _fleet_page(request, shards, orchestrator, snapshot, agent_type, after, limit)
+        headers = _page_headers(version, cursor)
+        if ndjson:
+            return StreamingResponse(
+                (agent.model_dump_json() + "\n" for agent in agents),
+                media_type="application/x-ndjson",
+                headers=headers
+            )
+        response.headers.update(headers)
+        return agents
+
+    headers = _page_headers(str(snapshot.version), _next_cursor(snapshot, agent_type, after, limit))
+    if ndjson:
+        async def stream():
+            async for agent in orchestrator.iter_agents(agent_type, after, limit, snapshot):
+                yield AgentResponse(
+                    agent_id=agent.agent_id,
+                    status=agent.status,
+                    resources=agent.resources
+                ).model_dump_json() + "\n"
+        return StreamingResponse(stream(), media_type="application/x-ndjson", headers=headers)
+    response.headers.update(headers)
     return [
         AgentResponse(
-            agent_id=agent["agent_id"],
-            status=agent["status"],
-            resources=agent["resources"]
+            agent_id=agent.agent_id,
+            status=agent.status,
+            resources=agent.resources
         )
-        for agent in agents
+        for agent in await orchestrator.list_agents(agent_type, after, limit, snapshot)
     ]
+
+def _next_cursor(
+    snapshot: FleetSnapshot,
+    agent_type: Optional[str],
+    after: Optional[str],
+    limit: Optional[int]
+) -> Optional[str]:
+    """
+    Cursor of the page after this one: the last id of the page, if at least
+    `limit + 1` agents follow `after`. Only ids are walked, so the page
+    itself can still be streamed.
+    """
+    if limit is None:
+        return None
+    edge = list(islice(snapshot.ids(agent_type).after(after), limit - 1, limit + 1))
+    return edge[0] if len(edge) == 2 else None
+
+def _page_headers(version: str, cursor: Optional[str]) -> Dict[str, str]:
+    headers = {"X-Fleet-Version": version}
+    if cursor is not None:
+        headers["X-Next-Cursor"] = cursor
+    return headers
+
+async def _fleet_page(
+    request: Request,
+    shards: ShardRouter,
+    orchestrator: SmartHiveOrchestrator,
+    snapshot: FleetSnapshot,
+    agent_type: Optional[str],
+    after: Optional[str],
+    limit: Optional[int]
+):
+    """
+    (agents, fleet version, next cursor) of a page of the whole fleet. Every
+    shard returns its own page in agent id order, so merging them and keeping
+    the first `limit` agents gives the page of the fleet. There is a next
+    page if agents were left over after the merge or any shard has one.
+    """
+    try:
+        pages = await shards.fan_out(request)
+    except ShardUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    local = [
+        AgentResponse(agent_id=agent.agent_id, status=agent.status, resources=agent.resources)
+        for agent in await orchestrator.list_agents(agent_type, after, limit, snapshot)
+    ]
+    remote = [[AgentResponse(**agent) for agent in page.json()] for page in pages.values()]
+    merged = heapq.merge(local, *remote, key=lambda agent: agent.agent_id)
+    agents = list(islice(merged, limit))
+
+    cursor = None
+    more = _next_cursor(snapshot, agent_type, after, limit) is not None
+    more = more or any("X-Next-Cursor" in page.headers for page in pages.values())
+    if agents and (more or next(merged, None) is not None):
+        cursor = agents[-1].agent_id
+
+    versions = {shard: page.headers.get("X-Fleet-Version", "") for shard, page in pages.items()}
+    versions[shards.shard_id] = str(snapshot.version)
+    return agents, ",".join(f"{shard}={versions[shard]}" for shard in shards.peers), cursor
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """
+    Metrics in the Prometheus text format, with the fleet gauges of this
+    app's orchestrator. A sharded control plane neither forwards nor fans
+    out /metrics: every shard reports its own share of the fleet and is
+    scraped on its own, and fleet totals are summed over the shards.
+    """
+    return PlainTextResponse(
+        REGISTRY.render() + request.app.state.gauges.render(), media_type="text/plain; version=0.0.4"
+    )
+
+# Sampling profiler of the event loop thread, one capture at a time
+profiler: Optional[SamplingProfiler] = None
+
+@router.get("/debug/profile", response_class=PlainTextResponse)
+async def profile(request: Request, seconds: float = Query(5.0, gt=0)):
+    """
+    Sample the event loop stack for `seconds` of live traffic and return
+    the collapsed stacks, ready for flamegraph.pl or speedscope.
+    Disabled unless SMART_HIVE_PROFILER_ENABLED is set.
+    """
+    global profiler
+    config = request.app.state.observability
+    if not config.profiler_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiler is disabled")
+    if profiler is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+
+    profiler = SamplingProfiler(threading.get_ident(), config.profiler_interval)
+    profiler.start()
+    try:
+        await asyncio.sleep(min(seconds, config.profiler_max_seconds))
+    finally:
+        captured, profiler = profiler, None
+        await asyncio.to_thread(captured.stop)
+    return PlainTextResponse(captured.collapsed())
+
+def fleet_gauges(app: FastAPI) -> MetricsRegistry:
+    """
+    Gauges of the fleet an app serves. They are read at scrape time from
+    the orchestrator of that app, so apps sharing a process each report
+    their own fleet.
+    """
+    gauges = MetricsRegistry()
+
+    def fleet_size():
+        hive = _orchestrator_of(app)
+        if hive is None:
+            return []
+        return [((agent_type,), count) for agent_type, count in hive.snapshot.type_counts().items()]
+
+    def free_capacity():
+        hive = _orchestrator_of(app)
+        if hive is None:
+            return []
+        placement = hive.resource_manager.placement
+        return [
+            ((node, resource), value)
+            for node in placement.nodes
+            for resource, value in placement.free_capacity(node).items()
+        ]
+
+    def provisioning_depth():
+        hive = _orchestrator_of(app)
+        if hive is None:
+            return []
+        return [((), hive.provisioning.depth)]
+
+    gauges.gauge("smart_hive_agents", "Live agents by type.", ["agent_type"], callback=fleet_size)
+    gauges.gauge(
+        "smart_hive_provisioning_queue_depth", "Provisioning jobs waiting for a worker.", callback=provisioning_depth
+    )
+    gauges.gauge(
+        "smart_hive_free_capacity", "Free capacity per node and resource.", ["node", "resource"], callback=free_capacity
+    )
+    return gauges
+
+def create_app(
+    observability: Optional[ObservabilityConfig] = None,
+    cluster: Optional[ClusterConfig] = None,
+    orchestrator: Optional[SmartHiveOrchestrator] = None,
+    shards: Optional[ShardRouter] = None
+) -> FastAPI:
+    """
+    Create the control plane application. An app given its own orchestrator
+    serves it instead of the global one, so several shards can run in one
+    process. The shard router is built from the cluster config unless given.
+    """
+    app = FastAPI(title="SmartHive Control Plane", lifespan=lifespan)
+    app.state.observability = observability or ObservabilityConfig.from_env()
+    app.state.orchestrator = orchestrator
+    app.state.shards = shards or ShardRouter.from_config(cluster or ClusterConfig.from_env())
+    app.state.gauges = fleet_gauges(app)
+    app.include_router(router)
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(TracingMiddleware)
+    return app
+
+app = create_app()
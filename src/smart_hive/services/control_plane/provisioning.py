@@ -0,0 +1,153 @@
+"""
+Agent Provisioning
+
+Background creation of agents. Submitted requests become jobs in a bounded
+queue consumed by a pool of workers, each calling the orchestrator. Jobs
+can be polled by id while they run and for a while after they finish.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from enum import StrEnum
+from typing import Dict, List, Optional
+
+from smart_hive.configs.lifecycle_config import LifecycleConfig
+
+class JobStatus(StrEnum):
+    """Progress of a provisioning job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class ProvisioningJob:
+    """One agent creation request and its outcome."""
+
+    __slots__ = (
+        "job_id", "name", "agent_type", "requirements", "status",
+        "agent_id", "error", "submitted", "started", "finished"
+    )
+
+    def __init__(self, name: str, agent_type: str, requirements: Optional[Dict] = None, prefix: str = ""):
+        self.job_id = prefix + uuid.uuid4().hex
+        self.name = name
+        self.agent_type = agent_type
+        self.requirements = requirements
+        self.status = JobStatus.QUEUED
+        self.agent_id: Optional[str] = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+class QueueFull(Exception):
+    """The provisioning queue is at its high-water mark."""
+
+class ProvisioningQueue:
+    """
+    Bounded queue of provisioning jobs and the workers draining it.
+
+    Submissions past the high-water mark are refused instead of queued, so
+    a burst is either absorbed or rejected at once rather than timing out.
+    Workers are started on the running loop by the first submission.
+    """
+
+    def __init__(self, orchestrator, config: Optional[LifecycleConfig] = None):
+        config = config or LifecycleConfig.from_env()
+        self.orchestrator = orchestrator
+        self.workers = config.provisioning_workers
+        self.high_water = config.provisioning_queue_size
+        self.history = config.provisioning_job_history
+        self.jobs: Dict[str, ProvisioningJob] = {}
+        self._finished: deque = deque()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the workers on the running loop, if not running yet."""
+        loop = asyncio.get_running_loop()
+        if self._tasks and all(not task.done() for task in self._tasks) and self._tasks[0].get_loop() is loop:
+            return
+        # Jobs queued on a loop that is gone are moved to the new queue
+        waiting = []
+        while self._queue is not None and not self._queue.empty():
+            waiting.append(self._queue.get_nowait())
+        self._queue = asyncio.Queue(maxsize=self.high_water)
+        for job in waiting:
+            self._queue.put_nowait(job)
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    def submit(
+        self,
+        name: str,
+        agent_type: str,
+        requirements: Optional[Dict] = None,
+        prefix: str = ""
+    ) -> ProvisioningJob:
+        """
+        Queue the creation of an agent, with `prefix` put before the job id.
+        Raises QueueFull at the high-water mark.
+        """
+        self.start()
+        job = ProvisioningJob(name, agent_type, requirements, prefix)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"Provisioning queue is full ({self.high_water} jobs)") from None
+        self.jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ProvisioningJob]:
+        return self.jobs.get(job_id)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            job.status = JobStatus.RUNNING
+            job.started = time.time()
+            try:
+                job.agent_id = await self.orchestrator.create_agent(job.name, job.agent_type, job.requirements)
+                job.status = JobStatus.SUCCEEDED
+            except asyncio.CancelledError:
+                job.error = "Provisioning was cancelled"
+                job.status = JobStatus.FAILED
+                raise
+            except Exception as e:
+                job.error = str(e)
+                job.status = JobStatus.FAILED
+            finally:
+                job.finished = time.time()
+                self._retire(job)
+                self._queue.task_done()
+
+    def _retire(self, job: ProvisioningJob):
+        """Keep a finished job for polling, dropping the oldest past the history size."""
+        self._finished.append(job.job_id)
+        while len(self._finished) > self.history:
+            self.jobs.pop(self._finished.popleft(), None)
+
+    async def join(self):
+        """Wait until every queued job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Stop the workers. Jobs still queued stay queued."""
+        tasks, self._tasks = self._tasks, []
+        running = asyncio.get_running_loop()
+        for task in tasks:
+            if not task.done() and not task.get_loop().is_closed():
+                task.cancel()
+        for task in tasks:
+            if task.get_loop() is running:
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
@@ -0,0 +1,99 @@
+"""
+Agent Reaper
+
+Background task finishing agent teardowns. Agents destroyed without
+waiting, or whose cleanup failed, are handed to the reaper, which retries
+their teardown with exponential backoff until it succeeds. It also sweeps
+periodically for allocations and states left behind by agents no longer in
+the fleet.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from smart_hive.configs.lifecycle_config import LifecycleConfig
+
+logger = logging.getLogger(__name__)
+
+class Reaper:
+    """Retries agent teardowns and reconciles orphaned resources in the background."""
+
+    def __init__(self, orchestrator, config: Optional[LifecycleConfig] = None):
+        config = config or LifecycleConfig.from_env()
+        self.orchestrator = orchestrator
+        self.interval = config.reaper_interval
+        self.base_backoff = config.reaper_base_backoff
+        self.max_backoff = config.reaper_max_backoff
+        self.reconcile_interval = config.reconcile_interval
+        # Agent id -> (failed attempts, monotonic time of the next attempt)
+        self.pending: Dict[str, Tuple[int, float]] = {}
+        self._last_reconcile = time.monotonic()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background task on the running loop, if not running yet."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    def schedule(self, agent_id: str):
+        """Tear `agent_id` down in the background as soon as possible."""
+        self.pending.setdefault(agent_id, (0, time.monotonic()))
+        self.start()
+        self._wakeup.set()
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.base_backoff * 2 ** (attempts - 1), self.max_backoff)
+
+    async def _reap(self, agent_id: str):
+        """Attempt one teardown, scheduling a retry if it fails."""
+        try:
+            done = await self.orchestrator.reap(agent_id)
+        except Exception:
+            logger.exception("Error reaping agent %s", agent_id)
+            done = False
+        if done:
+            self.pending.pop(agent_id, None)
+        else:
+            attempts = self.pending.get(agent_id, (0, 0.0))[0] + 1
+            self.pending[agent_id] = (attempts, time.monotonic() + self._backoff(attempts))
+
+    async def run_once(self):
+        """Attempt every due teardown concurrently, then reconcile if it is time to."""
+        now = time.monotonic()
+        due = [agent_id for agent_id, (_, at) in self.pending.items() if at <= now]
+        if due:
+            await asyncio.gather(*(self._reap(agent_id) for agent_id in due))
+        if now - self._last_reconcile >= self.reconcile_interval:
+            self._last_reconcile = now
+            try:
+                await self.orchestrator.reconcile()
+            except Exception:
+                logger.exception("Error reconciling agents")
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            next_due = min((at for _, at in self.pending.values()), default=float("inf"))
+            timeout = min(max(next_due - time.monotonic(), 0), self.interval)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """Stop the background task."""
+        task, self._task = self._task, None
+        if task is None or task.done() or task.get_loop().is_closed():
+            return
+        task.cancel()
+        if task.get_loop() is asyncio.get_running_loop():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
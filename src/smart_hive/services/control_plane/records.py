@@ -0,0 +1,121 @@
+"""
+Agent Records
+
+Compact in-memory representation of an agent, shared by reference between
+the orchestrator and the state store.
+"""
+
+from enum import StrEnum
+from typing import Any, Dict, Optional, Tuple
+
+from smart_hive.configs.agent_configs import AGENT_CONFIGS
+
+class AgentStatus(StrEnum):
+    """Lifecycle status of an agent."""
+    RUNNING = "running"
+    TERMINATING = "terminating"
+
+# One interned member per configured agent type
+AgentType = StrEnum("AgentType", {name.upper(): name for name in AGENT_CONFIGS})
+
+# Value to member lookups, cheaper than calling the enum; members hash as their value
+_TYPES = {member.value: member for member in AgentType}
+_STATUSES = {member.value: member for member in AgentStatus}
+
+class AgentRecord:
+    """
+    One agent: its live service, type, status and resource allocation.
+
+    Resources are kept as a tuple of amounts laid out like `layout`, the
+    resource dimensions tuple shared by every record of a ResourceManager.
+    Records also answer the mapping keys of the dicts they replace
+    ("agent_id", "agent", "type", "status", "resources").
+    """
+
+    __slots__ = ("agent_id", "agent", "type", "status", "node", "vector", "layout")
+
+    def __init__(
+        self,
+        agent_id: str,
+        agent_type: str,
+        agent: Any = None,
+        status: AgentStatus = AgentStatus.RUNNING,
+        node: Optional[str] = None,
+        vector: Tuple[float, ...] = (),
+        layout: Tuple[str, ...] = ()
+    ):
+        self.agent_id = agent_id
+        self.agent = agent
+        try:
+            self.type = _TYPES[agent_type]
+            self.status = _STATUSES[status]
+        except KeyError as e:
+            raise ValueError(f"Invalid agent type or status: {e}") from None
+        self.node = node
+        self.vector = vector
+        self.layout = layout
+
+    @classmethod
+    def from_allocation(
+        cls,
+        agent_id: str,
+        agent_type: str,
+        agent: Any,
+        allocation: Optional[Dict],
+        layout: Tuple[str, ...],
+        status: AgentStatus = AgentStatus.RUNNING
+    ) -> "AgentRecord":
+        """Build a record from a resources dict ({dimension: amount, "node": name})."""
+        if not allocation:
+            return cls(agent_id, agent_type, agent, status, layout=layout)
+        return cls(
+            agent_id,
+            agent_type,
+            agent,
+            status,
+            node=allocation.get("node"),
+            vector=tuple([allocation.get(dim, 0) for dim in layout]),
+            layout=layout
+        )
+
+    @classmethod
+    def from_state(cls, agent_id: str, state: Dict, layout: Tuple[str, ...]) -> "AgentRecord":
+        """Build a record from a persisted state dict."""
+        return cls.from_allocation(
+            agent_id,
+            state["type"],
+            state.get("agent"),
+            state.get("resources"),
+            layout,
+            state.get("status", AgentStatus.RUNNING)
+        )
+
+    def with_status(self, status: AgentStatus) -> "AgentRecord":
+        """Copy of the record with another status."""
+        return AgentRecord(self.agent_id, self.type, self.agent, status, self.node, self.vector, self.layout)
+
+    @property
+    def resources(self) -> Optional[Dict]:
+        """Allocated resources as a dict, dimensions that are not used left out."""
+        if self.node is None:
+            return None
+        resources = {dim: amount for dim, amount in zip(self.layout, self.vector) if amount}
+        resources["node"] = self.node
+        return resources
+
+    def to_state(self) -> Dict:
+        """Persisted form of the record; the live service is not stored."""
+        return {
+            "agent": None,
+            "status": self.status.value,
+            "type": self.type.value,
+            "resources": self.resources
+        }
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ and key != "resources":
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"AgentRecord({self.agent_id!r}, {self.type.value!r}, status={self.status.value!r})"
@@ -0,0 +1,201 @@
+"""
+Control Plane Sharding
+
+Splits the fleet among several control plane shards. Agent ids are mapped
+to shards by a consistent-hash ring with virtual nodes, so adding or
+removing one of N shards moves only about 1/N of the agents. Every shard
+can take any request: a ShardRouter forwards requests for agents owned by
+another shard and fans fleet listings out to every shard. /metrics is the
+exception: it always describes the shard that serves it.
+
+Agents are not moved when the ring changes; each stays on the shard that
+created it. Requests for an existing agent are served by the shard
+holding it, and otherwise go to its owner first and then to every other
+shard until one has it.
+
+Each shard admits against an equal share of the node capacities, unless
+the shards share a ledger, which admits against the whole capacity. The
+instance limit of a type applies per shard without a shared ledger, as
+agents of a type hash unevenly across shards.
+"""
+
+import asyncio
+import hashlib
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+
+from smart_hive.configs.cluster_config import ClusterConfig
+from smart_hive.utils.lazy_import import lazy_import
+
+httpx = lazy_import("httpx")
+
+# Set on forwarded requests so the receiving shard serves them itself
+FORWARDED_HEADER = "X-Smart-Hive-Forwarded"
+# Response headers copied back from the shard a request was forwarded to
+_PASSED_HEADERS = ("content-type", "location", "retry-after", "x-next-cursor", "x-fleet-version")
+
+def _point(value: str) -> int:
+    """Position of a value on the ring, stable across processes."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+class ShardUnavailable(Exception):
+    """Another shard could not be reached or failed to answer."""
+
+class HashRing:
+    """Consistent-hash ring placing every shard at `vnodes` points."""
+
+    def __init__(self, shards: Iterable[str] = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self.shards: List[str] = []
+        self.points: List[int] = []
+        self.owners: List[str] = []
+        for shard in shards:
+            self.add(shard)
+
+    def add(self, shard: str):
+        """Put a shard on the ring; it takes over the keys just before its points."""
+        if shard in self.shards:
+            return
+        self.shards.append(shard)
+        for i in range(self.vnodes):
+            point = _point(f"{shard}#{i}")
+            index = bisect_left(self.points, point)
+            self.points.insert(index, point)
+            self.owners.insert(index, shard)
+
+    def remove(self, shard: str):
+        """Take a shard off the ring; its keys go to the next shard on the ring."""
+        if shard not in self.shards:
+            return
+        self.shards.remove(shard)
+        kept = [(point, owner) for point, owner in zip(self.points, self.owners) if owner != shard]
+        self.points = [point for point, _ in kept]
+        self.owners = [owner for _, owner in kept]
+
+    def owner(self, key: str) -> str:
+        """Shard owning `key`: the one at the first point after it, wrapping around."""
+        if not self.points:
+            raise LookupError("The hash ring has no shards")
+        return self.owners[bisect_right(self.points, _point(key)) % len(self.points)]
+
+class ShardRouter:
+    """
+    Routes control plane requests between shards.
+
+    `peers` maps every shard id, this one included, to its base URL.
+    `transports` optionally replaces the HTTP transport per shard, e.g.
+    with an httpx.ASGITransport to run several shards in one process.
+    """
+
+    def __init__(
+        self,
+        shard_id: str,
+        peers: Dict[str, str],
+        vnodes: int = 128,
+        timeout: float = 10.0,
+        transports: Optional[Dict[str, Any]] = None
+    ):
+        if shard_id not in peers:
+            raise ValueError(f"Shard {shard_id} is not one of the peers {list(peers)}")
+        self.shard_id = shard_id
+        self.peers = peers
+        self.ring = HashRing(peers, vnodes)
+        self.timeout = timeout
+        self.transports = transports or {}
+        self._clients: Dict[str, Any] = {}
+
+    @classmethod
+    def from_config(cls, config: ClusterConfig) -> Optional["ShardRouter"]:
+        """Router for the configured shard, or None when sharding is off."""
+        if not config.shard_id:
+            return None
+        return cls(config.shard_id, config.shards, config.virtual_nodes, config.forward_timeout)
+
+    def owner(self, agent_id: str) -> str:
+        return self.ring.owner(agent_id)
+
+    def _client(self, shard: str):
+        if shard not in self._clients:
+            self._clients[shard] = httpx.AsyncClient(
+                base_url=self.peers[shard], transport=self.transports.get(shard), timeout=self.timeout
+            )
+        return self._clients[shard]
+
+    async def route(self, request: Request, shard: str) -> Optional[Response]:
+        """
+        Forward the request to `shard` and return its response, or None if
+        this shard should serve it: it is the owner, the shard is unknown,
+        or the request was already forwarded once.
+        """
+        if shard == self.shard_id or shard not in self.peers or FORWARDED_HEADER in request.headers:
+            return None
+        headers = {
+            key: value for key, value in request.headers.items() if key not in ("host", "content-length")
+        }
+        headers[FORWARDED_HEADER] = self.shard_id
+        try:
+            upstream = await self._client(shard).request(
+                request.method,
+                request.url.path,
+                params=request.query_params.multi_items(),
+                content=await request.body(),
+                headers=headers
+            )
+        except httpx.HTTPError as e:
+            raise ShardUnavailable(f"Shard {shard} is unavailable: {e}") from e
+        return Response(
+            upstream.content,
+            status_code=upstream.status_code,
+            headers={key: upstream.headers[key] for key in _PASSED_HEADERS if key in upstream.headers}
+        )
+
+    async def route_agent(self, request: Request, agent_id: str, held: bool) -> Optional[Response]:
+        """
+        Forward a request about an existing agent, or return None if this
+        shard should serve it. When `held`, this shard has the agent and
+        serves it whatever the ring says. Otherwise the owner is asked,
+        then the other shards in turn, for agents created before the ring
+        changed; the first answer other than 404 is returned.
+        """
+        if held or self.is_forwarded(request):
+            return None
+        owner = self.owner(agent_id)
+        for shard in [owner, *(shard for shard in self.peers if shard != owner)]:
+            if shard == self.shard_id:
+                continue
+            response = await self.route(request, shard)
+            if response.status_code != 404:
+                return response
+        return None
+
+    def is_forwarded(self, request: Request) -> bool:
+        return FORWARDED_HEADER in request.headers
+
+    async def fan_out(self, request: Request) -> Dict[str, Any]:
+        """
+        Send the GET request to every other shard at once, asking for JSON,
+        and return their responses by shard. Raises ShardUnavailable if any
+        of them fails.
+        """
+        headers = {FORWARDED_HEADER: self.shard_id, "accept": "application/json"}
+
+        async def get(shard: str):
+            try:
+                response = await self._client(shard).get(
+                    request.url.path, params=request.query_params.multi_items(), headers=headers
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                raise ShardUnavailable(f"Shard {shard} is unavailable: {e}") from e
+            return response
+
+        others = [shard for shard in self.peers if shard != self.shard_id]
+        return dict(zip(others, await asyncio.gather(*(get(shard) for shard in others))))
+
+    async def aclose(self):
+        """Close the HTTP clients to the other shards."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
@@ -0,0 +1,236 @@
+"""
+Fleet Snapshots
+
+Immutable, versioned views of the agent fleet. The orchestrator publishes a
+new snapshot for every change, built copy-on-write: only the pieces the
+change touches are copied and everything else is shared with the previous
+snapshot. Readers take the current snapshot with a single attribute read
+and never see a half-applied change.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from smart_hive.services.control_plane.records import AgentRecord
+
+# Agents are spread over FANOUT groups of FANOUT dicts by hash; a change
+# copies one dict and the two small tuples leading to it
+FANOUT = 64
+FANOUT_BITS = 6
+# Sorted ids are kept in leaves of up to 2 * LEAF_SIZE ids, grouped in
+# pages of up to 2 * PAGE_SIZE leaves
+LEAF_SIZE = 128
+PAGE_SIZE = 64
+
+def _split(items: List, size: int) -> tuple:
+    """Pieces replacing a changed node: none if empty, chunks of `size` if too large."""
+    if not items:
+        return ()
+    if len(items) <= 2 * size:
+        return (tuple(items),)
+    return tuple(tuple(items[i:i + size]) for i in range(0, len(items), size))
+
+class SortedIds:
+    """
+    Persistent sorted sequence of agent ids: a two-level tree of pages,
+    each holding sorted leaves of ids as a (leaves, leaf maxes) pair.
+    A change copies one leaf, one page and the root, so its cost grows with
+    the cube root of the size instead of linearly; every other leaf and
+    page is shared with the previous sequence.
+    """
+
+    __slots__ = ("pages", "maxes", "size")
+
+    def __init__(self, pages: tuple = (), maxes: tuple = (), size: int = 0):
+        self.pages = pages
+        self.maxes = maxes
+        self.size = size
+
+    @classmethod
+    def from_sorted(cls, ids: List[str]) -> "SortedIds":
+        leaves = [tuple(ids[i:i + LEAF_SIZE]) for i in range(0, len(ids), LEAF_SIZE)]
+        pages = tuple(
+            (tuple(leaves[i:i + PAGE_SIZE]), tuple(leaf[-1] for leaf in leaves[i:i + PAGE_SIZE]))
+            for i in range(0, len(leaves), PAGE_SIZE)
+        )
+        return cls(pages, tuple(page[1][-1] for page in pages), len(ids))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[str]:
+        for leaves, _ in self.pages:
+            for leaf in leaves:
+                yield from leaf
+
+    def _change(self, agent_id: str, insert: bool) -> "SortedIds":
+        """Copy with `agent_id` inserted or removed, sharing every untouched node."""
+        if not self.pages:
+            return SortedIds.from_sorted([agent_id]) if insert else self
+
+        page_index = min(bisect_left(self.maxes, agent_id), len(self.pages) - 1)
+        leaves, leaf_maxes = self.pages[page_index]
+        leaf_index = min(bisect_left(leaf_maxes, agent_id), len(leaves) - 1)
+        leaf = list(leaves[leaf_index])
+        position = bisect_left(leaf, agent_id)
+        found = position < len(leaf) and leaf[position] == agent_id
+        if insert == found:
+            return self
+        if insert:
+            leaf.insert(position, agent_id)
+        else:
+            del leaf[position]
+
+        pieces = _split(leaf, LEAF_SIZE)
+        leaves = leaves[:leaf_index] + pieces + leaves[leaf_index + 1:]
+        leaf_maxes = leaf_maxes[:leaf_index] + tuple(piece[-1] for piece in pieces) + leaf_maxes[leaf_index + 1:]
+        if len(leaves) <= 2 * PAGE_SIZE:
+            pages = ((leaves, leaf_maxes),) if leaves else ()
+        else:
+            pages = tuple(
+                (leaves[i:i + PAGE_SIZE], leaf_maxes[i:i + PAGE_SIZE]) for i in range(0, len(leaves), PAGE_SIZE)
+            )
+        return SortedIds(
+            self.pages[:page_index] + pages + self.pages[page_index + 1:],
+            self.maxes[:page_index] + tuple(page[1][-1] for page in pages) + self.maxes[page_index + 1:],
+            self.size + (1 if insert else -1)
+        )
+
+    def update(self, added: Iterable[str] = (), removed: Iterable[str] = ()) -> "SortedIds":
+        """New sequence with `added` inserted and `removed` taken out."""
+        ids = self
+        for agent_id in removed:
+            ids = ids._change(agent_id, False)
+        for agent_id in added:
+            ids = ids._change(agent_id, True)
+        return ids
+
+    def after(self, agent_id: Optional[str]) -> Iterator[str]:
+        """Ids greater than `agent_id` (every id when it is None), in order."""
+        if agent_id is None:
+            yield from self
+            return
+        page_index = bisect_right(self.maxes, agent_id)
+        for leaves, leaf_maxes in self.pages[page_index:page_index + 1]:
+            leaf_index = bisect_right(leaf_maxes, agent_id)
+            for leaf in leaves[leaf_index:leaf_index + 1]:
+                for position in range(bisect_right(leaf, agent_id), len(leaf)):
+                    yield leaf[position]
+            for leaf in leaves[leaf_index + 1:]:
+                yield from leaf
+        for leaves, _ in self.pages[page_index + 1:]:
+            for leaf in leaves:
+                yield from leaf
+
+EMPTY_IDS = SortedIds()
+
+def _bucket(buckets: tuple, agent_id: str) -> Dict[str, AgentRecord]:
+    """The dict holding `agent_id`, if present."""
+    h = hash(agent_id)
+    return buckets[(h >> FANOUT_BITS) % FANOUT][h % FANOUT]
+
+def _replace(buckets: tuple, agent_id: str, record: Optional[AgentRecord]) -> tuple:
+    """Copy of `buckets` with the record of `agent_id` set, or deleted when None."""
+    h = hash(agent_id)
+    top, leaf = (h >> FANOUT_BITS) % FANOUT, h % FANOUT
+    group = buckets[top]
+    bucket = dict(group[leaf])
+    if record is None:
+        del bucket[agent_id]
+    else:
+        bucket[agent_id] = record
+    return buckets[:top] + (group[:leaf] + (bucket,) + group[leaf + 1:],) + buckets[top + 1:]
+
+class FleetSnapshot(Mapping):
+    """
+    Read-only mapping of agent id to AgentRecord at one version of the
+    fleet, with the ids kept sorted overall and per agent type. Records
+    reachable from a published snapshot are never modified.
+    """
+
+    __slots__ = ("version", "buckets", "order", "by_type")
+
+    def __init__(
+        self,
+        version: int = 0,
+        buckets: Optional[Tuple[Tuple[Dict[str, AgentRecord], ...], ...]] = None,
+        order: SortedIds = EMPTY_IDS,
+        by_type: Optional[Dict[str, SortedIds]] = None
+    ):
+        self.version = version
+        self.buckets = buckets if buckets is not None else (({},) * FANOUT,) * FANOUT
+        self.order = order
+        self.by_type = by_type or {}
+
+    @classmethod
+    def build(cls, records: Dict[str, AgentRecord], version: int = 0) -> "FleetSnapshot":
+        """Snapshot holding `records`, built in one pass."""
+        buckets = [[{} for _ in range(FANOUT)] for _ in range(FANOUT)]
+        by_type: Dict[str, List[str]] = {}
+        order = sorted(records)
+        for agent_id in order:
+            record = records[agent_id]
+            h = hash(agent_id)
+            buckets[(h >> FANOUT_BITS) % FANOUT][h % FANOUT][agent_id] = record
+            by_type.setdefault(record.type, []).append(agent_id)
+        return cls(
+            version,
+            tuple(tuple(group) for group in buckets),
+            SortedIds.from_sorted(order),
+            {agent_type: SortedIds.from_sorted(ids) for agent_type, ids in by_type.items()}
+        )
+
+    def __getitem__(self, agent_id: str) -> AgentRecord:
+        return _bucket(self.buckets, agent_id)[agent_id]
+
+    def get(self, agent_id: str, default=None) -> Optional[AgentRecord]:
+        return _bucket(self.buckets, agent_id).get(agent_id, default)
+
+    def __contains__(self, agent_id) -> bool:
+        return agent_id in _bucket(self.buckets, agent_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.order)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def ids(self, agent_type: Optional[str] = None) -> SortedIds:
+        """Sorted ids of every agent, or of the agents of one type."""
+        if agent_type is None:
+            return self.order
+        return self.by_type.get(agent_type, EMPTY_IDS)
+
+    def type_counts(self) -> Dict[str, int]:
+        """Number of agents per type."""
+        return {agent_type: len(ids) for agent_type, ids in self.by_type.items()}
+
+    def evolve(self, added: Iterable[AgentRecord] = (), removed: Iterable[str] = ()) -> "FleetSnapshot":
+        """Next version with `added` records put in and the `removed` ids taken out."""
+        buckets, order, by_type = self.buckets, self.order, dict(self.by_type)
+
+        def take_out(record: AgentRecord):
+            nonlocal buckets, order
+            buckets = _replace(buckets, record.agent_id, None)
+            order = order.update(removed=[record.agent_id])
+            ids = by_type[record.type].update(removed=[record.agent_id])
+            if ids:
+                by_type[record.type] = ids
+            else:
+                del by_type[record.type]
+
+        for agent_id in removed:
+            record = _bucket(buckets, agent_id).get(agent_id)
+            if record is not None:
+                take_out(record)
+        for record in added:
+            # A record replacing one already in the fleet is a remove plus an add
+            previous = _bucket(buckets, record.agent_id).get(record.agent_id)
+            if previous is not None:
+                take_out(previous)
+            buckets = _replace(buckets, record.agent_id, record)
+            order = order.update(added=[record.agent_id])
+            by_type[record.type] = by_type.get(record.type, EMPTY_IDS).update(added=[record.agent_id])
+
+        return FleetSnapshot(self.version + 1, buckets, order, by_type)
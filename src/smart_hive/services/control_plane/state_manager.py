@@ -4,42 +4,190 @@ State Manager Service
 Basic state persistence for agents using llama-agents framework.
 """
 
-from typing import Dict, Optional
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
 from llama_agents import AgentService
-from llama_index.llms.openai import OpenAI
 
 from smart_hive.configs.agent_configs import AGENT_CONFIGS
+from smart_hive.configs.state_config import StateConfig
+from smart_hive.services.control_plane.storage import JournalStorage, SQLiteStorage, StateStorage
+from smart_hive.services.llm.provider import get_llm_provider
+from smart_hive.services.llm.scheduler import PRIORITY_LOW
+from smart_hive.utils.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 class StateManager(AgentService):
     """
     Basic state manager for agent state persistence.
+
+    States are served from memory. When a storage backend is configured
+    every change is also persisted according to the durability mode:
+
+        sync: the change is written before the call returns.
+        batched: changes are buffered and written together; the call waits
+            for the transaction that includes its change (group commit).
+        async: the call returns immediately and the buffer is flushed in
+            the background (write-behind).
+
+    The buffer is flushed when it holds `batch_size` changes or after
+    `flush_interval` seconds, whichever comes first. Backends that keep a
+    journal get a compacted snapshot of the states when they ask for one.
     """
-    
-    def __init__(self):
-        config = AGENT_CONFIGS["resource_manager"]
+
+    def __init__(
+        self,
+        state_dir: Optional[str] = None,
+        storage: Optional[StateStorage] = None,
+        config: Optional[StateConfig] = None
+    ):
+        agent_config = AGENT_CONFIGS["resource_manager"]
         super().__init__(
-            description=config["description"],
-            service_name=config["name"],
-            llm=OpenAI()
+            description=agent_config["description"],
+            service_name=agent_config["name"],
+            llm=get_llm_provider().lazy(PRIORITY_LOW)
         )
-        self.states: Dict[str, Dict] = {}
+        config = config or StateConfig.from_env()
+        state_dir = state_dir or config.state_dir
+        if storage is None and state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+            if config.backend == "journal":
+                storage = JournalStorage(state_dir, snapshot_every=config.snapshot_every)
+            else:
+                storage = SQLiteStorage(os.path.join(state_dir, "states.db"))
+
+        self.storage = storage
+        self.durability = config.durability
+        self.batch_size = config.batch_size
+        self.flush_interval = config.flush_interval
+        self.states: Dict[str, Dict] = storage.load_all() if storage else {}
+
+        # Write-behind buffer: agent id -> state, or None for a delete
+        self._pending: Dict[str, Optional[Dict]] = {}
+        self._batch_done: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._snapshotting = False
+
+    def _write(self, changes: Dict[str, Optional[Dict]]):
+        """Write a set of changes to storage in one transaction."""
+        upserts = {agent_id: state for agent_id, state in changes.items() if state is not None}
+        deletes = [agent_id for agent_id, state in changes.items() if state is None]
+        self.storage.write_batch(upserts, deletes)
+
+    async def _write_changes(self, changes: Dict[str, Optional[Dict]]):
+        """Write changes off the event loop and compact the storage if it asks for it."""
+        await asyncio.to_thread(self._write, changes)
+        if self.storage.snapshot_due() and not self._snapshotting:
+            await self.snapshot()
+
+    @traced("StateManager.snapshot")
+    async def snapshot(self):
+        """Write a compacted snapshot of the current states to storage."""
+        if self.storage is None:
+            return
+        self._snapshotting = True
+        try:
+            # Every change journaled up to `seq` is already applied to self.states
+            seq = self.storage.seq
+            states = dict(self.states)
+            await asyncio.to_thread(self.storage.snapshot, states, seq)
+        finally:
+            self._snapshotting = False
 
+    async def _persist(self, changes: Dict[str, Optional[Dict]]):
+        """Persist changes according to the durability mode."""
+        if self.storage is None:
+            return
+        if self.durability == "sync":
+            await self._write_changes(changes)
+            return
+
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._batch_done = None
+            self._flusher = loop.create_task(self._flush_loop())
+        self._pending.update(changes)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+        if self.durability == "batched":
+            if self._batch_done is None:
+                self._batch_done = loop.create_future()
+            await self._batch_done
+
+    async def _flush_loop(self):
+        """Flush the buffer on size or time thresholds until it is empty."""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Error flushing agent states")
+
+    @traced("StateManager.flush")
+    async def flush(self):
+        """Write every buffered change to storage."""
+        if not self._pending:
+            return
+        changes, self._pending = self._pending, {}
+        done, self._batch_done = self._batch_done, None
+        if self._wakeup:
+            self._wakeup.clear()
+        try:
+            await self._write_changes(changes)
+        except Exception as e:
+            if done is not None:
+                done.set_exception(e)
+            else:
+                # Nobody is waiting on write-behind changes, keep them for the next flush
+                self._pending = {**changes, **self._pending}
+            raise
+        if done is not None:
+            done.set_result(True)
+
+    @traced("StateManager.save_state")
     async def save_state(self, agent_id: str, state: Dict):
         """Save agent state."""
         self.states[agent_id] = state
+        await self._persist({agent_id: state})
         return True
 
+    @traced("StateManager.save_states")
+    async def save_states(self, states: Dict[str, Dict]):
+        """Save several agent states in one write."""
+        self.states.update(states)
+        await self._persist(states)
+        return True
+
+    @traced("StateManager.load_state")
     async def load_state(self, agent_id: str) -> Optional[Dict]:
         """Load agent state."""
         return self.states.get(agent_id)
 
+    @traced("StateManager.delete_state")
     async def delete_state(self, agent_id: str):
         """Delete agent state."""
         if agent_id in self.states:
             del self.states[agent_id]
+            await self._persist({agent_id: None})
             return True
         return False
 
+    @traced("StateManager.delete_states")
+    async def delete_states(self, agent_ids: List[str]):
+        """Delete several agent states in one write."""
+        for agent_id in agent_ids:
+            self.states.pop(agent_id, None)
+        await self._persist(dict.fromkeys(agent_ids))
+        return True
+
     async def list_states(self) -> Dict[str, Dict]:
         """List all agent states."""
         return self.states
@@ -47,3 +195,15 @@ class StateManager(AgentService):
     async def clear(self):
         """Clear all states."""
         self.states = {}
+        self._pending = {}
+        done, self._batch_done = self._batch_done, None
+        if done is not None:
+            done.set_result(True)
+        if self.storage is not None:
+            await asyncio.to_thread(self.storage.clear)
+
+    async def close(self):
+        """Flush buffered changes and close the storage backend."""
+        if self.storage is not None:
+            await self.flush()
+            self.storage.close()
@@ -0,0 +1,209 @@
+"""
+State Storage
+
+Pluggable storage backends used by the StateManager to persist agent state.
+"""
+
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable
+
+from smart_hive.services.control_plane.records import AgentRecord
+from smart_hive.utils.lazy_import import lazy_import
+
+sqlite3 = lazy_import("sqlite3")
+
+class StateStorage(ABC):
+    """Interface for agent state storage backends."""
+
+    # Sequence number of the last change written, for backends that keep one
+    seq: int = 0
+
+    @abstractmethod
+    def load_all(self) -> Dict[str, Dict]:
+        """Load every stored agent state."""
+
+    @abstractmethod
+    def write_batch(self, upserts: Dict[str, Dict], deletes: Iterable[str]):
+        """Apply a set of upserts and deletes as one transaction."""
+
+    @abstractmethod
+    def clear(self):
+        """Delete every stored agent state."""
+
+    def snapshot_due(self) -> bool:
+        """Whether the backend wants a compacted snapshot of the current states."""
+        return False
+
+    def snapshot(self, states: Dict[str, Dict], seq: int):
+        """Store a snapshot of `states` covering every change up to `seq`."""
+
+    def close(self):
+        """Release any resource held by the backend."""
+
+def _encode_default(value):
+    """
+    Store agent records in their persisted form and other values that are
+    not JSON serializable, such as a live AgentService, as null.
+    """
+    if isinstance(value, AgentRecord):
+        return value.to_state()
+    return None
+
+class SQLiteStorage(StateStorage):
+    """
+    Storage in a SQLite database in WAL mode, so readers never block the
+    writer. Each batch is committed as a single transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_states (agent_id TEXT PRIMARY KEY, state TEXT NOT NULL)"
+        )
+
+    def load_all(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT agent_id, state FROM agent_states").fetchall()
+        return {agent_id: json.loads(state) for agent_id, state in rows}
+
+    def write_batch(self, upserts: Dict[str, Dict], deletes: Iterable[str]):
+        rows = [(agent_id, json.dumps(state, default=_encode_default)) for agent_id, state in upserts.items()]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO agent_states (agent_id, state) VALUES (?, ?) "
+                    "ON CONFLICT(agent_id) DO UPDATE SET state = excluded.state",
+                    rows
+                )
+                self._conn.executemany(
+                    "DELETE FROM agent_states WHERE agent_id = ?",
+                    [(agent_id,) for agent_id in deletes]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM agent_states")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class JournalStorage(StateStorage):
+    """
+    Append-only operation log plus periodic compacted snapshots.
+
+    Every change is appended to journal.log as one JSON record with a
+    sequence number. snapshot.json holds every state as of a sequence
+    number, after which the journal is truncated to the records past it.
+    Loading reads the latest snapshot and replays only the journal tail.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = 10000, fsync: bool = True):
+        self.journal_path = os.path.join(directory, "journal.log")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._lock = threading.Lock()
+        self._recovered = self._recover()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def _recover(self) -> Dict[str, Dict]:
+        """Load the latest snapshot and replay the journal tail on top of it."""
+        states: Dict[str, Dict] = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            states = snapshot["states"]
+            self.seq = self.snapshot_seq = snapshot["seq"]
+
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write at the end of the log
+                        break
+                    if record["seq"] <= self.snapshot_seq:
+                        continue
+                    if record["op"] == "save":
+                        states[record["agent_id"]] = record["state"]
+                    else:
+                        states.pop(record["agent_id"], None)
+                    self.seq = record["seq"]
+        return states
+
+    def load_all(self) -> Dict[str, Dict]:
+        if self._recovered is None:
+            with self._lock:
+                self._recovered = self._recover()
+        states, self._recovered = self._recovered, None
+        return states
+
+    def write_batch(self, upserts: Dict[str, Dict], deletes: Iterable[str]):
+        with self._lock:
+            lines = []
+            for agent_id, state in upserts.items():
+                self.seq += 1
+                lines.append(json.dumps(
+                    {"seq": self.seq, "op": "save", "agent_id": agent_id, "state": state},
+                    default=_encode_default
+                ))
+            for agent_id in deletes:
+                self.seq += 1
+                lines.append(json.dumps({"seq": self.seq, "op": "delete", "agent_id": agent_id}))
+            if not lines:
+                return
+            self._journal.write("\n".join(lines) + "\n")
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+
+    def snapshot_due(self) -> bool:
+        return self.seq - self.snapshot_seq >= self.snapshot_every
+
+    def snapshot(self, states: Dict[str, Dict], seq: int):
+        with self._lock:
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"seq": seq, "states": states}, f, default=_encode_default)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self.snapshot_seq = seq
+            self._truncate_journal(seq)
+
+    def _truncate_journal(self, seq: int):
+        """Drop journal records already covered by the snapshot."""
+        self._journal.close()
+        tmp_path = self.journal_path + ".tmp"
+        with open(self.journal_path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+            for line in src:
+                try:
+                    if json.loads(line)["seq"] > seq:
+                        dst.write(line)
+                except json.JSONDecodeError:
+                    break
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def clear(self):
+        self.snapshot({}, self.seq)
+
+    def close(self):
+        with self._lock:
+            self._journal.close()
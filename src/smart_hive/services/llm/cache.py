@@ -0,0 +1,272 @@
+"""
+LLM Response Cache
+
+Two-tier cache for LLM responses: an in-memory LRU with TTL in front of an
+optional SQLite file that survives restarts. Entries are keyed on model,
+temperature and the prompt. The file holds JSON text only, so reading it
+never runs code.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from smart_hive.utils.lazy_import import lazy_import
+
+sqlite3 = lazy_import("sqlite3")
+
+# Returned by get() on a miss, since None can be a valid response
+MISSING = object()
+
+# Modules whose pydantic models (the llama-index response types) may be
+# rebuilt from the on-disk tier
+TRUSTED_MODEL_MODULES = ("llama_index.",)
+
+def normalize_prompt(prompt: Any) -> Any:
+    """
+    Trim the ends of a prompt or of the contents of a list of chat messages.
+    Inner whitespace is kept, as it can matter, e.g. in code.
+    """
+    if isinstance(prompt, str):
+        return prompt.strip()
+    return [
+        [str(getattr(message, "role", "")), normalize_prompt(str(getattr(message, "content", message)))]
+        for message in prompt
+    ]
+
+def make_key(model: str, temperature: float, prompt: Any, **kwargs) -> str:
+    """Cache key for a request."""
+    payload = json.dumps(
+        [model, temperature, normalize_prompt(prompt), kwargs],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def encode_response(value: Any) -> Optional[str]:
+    """JSON text of a response for the on-disk tier, or None if it cannot be stored."""
+    if isinstance(value, BaseModel):
+        cls = type(value)
+        payload = {"model": f"{cls.__module__}:{cls.__qualname__}", "data": value.model_dump(mode="json")}
+    else:
+        payload = {"value": value}
+    try:
+        return json.dumps(payload)
+    except (TypeError, ValueError):
+        return None
+
+def decode_response(text: str) -> Any:
+    """Response stored by encode_response(), or MISSING if it cannot be rebuilt."""
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return MISSING
+    if "model" not in payload:
+        return payload.get("value", MISSING)
+    module, _, name = payload["model"].partition(":")
+    if not module.startswith(TRUSTED_MODEL_MODULES):
+        return MISSING
+    try:
+        cls = getattr(importlib.import_module(module), name)
+        if not (isinstance(cls, type) and issubclass(cls, BaseModel)):
+            return MISSING
+        return cls.model_validate(payload["data"])
+    except Exception:
+        return MISSING
+
+class LLMResponseCache:
+    """
+    In-memory LRU+TTL cache with an optional SQLite tier. Async callers use
+    aget() and aput(), which read and write the file in a worker thread.
+    Responses that cannot be stored as JSON are kept in memory only.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # The connection has its own lock so disk reads never hold up memory hits
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses "
+                "(key TEXT PRIMARY KEY, expires REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def _recall(self, key: str) -> Any:
+        """Return the response from the memory tier, or MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            if self._conn is None:
+                self.misses += 1
+            return MISSING
+
+    def _load(self, key: str) -> Any:
+        """Return the response from the disk tier, or MISSING. Blocks on SQLite."""
+        with self._disk_lock:
+            row = self._conn.execute(
+                "SELECT expires, value FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        value = MISSING
+        if row is not None and row[0] > time.time():
+            value = decode_response(row[1])
+        with self._lock:
+            if value is MISSING:
+                self.misses += 1
+                return MISSING
+            self._remember(key, value, row[0] - time.time())
+            self.hits += 1
+            self.disk_hits += 1
+            return value
+
+    def _store(self, key: str, text: str):
+        """Write a response to the disk tier. Blocks on SQLite."""
+        with self._disk_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, expires, value) VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl, text)
+            )
+
+    def get(self, key: str) -> Any:
+        """Return the cached response, or MISSING."""
+        value = self._recall(key)
+        if value is MISSING and self._conn is not None:
+            value = self._load(key)
+        return value
+
+    async def aget(self, key: str) -> Any:
+        """Like get(), reading the disk tier off the event loop."""
+        value = self._recall(key)
+        if value is MISSING and self._conn is not None:
+            value = await asyncio.to_thread(self._load, key)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store a response in every tier."""
+        with self._lock:
+            self._remember(key, value, self.ttl)
+        text = encode_response(value) if self._conn is not None else None
+        if text is not None:
+            self._store(key, text)
+
+    async def aput(self, key: str, value: Any):
+        """Like put(), writing the disk tier off the event loop."""
+        with self._lock:
+            self._remember(key, value, self.ttl)
+        text = encode_response(value) if self._conn is not None else None
+        if text is not None:
+            await asyncio.to_thread(self._store, key, text)
+
+    def _remember(self, key: str, value: Any, ttl: float):
+        """Store in the memory tier, evicting the least recently used entries."""
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries)
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if self._conn is not None:
+            with self._disk_lock:
+                self._conn.execute("DELETE FROM llm_responses")
+
+    def close(self):
+        """Close the on-disk tier."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+class CachedLLM:
+    """
+    Wraps an LLM client so completion and chat calls are served from the
+    cache. Everything else, including streaming, goes to the client.
+    Calls sampled at a temperature above 0 are not deterministic, so they
+    are only cached if `cache_sampled` is set.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        cache: LLMResponseCache,
+        model: str,
+        temperature: float,
+        cache_sampled: bool = False
+    ):
+        self._llm = llm
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+        self.cache_sampled = cache_sampled
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+
+    def _key(self, prompt: Any, kwargs: Dict) -> Optional[str]:
+        """Cache key of a call, or None if its response must not be cached."""
+        if kwargs.get("temperature", self.temperature) > 0 and not self.cache_sampled:
+            return None
+        return make_key(self.model, self.temperature, prompt, **kwargs)
+
+    def _through(self, key: Optional[str], call) -> Any:
+        if key is None:
+            return call()
+        response = self.cache.get(key)
+        if response is MISSING:
+            response = call()
+            self.cache.put(key, response)
+        return response
+
+    async def _athrough(self, key: Optional[str], call) -> Any:
+        if key is None:
+            return await call()
+        response = await self.cache.aget(key)
+        if response is MISSING:
+            response = await call()
+            await self.cache.aput(key, response)
+        return response
+
+    def complete(self, prompt: str, **kwargs) -> Any:
+        return self._through(self._key(prompt, kwargs), lambda: self._llm.complete(prompt, **kwargs))
+
+    async def acomplete(self, prompt: str, **kwargs) -> Any:
+        return await self._athrough(self._key(prompt, kwargs), lambda: self._llm.acomplete(prompt, **kwargs))
+
+    def chat(self, messages, **kwargs) -> Any:
+        return self._through(self._key(messages, kwargs), lambda: self._llm.chat(messages, **kwargs))
+
+    async def achat(self, messages, **kwargs) -> Any:
+        return await self._athrough(self._key(messages, kwargs), lambda: self._llm.achat(messages, **kwargs))
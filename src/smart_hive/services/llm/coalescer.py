@@ -0,0 +1,171 @@
+"""
+LLM Request Coalescing
+
+Cuts provider calls under fan-out. Identical requests already in flight are
+single-flighted so every waiter shares one result, and embedding calls
+arriving within a short window are grouped into one batch request.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from smart_hive.services.llm.cache import make_key
+
+class _Flight:
+    """A shared call in flight and how many callers still wait for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers share its
+    result. The call runs in its own task, so a cancelled caller only stops
+    waiting; the call itself is cancelled once no caller waits for it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `call`, or wait for the identical call already in flight."""
+        flight = self._calls.get(key)
+        if flight is None:
+            flight = self._calls[key] = _Flight(asyncio.ensure_future(call()))
+            flight.task.add_done_callback(lambda task: self._land(key, flight))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._land(key, flight)
+
+    def _land(self, key: str, flight: _Flight):
+        """Forget a finished or abandoned call, so the next caller runs it again."""
+        if self._calls.get(key) is flight:
+            del self._calls[key]
+        if flight.task.done() and not flight.task.cancelled():
+            # Mark retrieved, the waiters (if any) get it from their own await
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._calls)}
+
+class MicroBatcher:
+    """
+    Groups items submitted within `window` seconds (or until `max_batch_size`
+    is reached) into one call of `batch_call`, which must return one result
+    per item in order. Duplicate items in a batch are sent once.
+    """
+
+    def __init__(
+        self,
+        batch_call: Callable[[List[Any]], Awaitable[List[Any]]],
+        window: float = 0.005,
+        max_batch_size: int = 64
+    ):
+        self.batch_call = batch_call
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.items = 0
+        self.batches = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        self.items += 1
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        """Send the pending items as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = list(dict.fromkeys(item for item, _ in batch))
+        self.batches += 1
+        error: Exception = RuntimeError("Batch call was cancelled")
+        try:
+            results = await self.batch_call(items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch call returned {len(results)} results for {len(items)} items")
+            by_item = dict(zip(items, results))
+            for item, future in batch:
+                if not future.done():
+                    future.set_result(by_item[item])
+        except Exception as e:
+            error = e
+        finally:
+            # No waiter is left hanging, whatever ended the batch
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    def stats(self) -> Dict[str, int]:
+        return {"items": self.items, "batches": self.batches, "pending": len(self._pending)}
+
+class CoalescingLLM:
+    """Wraps an LLM client so identical concurrent async calls reach it once."""
+
+    def __init__(self, llm: Any, flights: SingleFlight, model: str, temperature: float):
+        self._llm = llm
+        self.flights = flights
+        self.model = model
+        self.temperature = temperature
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+
+    async def acomplete(self, prompt: str, **kwargs) -> Any:
+        key = "complete:" + make_key(self.model, self.temperature, prompt, **kwargs)
+        return await self.flights.do(key, lambda: self._llm.acomplete(prompt, **kwargs))
+
+    async def achat(self, messages, **kwargs) -> Any:
+        key = "chat:" + make_key(self.model, self.temperature, messages, **kwargs)
+        return await self.flights.do(key, lambda: self._llm.achat(messages, **kwargs))
+
+class CoalescingEmbedding:
+    """
+    Wraps an embedding client so concurrent text embeddings are sent as
+    micro-batches and identical concurrent queries are single-flighted.
+    """
+
+    def __init__(self, embedding: Any, batcher: MicroBatcher, flights: SingleFlight):
+        self._embedding = embedding
+        self.batcher = batcher
+        self.flights = flights
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._embedding, name)
+
+    async def aget_text_embedding(self, text: str) -> List[float]:
+        return await self.batcher.submit(text)
+
+    async def aget_query_embedding(self, query: str) -> List[float]:
+        return await self.flights.do("query:" + query, lambda: self._embedding.aget_query_embedding(query))
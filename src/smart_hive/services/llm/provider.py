@@ -0,0 +1,180 @@
+"""
+LLM Provider
+
+Single place where SmartHive builds its LLM and embedding clients. Clients
+are created from OpenAIConfig on first real use and shared by every service,
+over one pooled HTTP transport.
+"""
+
+from typing import Any, Dict, Optional
+
+from smart_hive.configs.openai_config import OpenAIConfig
+from smart_hive.services.llm.cache import CachedLLM, LLMResponseCache
+from smart_hive.services.llm.coalescer import CoalescingEmbedding, CoalescingLLM, MicroBatcher, SingleFlight
+from smart_hive.services.llm.scheduler import PRIORITY_NORMAL, LLMScheduler, ScheduledLLM, estimate_tokens
+
+class LLMProvider:
+    """Builds the OpenAI client lazily and shares it across services."""
+
+    def __init__(self, config: Optional[OpenAIConfig] = None):
+        self.config = config
+        self.clients_built = 0
+        self.cache: Optional[LLMResponseCache] = None
+        self.scheduler: Optional[LLMScheduler] = None
+        self.flights: Optional[SingleFlight] = None
+        self.batcher: Optional[MicroBatcher] = None
+        self.transport: Optional[Any] = None
+        self._client: Optional[Any] = None
+        self._embedding: Optional[Any] = None
+        self._lanes: Dict[int, Any] = {}
+
+    def _get_config(self) -> OpenAIConfig:
+        """Return the provider config, read from the environment on first call."""
+        if self.config is None:
+            self.config = OpenAIConfig.from_env()
+        return self.config
+
+    def _get_transport(self) -> Any:
+        """Return the shared HTTP transport, creating it on first call."""
+        if self.transport is None:
+            from smart_hive.services.llm.transport import HTTPTransport
+            self.transport = HTTPTransport(self._get_config())
+        return self.transport
+
+    def _get_scheduler(self) -> Optional[LLMScheduler]:
+        """Return the shared scheduler if enabled, creating it on first call."""
+        config = self._get_config()
+        if config.scheduler_enabled and self.scheduler is None:
+            self.scheduler = LLMScheduler(
+                max_concurrency=config.max_concurrency,
+                requests_per_minute=config.requests_per_minute,
+                tokens_per_minute=config.tokens_per_minute,
+                max_retries=config.max_retries,
+                retry_base_delay=config.retry_base_delay,
+                retry_max_delay=config.retry_max_delay
+            )
+        return self.scheduler
+
+    def get_llm(self, priority: int = PRIORITY_NORMAL) -> Any:
+        """Return the shared client for a priority lane, building it on first call."""
+        if self._client is None:
+            # Imported here so importing services does not load the LLM stack
+            from llama_index.llms.openai import OpenAI
+
+            config = self._get_config()
+            transport = self._get_transport()
+            self._client = OpenAI(
+                model=config.model,
+                temperature=config.temperature,
+                api_key=config.api_key,
+                http_client=transport.client,
+                async_http_client=transport.async_client
+            )
+            self.clients_built += 1
+
+            self._get_scheduler()
+            if config.cache_enabled:
+                self.cache = LLMResponseCache(
+                    max_entries=config.cache_max_entries,
+                    ttl=config.cache_ttl,
+                    path=config.cache_path
+                )
+            if config.coalesce_enabled and self.flights is None:
+                self.flights = SingleFlight()
+
+        if priority not in self._lanes:
+            # Cache, then coalescing, then the scheduler: hits never wait
+            # for a slot and duplicate requests only take one
+            config = self._get_config()
+            client = self._client
+            if self.scheduler is not None:
+                client = ScheduledLLM(client, self.scheduler, config.model, priority)
+            if self.flights is not None:
+                client = CoalescingLLM(client, self.flights, config.model, config.temperature)
+            if self.cache is not None:
+                client = CachedLLM(client, self.cache, config.model, config.temperature, config.cache_sampled)
+            self._lanes[priority] = client
+        return self._lanes[priority]
+
+    def get_embedding(self) -> Any:
+        """Return the shared embedding client, building it on first call."""
+        if self._embedding is None:
+            from llama_index.embeddings.openai import OpenAIEmbedding
+
+            config = self._get_config()
+            transport = self._get_transport()
+            embedding = OpenAIEmbedding(
+                model=config.embedding_model,
+                api_key=config.api_key,
+                http_client=transport.client,
+                async_http_client=transport.async_client
+            )
+            self.clients_built += 1
+
+            if config.coalesce_enabled:
+                if self.flights is None:
+                    self.flights = SingleFlight()
+
+                scheduler = self._get_scheduler()
+
+                async def embed_batch(texts):
+                    if scheduler is None:
+                        return await embedding.aget_text_embedding_batch(texts)
+                    return await scheduler.run(
+                        config.embedding_model,
+                        lambda: embedding.aget_text_embedding_batch(texts),
+                        tokens=sum(estimate_tokens(text) for text in texts)
+                    )
+
+                self.batcher = MicroBatcher(
+                    embed_batch,
+                    window=config.batch_window,
+                    max_batch_size=config.max_batch_size
+                )
+                embedding = CoalescingEmbedding(embedding, self.batcher, self.flights)
+            self._embedding = embedding
+        return self._embedding
+
+    async def aclose(self):
+        """Close the shared HTTP pool and the cache."""
+        if self.transport is not None:
+            await self.transport.aclose()
+        if self.cache is not None:
+            self.cache.close()
+
+    def lazy(self, priority: int = PRIORITY_NORMAL) -> "LazyLLM":
+        """Return a stand-in that builds the client only when it is used."""
+        return LazyLLM(self, priority)
+
+class LazyLLM:
+    """
+    Stand-in passed as `llm` to agent services. Any attribute access is
+    forwarded to the provider's client, building it the first time.
+    """
+
+    __slots__ = ("_provider", "_priority")
+
+    def __init__(self, provider: LLMProvider, priority: int = PRIORITY_NORMAL):
+        self._provider = provider
+        self._priority = priority
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._provider.get_llm(self._priority), name)
+
+    def __repr__(self) -> str:
+        return f"LazyLLM(built={self._provider._client is not None})"
+
+# Process-wide provider
+_provider: Optional[LLMProvider] = None
+
+def get_llm_provider() -> LLMProvider:
+    """Return the process-wide provider, creating it on first call."""
+    global _provider
+    if _provider is None:
+        _provider = LLMProvider()
+    return _provider
+
+def set_llm_provider(provider: Optional[LLMProvider]):
+    """Replace the process-wide provider."""
+    global _provider
+    _provider = provider
@@ -0,0 +1,274 @@
+"""
+LLM Request Scheduler
+
+Central async scheduler between SmartHive services and the LLM client. Per
+model it caps concurrent requests, paces them with request-per-minute and
+token-per-minute buckets, serves waiting callers by priority lane and
+retries provider throttling with jittered exponential backoff.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Priority lanes, lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+def estimate_tokens(prompt: Any) -> int:
+    """Rough token count of a prompt or list of chat messages (4 characters per token)."""
+    if isinstance(prompt, str):
+        text = prompt
+    else:
+        text = "".join(str(getattr(message, "content", message)) for message in prompt)
+    return max(1, math.ceil(len(text) / 4))
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed call is worth retrying: throttling, timeouts and server errors."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None and getattr(error, "response", None) is not None:
+        status_code = getattr(error.response, "status_code", None)
+    return status_code in RETRYABLE_STATUS
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float = 1.0) -> float:
+        """Seconds until `amount` units are available, 0 if they are now."""
+        amount = min(amount, self.capacity)
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float = 1.0):
+        """Take `amount` units, which the caller has checked are available."""
+        self.tokens -= min(amount, self.capacity)
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` units are available and take them."""
+        while True:
+            delay = self.wait_time(amount)
+            if not delay:
+                self.take(amount)
+                return
+            await asyncio.sleep(delay)
+
+class ModelLane:
+    """Concurrency slots and rate buckets of one model, granted in priority order."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.in_flight = 0
+        self.queued = 0
+        self.queued_by_priority: Dict[int, int] = {}
+        self._waiters: List[Tuple[int, int, asyncio.Future, int]] = []
+        self._order = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.completed = 0
+        self.retries = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _delay(self, tokens: int) -> float:
+        """Seconds until both buckets can cover one request of `tokens` tokens."""
+        delay = 0.0
+        if self.requests is not None:
+            delay = self.requests.wait_time(1)
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        return delay
+
+    def _grant(self, tokens: int):
+        """Claim a slot and charge the buckets."""
+        self.in_flight += 1
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def _dequeue(self, priority: int):
+        self.queued -= 1
+        self.queued_by_priority[priority] -= 1
+        if not self.queued_by_priority[priority]:
+            del self.queued_by_priority[priority]
+
+    def _dispatch(self):
+        """Grant waiters in priority order while slots and rate budget last."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters and self.in_flight < self.max_concurrency:
+            priority, _, waiter, tokens = self._waiters[0]
+            if waiter.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._delay(tokens)
+            if delay:
+                # The head waits for the buckets without holding a slot, and
+                # anything of higher priority arriving meanwhile goes first
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            self._dequeue(priority)
+            self._grant(tokens)
+            waiter.set_result(None)
+
+    async def acquire(self, priority: int, tokens: int = 1):
+        """Take a concurrency slot and the rate budget, queueing behind higher-priority callers."""
+        if not self.queued and self.in_flight < self.max_concurrency and not self._delay(tokens):
+            self._grant(tokens)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter, tokens))
+        self.queued += 1
+        self.queued_by_priority[priority] = self.queued_by_priority.get(priority, 0) + 1
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._dequeue(priority)
+                self._dispatch()
+            raise
+
+    def release(self):
+        """Free a slot and hand it to the next waiter."""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def record_wait(self, seconds: float):
+        self.waited += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "queued_by_priority": dict(self.queued_by_priority),
+            "completed": self.completed,
+            "retries": self.retries,
+            "wait_ms_avg": self.wait_total / self.waited * 1000 if self.waited else 0.0,
+            "wait_ms_max": self.wait_max * 1000
+        }
+
+class LLMScheduler:
+    """Runs LLM calls through per-model lanes with retries."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 20.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.lanes: Dict[str, ModelLane] = {}
+
+    def lane(self, model: str) -> ModelLane:
+        """Return the lane of a model, creating it on first use."""
+        if model not in self.lanes:
+            self.lanes[model] = ModelLane(
+                self.max_concurrency, self.requests_per_minute, self.tokens_per_minute
+            )
+        return self.lanes[model]
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def run(
+        self,
+        model: str,
+        call: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_NORMAL,
+        tokens: int = 1
+    ) -> Any:
+        """Run `call` once a slot and the rate budget are available, retrying on throttling."""
+        lane = self.lane(model)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            await lane.acquire(priority, tokens)
+            try:
+                lane.record_wait(time.monotonic() - start)
+                result = await call()
+                lane.completed += 1
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+            finally:
+                lane.release()
+            lane.retries += 1
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, wait time and retry counters per model."""
+        return {model: lane.stats() for model, lane in self.lanes.items()}
+
+class ScheduledLLM:
+    """
+    Wraps an LLM client so async completion and chat calls go through the
+    scheduler in a given priority lane. Sync calls go straight to the client.
+    """
+
+    def __init__(self, llm: Any, scheduler: LLMScheduler, model: str, priority: int = PRIORITY_NORMAL):
+        self._llm = llm
+        self.scheduler = scheduler
+        self.model = model
+        self.priority = priority
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._llm, name)
+
+    async def acomplete(self, prompt: str, **kwargs) -> Any:
+        return await self.scheduler.run(
+            self.model, lambda: self._llm.acomplete(prompt, **kwargs), self.priority, estimate_tokens(prompt)
+        )
+
+    async def achat(self, messages, **kwargs) -> Any:
+        return await self.scheduler.run(
+            self.model, lambda: self._llm.achat(messages, **kwargs), self.priority, estimate_tokens(messages)
+        )
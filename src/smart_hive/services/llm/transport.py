@@ -0,0 +1,56 @@
+"""
+HTTP Transport
+
+Process-wide pooled HTTP clients handed to every LLM client, so the whole
+fleet shares one connection pool, one set of TLS sessions and one cap on
+open sockets.
+"""
+
+from typing import Optional
+
+import httpx
+
+from smart_hive.configs.openai_config import OpenAIConfig
+
+class HTTPTransport:
+    """Lazily built sync and async httpx clients sharing the same pool settings."""
+
+    def __init__(self, config: Optional[OpenAIConfig] = None):
+        self.config = config or OpenAIConfig.from_env()
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+
+    def _options(self) -> dict:
+        """Keyword arguments shared by both clients."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.config.http_max_connections,
+                max_keepalive_connections=self.config.http_max_keepalive_connections,
+                keepalive_expiry=self.config.http_keepalive_expiry
+            ),
+            "timeout": httpx.Timeout(self.config.http_timeout),
+            "http2": self.config.http2
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        """Shared sync client."""
+        if self._client is None:
+            self._client = httpx.Client(**self._options())
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """Shared async client."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(**self._options())
+        return self._async_client
+
+    async def aclose(self):
+        """Close both clients and their connections."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
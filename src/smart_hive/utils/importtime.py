@@ -0,0 +1,111 @@
+"""
+Import Time Report
+
+Structured version of `python -X importtime`, used to see where the import
+time of the control plane goes. llama-agents and FastAPI are imported eagerly
+(the orchestrator and services subclass llama-agents classes, the routes need
+FastAPI at definition time), so the numbers only reflect a real cold start
+when measured against the installed dependencies, not the test mocks.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+COLD_START_CODE = (
+    "import time; start = time.perf_counter(); "
+    "from smart_hive.services.control_plane.main import create_app; create_app(); "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+def _env(extra_path: Optional[List[str]]) -> Dict[str, str]:
+    """Environment for a child interpreter with `extra_path` prepended to PYTHONPATH."""
+    env = dict(os.environ)
+    if extra_path:
+        env["PYTHONPATH"] = os.pathsep.join(extra_path + [env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    return env
+
+def parse_importtime(output: str) -> List[Dict]:
+    """Parse `-X importtime` output into one entry per imported module."""
+    entries = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": len(indent) // 2
+            })
+    return entries
+
+def build_report(module: str, entries: List[Dict], wall_ms: float) -> Dict:
+    """Aggregate parsed entries into a report."""
+    packages: Dict[str, int] = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + entry["self_us"]
+    target = next((entry for entry in entries if entry["module"] == module), None)
+    return {
+        "module": module,
+        "wall_ms": wall_ms,
+        "import_ms": (target["cumulative_us"] if target else 0) / 1000,
+        "modules": len(entries),
+        "packages": {
+            name: us / 1000
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        },
+        "entries": sorted(entries, key=lambda entry: entry["cumulative_us"], reverse=True)
+    }
+
+def measure_import_time(
+    module: str,
+    python: str = sys.executable,
+    extra_path: Optional[List[str]] = None
+) -> Dict:
+    """Import `module` in a fresh interpreter with `-X importtime` and report the cost."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_env(extra_path)
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return build_report(module, parse_importtime(result.stderr), wall_ms)
+
+def measure_cold_start(python: str = sys.executable, extra_path: Optional[List[str]] = None) -> float:
+    """Milliseconds a fresh interpreter needs to import the control plane and create the app.
+
+    Whatever `extra_path` puts first on PYTHONPATH is what gets measured, e.g. the
+    tests/mocks stand-ins for llama-agents instead of the real package.
+    """
+    result = subprocess.run(
+        [python, "-c", COLD_START_CODE], capture_output=True, text=True, env=_env(extra_path)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Creating the app failed:\n{result.stderr}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+def format_report(report: Dict, top: int = 15) -> str:
+    """Render a report as a text table."""
+    lines = [
+        f"{report['module']}: {report['import_ms']:.1f} ms import, "
+        f"{report['wall_ms']:.1f} ms wall, {report['modules']} modules",
+        "",
+        f"{'package':<32} {'self ms':>10}"
+    ]
+    for name, ms in list(report["packages"].items())[:top]:
+        lines.append(f"{name:<32} {ms:>10.1f}")
+    lines += ["", f"{'module':<48} {'self ms':>10} {'cumulative ms':>14}"]
+    for entry in report["entries"][:top]:
+        lines.append(
+            f"{entry['module']:<48} {entry['self_us'] / 1000:>10.1f} {entry['cumulative_us'] / 1000:>14.1f}"
+        )
+    return "\n".join(lines)
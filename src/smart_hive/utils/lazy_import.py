@@ -0,0 +1,31 @@
+"""
+Lazy Imports
+
+Shims that defer executing heavy modules until they are first used. The
+control plane defers numpy, sqlite3 and httpx this way. llama-agents and
+FastAPI are still imported eagerly, so the startup saving is limited to
+those three.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return module `name` without executing it. The module body runs on the
+    first attribute access, so importing a SmartHive module does not pay
+    for dependencies that only some code paths need.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,229 @@
+"""
+Tracing
+
+Lightweight spans for the control plane with no collector required. Spans
+follow the OpenTelemetry data model (trace/span ids, parent, nanosecond
+timestamps, attributes, status) and are exported as OTLP-style JSON, one
+span per line, to a local file that can later be shipped to a collector.
+
+Tracing is off until configure_tracing() is given a file; while off, traced
+calls go straight to the wrapped function.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Current span; NOT_SAMPLED marks a trace that is being skipped
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("smart_hive_span", default=None)
+NOT_SAMPLED = object()
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Typed OTLP AnyValue for an attribute."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP JSON representation of the span."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class JSONFileExporter:
+    """Buffers finished spans and appends them to a JSON lines file."""
+
+    def __init__(self, path: str, buffer_size: int = 512):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, span: Span):
+        self._buffer.append(span)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered spans."""
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+            if spans:
+                with open(self.path, "a") as f:
+                    f.write("".join(json.dumps(span.to_otlp()) + "\n" for span in spans))
+
+class _SpanContext:
+    """Context manager opening a span and making it current."""
+
+    __slots__ = ("tracer", "name", "attributes", "span", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def __enter__(self) -> Optional[Span]:
+        self.span = self.tracer.start_span(self.name, self.attributes)
+        self.token = _current.set(self.span if self.span is not None else NOT_SAMPLED)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        _current.reset(self.token)
+        if self.span is not None:
+            if exc is not None:
+                self.span.error = f"{exc_type.__name__}: {exc}"
+            self.tracer.end_span(self.span)
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter."""
+
+    def __init__(self, exporter: Optional[JSONFileExporter] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+        """Start a child of the current span, or a new trace. None when not recorded."""
+        parent = _current.get()
+        if parent is NOT_SAMPLED or not self.enabled:
+            return None
+        if parent is None:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                return None
+            return Span(name, f"{random.getrandbits(128):032x}", None, attributes or {})
+        return Span(name, parent.trace_id, parent.span_id, attributes or {})
+
+    def end_span(self, span: Span):
+        span.end_ns = time.time_ns()
+        self.exporter.export(span)
+
+    def span(self, name: str, **attributes) -> _SpanContext:
+        """Context manager tracing the enclosed block."""
+        return _SpanContext(self, name, attributes)
+
+    def flush(self):
+        if self.exporter is not None:
+            self.exporter.flush()
+
+# Process-wide tracer
+TRACER = Tracer()
+
+# Methods decorated with traced(), swapped by configure_tracing()
+_TRACED_METHODS: List["_Traced"] = []
+
+class _Traced:
+    """
+    An async function together with its traced version. Inside a class body
+    it installs the plain function while tracing is off, so disabled
+    tracing adds no call overhead to instrumented methods.
+    """
+
+    def __init__(self, fn: Callable, name: str, attributes: Dict[str, Any]):
+        self.fn = fn
+        self.owner = None
+        self.attr = None
+
+        @functools.wraps(fn)
+        async def traced_fn(*args, **kwargs):
+            with TRACER.span(name, **attributes):
+                return await fn(*args, **kwargs)
+        self.traced_fn = traced_fn
+        functools.update_wrapper(self, fn)
+
+    def __set_name__(self, owner, attr):
+        self.owner, self.attr = owner, attr
+        _TRACED_METHODS.append(self)
+        self.install()
+
+    def install(self):
+        setattr(self.owner, self.attr, self.traced_fn if TRACER.enabled else self.fn)
+
+    def __call__(self, *args, **kwargs):
+        # Plain functions outside a class check on every call
+        if TRACER.enabled:
+            return self.traced_fn(*args, **kwargs)
+        return self.fn(*args, **kwargs)
+
+def configure_tracing(path: Optional[str], sample_rate: float = 1.0):
+    """Export spans to `path`, or turn tracing off when it is None."""
+    TRACER.flush()
+    TRACER.exporter = JSONFileExporter(path) if path else None
+    TRACER.sample_rate = sample_rate
+    for method in _TRACED_METHODS:
+        method.install()
+
+def traced(name: str, **attributes):
+    """Decorator recording a span around every call of an async function."""
+    def decorator(fn: Callable):
+        return _Traced(fn, name, attributes)
+    return decorator
+
+class TracingMiddleware:
+    """Plain ASGI middleware opening the root span of every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or TRACER.exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        with TRACER.span(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"]}) as span:
+            async def send_with_status(message):
+                if span is not None and message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+            route = scope.get("route")
+            if span is not None and route is not None:
+                # Name by route template so spans group across agent ids
+                span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.route", route.path)
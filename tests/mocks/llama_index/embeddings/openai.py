@@ -0,0 +1,22 @@
+"""
+Mock de OpenAIEmbedding para tests
+"""
+
+class OpenAIEmbedding:
+    """Mock de OpenAIEmbedding."""
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.batch_calls = []
+
+    async def aget_text_embedding_batch(self, texts):
+        """Devuelve un embedding por texto."""
+        self.batch_calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    async def aget_text_embedding(self, text):
+        """Embedding de un solo texto."""
+        return (await self.aget_text_embedding_batch([text]))[0]
+
+    async def aget_query_embedding(self, query):
+        """Embedding de una consulta."""
+        return await self.aget_text_embedding(query)
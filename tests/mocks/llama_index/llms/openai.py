@@ -2,7 +2,20 @@
 Mock de OpenAI para tests
 """
 
+import asyncio
+
 class OpenAI:
     """Mock de OpenAI."""
-    def __init__(self):
-        pass
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = 0
+
+    def complete(self, prompt, **kwargs):
+        """Devuelve el prompt como respuesta."""
+        self.calls += 1
+        return f"response: {prompt}"
+
+    async def acomplete(self, prompt, **kwargs):
+        """Versión asíncrona de complete."""
+        await asyncio.sleep(0)
+        return self.complete(prompt, **kwargs)
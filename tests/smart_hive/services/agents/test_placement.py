@@ -0,0 +1,125 @@
+"""
+Tests for PlacementEngine
+"""
+
+import numpy as np
+import pytest
+
+from smart_hive.services.agents.placement import PlacementEngine
+
+NODES = {
+    "node-a": {"cpu": 4, "memory": 4096},
+    "node-b": {"cpu": 2, "memory": 2048},
+    "node-c": {"cpu": 8, "memory": 8192}
+}
+
+def request(engine, **requirements):
+    """Construir el vector de recursos de una solicitud."""
+    return engine.vector(requirements)
+
+def test_first_fit():
+    """Verificar que first_fit elige el primer nodo con capacidad."""
+    engine = PlacementEngine(NODES, "first_fit")
+    assert engine.place(request(engine, cpu=2, memory=1024)) == "node-a"
+    assert engine.place(request(engine, cpu=6, memory=1024)) == "node-c"
+
+def test_best_fit():
+    """Verificar que best_fit elige el nodo más ajustado."""
+    engine = PlacementEngine(NODES, "best_fit")
+    assert engine.place(request(engine, cpu=2, memory=1024)) == "node-b"
+    assert engine.place(request(engine, cpu=3, memory=1024)) == "node-a"
+
+def test_worst_fit():
+    """Verificar que worst_fit reparte la carga en el nodo más libre."""
+    engine = PlacementEngine(NODES, "worst_fit")
+    assert engine.place(request(engine, cpu=1, memory=512)) == "node-c"
+    engine.reserve("node-c", request(engine, cpu=6, memory=6144))
+    assert engine.place(request(engine, cpu=1, memory=512)) == "node-a"
+
+def test_memory_constraint():
+    """Verificar que se respeta la memoria además de la CPU."""
+    for policy in ("first_fit", "best_fit", "worst_fit"):
+        engine = PlacementEngine(NODES, policy)
+        assert engine.place(request(engine, cpu=1, memory=5000)) == "node-c", \
+            f"{policy} debe respetar la memoria"
+        assert engine.place(request(engine, cpu=1, memory=10000)) is None, \
+            f"{policy} no debe encontrar nodo"
+
+def test_reserve_and_release():
+    """Verificar que reservar y liberar actualiza la capacidad libre."""
+    engine = PlacementEngine(NODES, "first_fit")
+    engine.reserve("node-a", request(engine, cpu=4, memory=4096))
+    assert engine.place(request(engine, cpu=1, memory=512)) == "node-b"
+    engine.release("node-a", request(engine, cpu=4, memory=4096))
+    assert engine.place(request(engine, cpu=1, memory=512)) == "node-a"
+    assert engine.free_capacity("node-a") == {"cpu": 4, "memory": 4096}
+
+def test_dimensions():
+    """Verificar el orden de dimensiones configuradas y personalizadas."""
+    engine = PlacementEngine({"gpu-node": {"cpu": 4, "gpu": 2}}, dimensions=["cpu", "memory", "storage"])
+    assert engine.dimensions == ["cpu", "memory", "storage", "gpu"]
+    assert engine.vector({"tpu": 1}) is None
+    assert engine.vector({"tpu": 0}) is not None
+
+def test_feasibility_matrix():
+    """Verificar la matriz de factibilidad solicitudes x nodos."""
+    engine = PlacementEngine(NODES)
+    requests = np.array([[1, 512], [3, 3000], [9, 512]], dtype=np.float64)
+    assert engine.feasibility(requests).tolist() == [
+        [True, True, True],
+        [True, False, True],
+        [False, False, False]
+    ]
+
+def test_place_batch():
+    """Verificar que un lote se coloca completo o no se coloca."""
+    engine = PlacementEngine(NODES, "first_fit")
+    requests = np.array([[4, 4096], [2, 2048], [8, 8192]], dtype=np.float64)
+    assert engine.place_batch(requests) == ["node-a", "node-b", "node-c"]
+    assert engine.usage.sum() == 0, "place_batch no debe modificar el uso"
+
+    too_big = np.array([[8, 8192], [8, 8192]], dtype=np.float64)
+    assert engine.place_batch(too_big) is None
+
+def test_many_nodes():
+    """Verificar la colocación con miles de nodos."""
+    nodes = {f"node-{i}": {"cpu": 4, "memory": 4096} for i in range(5000)}
+    engine = PlacementEngine(nodes, "first_fit")
+    full = request(engine, cpu=4, memory=4096)
+    for i in range(0, 5000, 500):
+        engine.reserve(f"node-{i}", full)
+    assert engine.place(full) == "node-1"
+
+def test_invalid_policy():
+    """Verificar que una política desconocida es rechazada."""
+    with pytest.raises(ValueError):
+        PlacementEngine(NODES, "random")
+
+def test_policies_match_reference():
+    """Verificar que cada política elige el mismo nodo que una búsqueda exhaustiva."""
+    rng = np.random.default_rng(7)
+    nodes = {f"node-{i}": {"cpu": int(rng.integers(1, 16)), "memory": int(rng.integers(1, 16)) * 1024} for i in range(50)}
+    for policy in ("first_fit", "best_fit", "worst_fit"):
+        engine = PlacementEngine(nodes, policy)
+        for _ in range(100):
+            vector = request(engine, cpu=int(rng.integers(1, 4)), memory=int(rng.integers(1, 4)) * 512)
+            fitting = [name for name in engine.nodes if all(
+                engine.free_capacity(name)[dim] >= vector[i] for i, dim in enumerate(engine.dimensions)
+            )]
+            score = {name: sum(
+                (engine.free_capacity(name)[dim] - vector[i]) / max(engine.capacity[:, i].max(), 1.0)
+                for i, dim in enumerate(engine.dimensions)
+            ) for name in fitting}
+            expected = {
+                "first_fit": fitting[0] if fitting else None,
+                "best_fit": min(fitting, key=score.get) if fitting else None,
+                "worst_fit": max(fitting, key=score.get) if fitting else None
+            }[policy]
+            node = engine.place(vector)
+            if policy == "first_fit" or expected is None:
+                assert node == expected, f"{policy} eligió {node}, se esperaba {expected}"
+            else:
+                # Los empates entre nodos pueden resolverse a cualquiera de ellos
+                assert score[node] == pytest.approx(score[expected]), f"{policy} eligió {node}, se esperaba {expected}"
+            if node is not None:
+                engine.reserve(node, vector)
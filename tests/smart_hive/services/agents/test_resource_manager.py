@@ -78,3 +78,112 @@ async def test_default_requirements(resource_manager):
     status = await resource_manager.get_resource_status(agent_id)
     assert status["cpu"] == 1, "CPU por defecto debe ser 1"
     assert status["memory"] == 512, "Memoria por defecto debe ser 512"
+
+@pytest.mark.asyncio
+async def test_capacity_ledger(resource_manager):
+    """Verificar que el ledger mantiene los totales al asignar y liberar."""
+    await resource_manager.allocate_resources("backend_a", {"cpu": 2, "memory": 1024})
+    await resource_manager.allocate_resources("frontend_b", {"cpu": 1, "memory": 512})
+    assert resource_manager.allocated == {"cpu": 3, "memory": 1536, "storage": 0}
+
+    await resource_manager.deallocate_resources("backend_a")
+    assert resource_manager.allocated == {"cpu": 1, "memory": 512, "storage": 0}
+
+    resource_manager.reset()
+    assert resource_manager.allocated == {"cpu": 0, "memory": 0, "storage": 0}
+    assert resource_manager.resource_allocations == {}
+
+@pytest.mark.asyncio
+async def test_capacity_limits(resource_manager):
+    """Verificar que no se supera la capacidad total de la colmena."""
+    for i in range(4):
+        assert await resource_manager.allocate_resources(f"agent_{i}", {"cpu": 2, "memory": 512})
+    assert not await resource_manager.allocate_resources("agent_4", {"cpu": 1, "memory": 512}), \
+        "La asignación debe fallar al agotar la CPU"
+    assert resource_manager.allocated["cpu"] == 8
+
+def test_rebuild_ledger(resource_manager):
+    """Verificar que el ledger se reconstruye desde las asignaciones existentes."""
+    resource_manager.resource_allocations = {
+        "agent_1": {"cpu": 1, "memory": 256, "node": "node-0", "status": "allocated"},
+        "agent_2": {"cpu": 2, "memory": 768, "node": "node-0", "status": "allocated"}
+    }
+    resource_manager.rebuild_ledger()
+    assert resource_manager.allocated == {"cpu": 3, "memory": 1024, "storage": 0}
+    assert resource_manager.placement.free_capacity("node-0") == {"cpu": 5, "memory": 7168, "storage": 102400}
+
+@pytest.mark.asyncio
+async def test_allocation_reports_node():
+    """Verificar que cada asignación informa el nodo elegido."""
+    manager = ResourceManager(
+        nodes={"small": {"cpu": 1, "memory": 512}, "large": {"cpu": 8, "memory": 8192}}
+    )
+    await manager.allocate_resources("backend_a", {"cpu": 2, "memory": 1024})
+    status = await manager.get_resource_status("backend_a")
+    assert status["node"] == "large", "Debe elegir el único nodo con capacidad"
+
+    await manager.deallocate_resources("backend_a")
+    assert manager.placement.free_capacity("large") == {"cpu": 8, "memory": 8192, "storage": 0}
+
+@pytest.mark.asyncio
+async def test_storage_requirement():
+    """Verificar que el almacenamiento se exige como cualquier otra dimensión."""
+    manager = ResourceManager(nodes={"node-0": {"cpu": 8, "memory": 8192, "storage": 8192}})
+    assert await manager.allocate_resources("database_a", {}), "Debe usar los requerimientos de database"
+    status = await manager.get_resource_status("database_a")
+    assert status["storage"] == 5120
+    assert not await manager.allocate_resources("database_b", {}), \
+        "La segunda base de datos no cabe en el almacenamiento disponible"
+
+@pytest.mark.asyncio
+async def test_custom_dimension():
+    """Verificar dimensiones personalizadas declaradas por los nodos."""
+    manager = ResourceManager(nodes={
+        "cpu-node": {"cpu": 8, "memory": 8192},
+        "gpu-node": {"cpu": 8, "memory": 8192, "gpu": 1}
+    })
+    assert await manager.allocate_resources("backend_a", {"gpu": 1})
+    assert (await manager.get_resource_status("backend_a"))["node"] == "gpu-node"
+    assert not await manager.allocate_resources("backend_b", {"gpu": 1}), "No quedan GPUs"
+    assert not await manager.allocate_resources("backend_c", {"tpu": 1}), \
+        "Una dimensión desconocida no puede satisfacerse"
+
+@pytest.mark.asyncio
+async def test_allocate_batch(resource_manager):
+    """Verificar que un lote se asigna completo o no se asigna."""
+    success = await resource_manager.allocate_batch({
+        "backend_a": {"cpu": 4, "memory": 1024},
+        "backend_b": {"cpu": 4, "memory": 1024}
+    })
+    assert success, "El lote debe caber en la capacidad disponible"
+    assert resource_manager.allocated["cpu"] == 8
+
+    success = await resource_manager.allocate_batch({
+        "backend_c": {"cpu": 1, "memory": 512},
+        "backend_d": {"cpu": 1, "memory": 512}
+    })
+    assert not success, "El lote no cabe y no debe asignarse parcialmente"
+    assert "backend_c" not in resource_manager.resource_allocations
+
+    await resource_manager.deallocate_batch(["backend_a", "backend_b"])
+    assert resource_manager.resource_allocations == {}
+    assert resource_manager.allocated["cpu"] == 0
+
+@pytest.mark.asyncio
+async def test_reserve_commit_cancel(resource_manager):
+    """Verificar que una reserva retiene capacidad hasta confirmarse o cancelarse."""
+    reserved = await resource_manager.reserve("backend_a", {"cpu": 6, "memory": 1024})
+    assert reserved == {"cpu": 6, "memory": 1024, "node": "node-0"}
+    assert resource_manager.allocated["cpu"] == 6
+    assert await resource_manager.reserve("backend_a", {"cpu": 1}) is None, "No se puede reservar dos veces"
+    assert await resource_manager.reserve("backend_b", {"cpu": 4}) is None, "La reserva ocupa capacidad"
+    assert await resource_manager.get_resource_status("backend_a") is None
+
+    assert await resource_manager.commit("backend_a")
+    assert await resource_manager.get_resource_status("backend_a") == reserved
+    assert not await resource_manager.commit("backend_a")
+
+    await resource_manager.reserve("backend_b", {"cpu": 2, "memory": 512})
+    assert await resource_manager.cancel("backend_b")
+    assert "backend_b" not in resource_manager.resource_allocations
+    assert resource_manager.allocated["cpu"] == 6
@@ -0,0 +1,186 @@
+"""
+Tests for the shared resource ledger
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import uuid
+
+import numpy as np
+import pytest
+
+from smart_hive.services.agents.resource_manager import ResourceManager
+from smart_hive.services.agents.shared_ledger import SharedLedger
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+
+NODES = {"node-0": {"cpu": 8, "memory": 8192, "storage": 8192}}
+
+
+@pytest.fixture
+def ledger_name(tmp_path):
+    """Nombre único de segmento, eliminado al terminar."""
+    name = f"smart_hive_test_{uuid.uuid4().hex[:12]}"
+    yield name
+    ledger = SharedLedger.open(name, 1, 3, 16, str(tmp_path))
+    ledger.close(unlink=True)
+
+
+def open_manager(name, lock_dir):
+    ledger = SharedLedger.open(name, 1, 3, 16, str(lock_dir))
+    return ResourceManager(nodes=NODES, ledger=ledger)
+
+
+def test_index_add_get_remove(ledger_name, tmp_path):
+    """Verificar el índice de agentes en memoria compartida."""
+    ledger = SharedLedger.open(ledger_name, 1, 3, 16, str(tmp_path))
+    with ledger.lock():
+        for i in range(16):
+            assert ledger.add(f"backend_{i}", "backend", 0, np.array([1.0, 2.0, 3.0]))
+        assert not ledger.add("backend_extra", "backend", 0, np.zeros(3)), "El índice está lleno"
+        assert not ledger.add("backend_3", "backend", 0, np.zeros(3)), "No se indexa dos veces"
+
+        agent_type, node, vector = ledger.get("backend_3")
+        assert (agent_type, node, vector.tolist()) == ("backend", 0, [1.0, 2.0, 3.0])
+        for i in range(0, 16, 2):
+            assert ledger.remove(f"backend_{i}")
+        assert not ledger.remove("backend_0")
+        assert len(ledger) == 8
+        assert all(f"backend_{i}" in ledger for i in range(1, 16, 2))
+        assert ledger.add("backend_extra", "backend", 0, np.zeros(3)), "Los huecos se reutilizan"
+    ledger.close()
+
+    with pytest.raises(ValueError, match="another layout"):
+        SharedLedger.open(ledger_name, 2, 3, 16, str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_managers_share_capacity(ledger_name, tmp_path):
+    """Verificar que dos gestores comparten la capacidad y los identificadores."""
+    first, second = open_manager(ledger_name, tmp_path), open_manager(ledger_name, tmp_path)
+
+    assert await first.allocate_resources("backend_a", {"cpu": 6, "memory": 1024})
+    assert not await second.allocate_resources("backend_b", {"cpu": 4, "memory": 512}), \
+        "La capacidad es global"
+    assert not await second.allocate_resources("backend_a", {"cpu": 1}), "Los ids son únicos entre procesos"
+    assert await second.allocate_batch({"backend_b": {"cpu": 1}, "qa_c": {"cpu": 1}})
+    assert second.placement.free_capacity("node-0")["cpu"] == 0
+
+    assert await first.deallocate_resources("backend_a")
+    assert await second.allocate_resources("backend_d", {"cpu": 6, "memory": 512})
+    assert first.allocated["cpu"] == 0 and second.allocated["cpu"] == 8
+
+    orchestrator = SmartHiveOrchestrator(resource_manager=first)
+    record = await orchestrator.get_agent("backend_d")
+    assert (record.type, record.agent, record.resources["cpu"]) == ("backend", None, 6)
+
+    second.reset()
+    assert first.placement.free_capacity("node-0")["cpu"] == 8
+    first.ledger.close()
+    second.ledger.close()
+
+
+@pytest.mark.asyncio
+async def test_type_limit_is_global(ledger_name, tmp_path):
+    """Verificar que el límite de instancias por tipo se aplica entre procesos."""
+    first, second = open_manager(ledger_name, tmp_path), open_manager(ledger_name, tmp_path)
+
+    assert await first.allocate_batch({f"qa_{i}": {"cpu": 0.5} for i in range(3)})
+    assert await second.allocate_resources("qa_3", {"cpu": 0.5})
+    assert not await second.allocate_batch({"qa_4": {"cpu": 0.5}, "qa_5": {"cpu": 0.5}})
+    assert await second.allocate_resources("qa_4", {"cpu": 0.5})
+    assert not await first.allocate_resources("qa_5", {"cpu": 0.5}), "El límite es global"
+
+    assert await second.deallocate_resources("qa_3")
+    assert await first.allocate_resources("qa_5", {"cpu": 0.5})
+    first.ledger.close()
+    second.ledger.close()
+
+
+@pytest.mark.asyncio
+async def test_contended_lock_leaves_loop_running(ledger_name, tmp_path):
+    """Verificar que esperar el lock de otro proceso no bloquea el bucle de eventos."""
+    holder = SharedLedger.open(ledger_name, 1, 3, 16, str(tmp_path))
+    waiter = SharedLedger.open(ledger_name, 1, 3, 16, str(tmp_path))
+
+    async def take():
+        async with waiter.alock():
+            pass
+
+    with holder.lock():
+        task = asyncio.create_task(take())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+    await asyncio.wait_for(task, 5)
+    holder.close()
+    waiter.close()
+
+
+def test_one_process_per_shard(ledger_name, tmp_path):
+    """Verificar que dos procesos vivos no pueden servir el mismo shard."""
+    ledger = SharedLedger.open(ledger_name, 1, 3, 16, str(tmp_path))
+    script = textwrap.dedent(f"""
+        import sys
+        from smart_hive.services.agents.shared_ledger import SharedLedger
+
+        ledger = SharedLedger.open({ledger_name!r}, 1, 3, 16, {str(tmp_path)!r})
+        ledger.join("a")
+        print("joined", flush=True)
+        sys.stdin.read()
+        ledger.close()
+    """)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    worker = subprocess.Popen(
+        [sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True
+    )
+    try:
+        assert worker.stdout.readline().strip() == "joined"
+        with pytest.raises(RuntimeError, match="already serves shard 'a'"):
+            ledger.join("a")
+        ledger.join("b")
+    finally:
+        worker.communicate("", timeout=60)
+
+    # El shard de un proceso terminado queda libre
+    ledger.join("a")
+    ledger.leave()
+    ledger.close()
+
+
+def test_processes_admit_against_one_capacity(ledger_name, tmp_path):
+    """Verificar que varios procesos no superan la capacidad global."""
+    script = textwrap.dedent(f"""
+        import asyncio
+        from smart_hive.services.agents.resource_manager import ResourceManager
+        from smart_hive.services.agents.shared_ledger import SharedLedger
+
+        async def main(worker):
+            ledger = SharedLedger.open({ledger_name!r}, 1, 3, 16, {str(tmp_path)!r})
+            manager = ResourceManager(nodes={NODES!r}, ledger=ledger)
+            granted = 0
+            for i in range(4):
+                granted += await manager.allocate_resources(f"backend_w{{worker}}_{{i}}", {{"cpu": 2, "memory": 256}})
+            ledger.close()
+            print(granted)
+
+        import sys
+        asyncio.run(main(sys.argv[1]))
+    """)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    workers = [
+        subprocess.Popen([sys.executable, "-c", script, str(worker)], stdout=subprocess.PIPE, env=env, text=True)
+        for worker in range(4)
+    ]
+    granted = [int(worker.communicate(timeout=60)[0]) for worker in workers]
+    assert sum(granted) == 4
+
+    ledger = SharedLedger.open(ledger_name, 1, 3, 16, str(tmp_path))
+    with ledger.lock():
+        assert len(ledger) == 4
+        assert ledger.usage[0, 0] == 8
+        assert ledger.sweep() == 4, "Los workers terminados no liberaron su capacidad"
+        assert len(ledger) == 0 and ledger.count("backend") == 0
+        assert ledger.usage[0, 0] == 0
+    ledger.close()
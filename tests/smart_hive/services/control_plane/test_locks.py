@@ -0,0 +1,88 @@
+"""
+Tests for orchestrator concurrency
+"""
+
+import asyncio
+
+import pytest
+
+from smart_hive.services.control_plane.locks import ShardedLocks, TypeCounters
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+
+
+def test_type_counters():
+    """Test slots are only claimed within the limit and released back."""
+    counters = TypeCounters({"qa": 4})
+    assert not counters.try_acquire("qa", 2, 5)
+    assert counters.try_acquire("qa", 1, 5)
+    assert not counters.try_acquire("qa", 1, 5)
+    counters.release("qa", 5)
+    assert counters.counts == {}
+
+
+@pytest.mark.asyncio
+async def test_sharded_locks_take_overlapping_sets():
+    """Test holders of overlapping key sets neither deadlock nor overlap."""
+    locks = ShardedLocks(4)
+    inside = []
+
+    async def hold(*keys):
+        async with locks.hold(*keys):
+            inside.append(keys)
+            await asyncio.sleep(0)
+            assert inside[-1] == keys
+
+    await asyncio.wait_for(
+        asyncio.gather(*(hold(f"a{i}", f"b{i}", "c") for i in range(20)), hold("c", "a1")), timeout=5
+    )
+    assert len(inside) == 21
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creates_keep_invariants(monkeypatch):
+    """Test concurrent creates and destroys run in parallel without breaking any invariant."""
+    orchestrator = SmartHiveOrchestrator()
+    manager = orchestrator.resource_manager
+    active = {"now": 0, "max": 0}
+    save_state, reserve = orchestrator.state_manager.save_state, manager.reserve
+
+    async def slow_save_state(agent_id, state):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return await save_state(agent_id, state)
+
+    async def yielding_reserve(agent_id, requirements):
+        await asyncio.sleep(0)
+        return await reserve(agent_id, requirements)
+
+    monkeypatch.setattr(orchestrator.state_manager, "save_state", slow_save_state)
+    monkeypatch.setattr(manager, "reserve", yielding_reserve)
+
+    async def create(name, agent_type="qa"):
+        try:
+            return await orchestrator.create_agent(name, agent_type, {"cpu": 1, "memory": 256})
+        except ValueError:
+            return None
+
+    same_name = await asyncio.gather(*(create("dup", "backend") for _ in range(20)))
+    assert [agent_id for agent_id in same_name if agent_id] == ["backend_dup"]
+
+    same_type = await asyncio.gather(*(create(f"agent{i}") for i in range(30)))
+    assert len([agent_id for agent_id in same_type if agent_id]) == 5
+    assert active["max"] > 1, "Independent creates must overlap"
+
+    # Churn: destroy and recreate while new creates compete for the freed slots
+    created = [agent_id for agent_id in same_type if agent_id]
+    await asyncio.gather(
+        *(orchestrator.destroy_agent(agent_id) for agent_id in created),
+        *(create(f"late{i}") for i in range(10))
+    )
+
+    snapshot = orchestrator.snapshot
+    assert orchestrator.type_counters.counts == snapshot.type_counts()
+    assert snapshot.type_counts().get("qa", 0) <= 5
+    assert manager.reservations == {}
+    assert set(manager.resource_allocations) == set(snapshot)
+    assert manager.allocated["cpu"] == len(snapshot) <= 8
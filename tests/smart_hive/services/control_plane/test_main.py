@@ -2,15 +2,38 @@
 Tests for SmartHive Control Plane
 """
 
+import asyncio
+import json
+import time
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
+from smart_hive.configs.observability_config import ObservabilityConfig
+from smart_hive.configs.state_config import StateConfig
 from smart_hive.services.control_plane.main import (
     SmartHiveOrchestrator,
     app,
+    create_app,
     orchestrator,
     set_orchestrator
 )
+from smart_hive.services.control_plane.provisioning import QueueFull
+from smart_hive.services.control_plane.state_manager import StateManager
+from smart_hive.utils.tracing import configure_tracing
+
+async def spin(done: asyncio.Event):
+    """
+    Keep the event loop busy in Python code until `done` is set. Each burst
+    outlasts the interpreter switch interval so the sampler gets to run
+    while the loop is inside it.
+    """
+    while not done.is_set():
+        burst = time.perf_counter()
+        while time.perf_counter() - burst < 0.02:
+            pass
+        await asyncio.sleep(0)
 
 @pytest.fixture
 def client(request):
@@ -80,6 +103,32 @@ class TestControlPlane:
         )
         assert response.status_code == 422
 
+    async def test_create_agent_without_wait(self, monkeypatch):
+        """Test queued creation returns 202 with a job to poll, and 429 when the queue is full."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        with TestClient(app) as client:
+            response = client.post("/agents/create", params={"wait": "false"}, json={"name": "agent1", "agent_type": "backend"})
+            assert response.status_code == 202
+            job = response.json()
+            assert job["status"] == "queued"
+            assert response.headers["location"] == f"/jobs/{job['job_id']}"
+
+            for _ in range(100):
+                job = client.get(f"/jobs/{job['job_id']}").json()
+                if job["status"] == "succeeded":
+                    break
+            assert job["agent_id"] == "backend_agent1"
+            assert client.get("/agents/backend_agent1").status_code == 200
+            assert client.get("/jobs/unknown").status_code == 404
+
+            def full(*args):
+                raise QueueFull("Provisioning queue is full (1 jobs)")
+            monkeypatch.setattr(orchestrator.provisioning, "submit", full)
+            response = client.post("/agents/create", params={"wait": "false"}, json={"name": "agent2", "agent_type": "backend"})
+            assert response.status_code == 429
+            assert response.headers["retry-after"] == "1"
+
     async def test_destroy_agent(self, client):
         """Test agent destruction."""
         orchestrator = await SmartHiveOrchestrator.create()
@@ -104,6 +153,24 @@ class TestControlPlane:
         response = client.get(f"/agents/{agent_id}")
         assert response.status_code == 404
 
+    async def test_destroy_agent_without_wait(self, client, monkeypatch):
+        """Test destroying without waiting returns 202 and leaves the agent terminating."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        # Only record the teardown, so the reaper cannot finish it before the agent is read back
+        monkeypatch.setattr(
+            orchestrator.reaper, "schedule", lambda agent_id: orchestrator.reaper.pending.setdefault(agent_id, (0, 0.0))
+        )
+        client.post("/agents/create", json={"name": "agent1", "agent_type": "backend"})
+
+        response = client.delete("/agents/backend_agent1", params={"wait": "false"})
+        assert response.status_code == 202
+        assert response.json()["status"] == "terminating"
+        assert client.get("/agents/backend_agent1").json()["status"] == "terminating"
+
+        await orchestrator.reaper.run_once()
+        assert client.get("/agents/backend_agent1").status_code == 404
+
     async def test_destroy_nonexistent_agent(self, client):
         """Test destroying a nonexistent agent."""
         orchestrator = await SmartHiveOrchestrator.create()
@@ -163,3 +230,234 @@ class TestControlPlane:
         assert len(data) == len(agents)
         for agent in data:
             assert agent["agent_id"] in created_agents
+
+    async def test_list_agents_by_type(self, client):
+        """Test listing agents filtered by type."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        for agent in [
+            {"name": "agent1", "agent_type": "backend"},
+            {"name": "agent2", "agent_type": "frontend"}
+        ]:
+            response = client.post("/agents/create", json=agent)
+            assert response.status_code == 200
+
+        response = client.get("/agents", params={"type": "frontend"})
+        assert response.status_code == 200
+        assert [agent["agent_id"] for agent in response.json()] == ["frontend_agent2"]
+
+        response = client.get("/agents", params={"type": "qa"})
+        assert response.json() == []
+
+    async def test_type_index(self, client):
+        """Test the per-type index follows creates and destroys."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        await orchestrator.create_agent("agent1", "qa")
+        await orchestrator.create_agent("agent2", "qa")
+        assert orchestrator.snapshot.type_counts()["qa"] == 2
+        assert list(orchestrator.snapshot.ids("qa")) == ["qa_agent1", "qa_agent2"]
+
+        await orchestrator.destroy_agent("qa_agent1")
+        assert orchestrator.snapshot.type_counts()["qa"] == 1
+        assert list(orchestrator.snapshot.ids("qa")) == ["qa_agent2"]
+
+        await orchestrator.reset()
+        assert orchestrator.snapshot.type_counts() == {}
+
+    async def test_max_instances(self, client):
+        """Test the per-type instance limit."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        await orchestrator.create_agent("rm", "resource_manager")
+        with pytest.raises(ValueError, match="Maximum number"):
+            await orchestrator.create_agent("rm2", "resource_manager")
+
+    async def test_create_agents_batch(self, client):
+        """Test creating and destroying agents in batches."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        response = client.post(
+            "/agents/batch",
+            json={"agents": [
+                {"name": "agent1", "agent_type": "backend"},
+                {"name": "agent2", "agent_type": "frontend"}
+            ]}
+        )
+        assert response.status_code == 200
+        agent_ids = [agent["agent_id"] for agent in response.json()]
+        assert agent_ids == ["backend_agent1", "frontend_agent2"]
+        assert len(orchestrator.state_manager.states) == 2
+
+        response = client.request("DELETE", "/agents/batch", json={"agent_ids": agent_ids})
+        assert response.status_code == 200
+        assert [agent["status"] for agent in response.json()] == ["destroyed", "destroyed"]
+        assert orchestrator.snapshot == {}
+        assert orchestrator.resource_manager.resource_allocations == {}
+
+    async def test_create_agents_batch_rollback(self, client):
+        """Test a batch that does not fit is not created at all."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        response = client.post(
+            "/agents/batch",
+            json={"agents": [
+                {"name": f"agent{i}", "agent_type": "backend", "requirements": {"cpu": 2, "memory": 1024}}
+                for i in range(5)
+            ]}
+        )
+        assert response.status_code == 400
+        assert orchestrator.snapshot == {}
+        assert orchestrator.resource_manager.resource_allocations == {}
+        assert orchestrator.state_manager.states == {}
+
+    async def test_create_agents_batch_duplicates(self, client):
+        """Test a batch with duplicate agents is rejected."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        response = client.post(
+            "/agents/batch",
+            json={"agents": [
+                {"name": "agent1", "agent_type": "backend"},
+                {"name": "agent1", "agent_type": "backend"}
+            ]}
+        )
+        assert response.status_code == 400
+
+    async def test_destroy_agents_batch_missing(self, client):
+        """Test a destroy batch with an unknown agent destroys nothing."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        await orchestrator.create_agent("agent1", "backend")
+        response = client.request(
+            "DELETE", "/agents/batch", json={"agent_ids": ["backend_agent1", "nonexistent"]}
+        )
+        assert response.status_code == 404
+        assert "backend_agent1" in orchestrator.snapshot
+
+    async def test_list_agents_paginated(self, client):
+        """Test cursor pagination over the agent list."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        for name in ["c", "a", "d", "b"]:
+            await orchestrator.create_agent(name, "qa", {"cpu": 1, "memory": 256})
+
+        response = client.get("/agents", params={"limit": 3})
+        assert response.status_code == 200
+        assert [agent["agent_id"] for agent in response.json()] == ["qa_a", "qa_b", "qa_c"]
+        cursor = response.headers["X-Next-Cursor"]
+        assert cursor == "qa_c"
+
+        response = client.get("/agents", params={"limit": 3, "after": cursor})
+        assert [agent["agent_id"] for agent in response.json()] == ["qa_d"]
+        assert "X-Next-Cursor" not in response.headers
+
+        response = client.get("/agents", params={"limit": 2, "after": "qa_b"})
+        assert [agent["agent_id"] for agent in response.json()] == ["qa_c", "qa_d"]
+        assert "X-Next-Cursor" not in response.headers, "a full last page has no next page"
+
+    async def test_list_agents_ndjson(self, client):
+        """Test streaming the agent list as NDJSON."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        await orchestrator.create_agent("agent1", "backend")
+        await orchestrator.create_agent("agent2", "frontend")
+
+        response = client.get("/agents", headers={"Accept": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [agent["agent_id"] for agent in lines] == ["backend_agent1", "frontend_agent2"]
+        assert lines[0]["status"] == "running"
+        assert "X-Next-Cursor" not in response.headers
+
+        response = client.get("/agents", params={"limit": 1}, headers={"Accept": "application/x-ndjson"})
+        assert [json.loads(line)["agent_id"] for line in response.text.splitlines()] == ["backend_agent1"]
+        assert response.headers["X-Next-Cursor"] == "backend_agent1"
+
+    async def test_restart_recovery(self, client, tmp_path):
+        """Test a restarted orchestrator recovers agents, index and ledger."""
+        config = StateConfig(state_dir=str(tmp_path), backend="journal")
+        orchestrator = await SmartHiveOrchestrator.create()
+        orchestrator.state_manager = StateManager(config=config)
+        await orchestrator.create_agent("agent1", "backend")
+        await orchestrator.create_agent("agent2", "database")
+        await orchestrator.create_agent("agent3", "qa")
+        await orchestrator.destroy_agent("qa_agent3")
+        await orchestrator.state_manager.close()
+
+        restarted = await SmartHiveOrchestrator.create()
+        restarted.state_manager = StateManager(config=config)
+        await restarted._initialize_from_state()
+        assert sorted(restarted.snapshot) == ["backend_agent1", "database_agent2"]
+        assert restarted.snapshot.type_counts() == {"backend": 1, "database": 1}
+        assert restarted.resource_manager.allocated == {"cpu": 4, "memory": 2048, "storage": 5120}
+        assert restarted.snapshot["backend_agent1"]["agent"].service_name == "agent1"
+        agent = await restarted.get_agent("database_agent2")
+        assert agent["resources"]["node"] == "node-0"
+        await restarted.state_manager.close()
+
+    async def test_metrics(self, client):
+        """Test /metrics exposes endpoint and stage latencies, rejections and gauges."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        client.post("/agents/create", json={"name": "agent1", "agent_type": "backend"})
+        client.post("/agents/create", json={"name": "agent2", "agent_type": "backend", "requirements": {"cpu": 64}})
+        client.get("/agents/backend_agent1")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'smart_hive_http_request_duration_seconds_count{method="GET",route="/agents/{agent_id}",status="200"}' in text
+        assert 'smart_hive_orchestrator_stage_duration_seconds_bucket{operation="create_agent",stage="allocate",le="+Inf"}' in text
+        assert 'smart_hive_agent_rejections_total{reason="resources"}' in text
+        assert 'smart_hive_allocation_rejections_total{reason="capacity"}' in text
+        assert 'smart_hive_agents{agent_type="backend"} 1' in text
+        assert 'smart_hive_free_capacity{node="node-0",resource="cpu"} 6.0' in text
+
+    async def test_metrics_gauges_per_app(self):
+        """Test each app reports the fleet gauges of its own orchestrator."""
+        orchestrators = [SmartHiveOrchestrator(), SmartHiveOrchestrator()]
+        await orchestrators[0].create_agent("agent1", "backend")
+        for count, orchestrator in zip((1, 0), orchestrators):
+            text = TestClient(create_app(ObservabilityConfig(), orchestrator=orchestrator)).get("/metrics").text
+            assert ('smart_hive_agents{agent_type="backend"} 1' in text) == bool(count)
+        await orchestrators[0].reset()
+
+    async def test_tracing_spans(self, client, tmp_path):
+        """Test a create request exports nested spans for each manager call."""
+        orchestrator = await SmartHiveOrchestrator.create()
+        set_orchestrator(orchestrator)
+        trace_file = tmp_path / "spans.jsonl"
+        configure_tracing(str(trace_file))
+        try:
+            response = client.post("/agents/create", json={"name": "agent1", "agent_type": "backend"})
+        finally:
+            configure_tracing(None)
+        assert response.status_code == 200
+
+        spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        by_name = {span["name"]: span for span in spans}
+        root = by_name["POST /agents/create"]
+        create = by_name["SmartHiveOrchestrator.create_agent"]
+        assert create["parentSpanId"] == root["spanId"]
+        for name in ("ResourceManager.reserve", "AgentService.__init__", "StateManager.save_state", "ResourceManager.commit"):
+            assert by_name[name]["parentSpanId"] == create["spanId"]
+        assert {span["traceId"] for span in spans} == {root["traceId"]}
+
+    async def test_profile_endpoint(self):
+        """Test the profiler endpoint is opt-in and returns collapsed stacks."""
+        assert TestClient(create_app(ObservabilityConfig())).get("/debug/profile").status_code == 404
+
+        profiled = create_app(ObservabilityConfig(profiler_enabled=True, profiler_interval=0.001))
+        done = asyncio.Event()
+        busy = asyncio.create_task(spin(done))
+        transport = httpx.ASGITransport(app=profiled)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/debug/profile", params={"seconds": 0.05})
+        done.set()
+        await busy
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+        assert "spin (test_main.py" in response.text
@@ -0,0 +1,67 @@
+"""
+Tests for asynchronous agent provisioning
+"""
+
+import pytest
+
+from smart_hive.configs.lifecycle_config import LifecycleConfig
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+from smart_hive.services.control_plane.provisioning import JobStatus, QueueFull
+
+
+def orchestrator_with(**config):
+    return SmartHiveOrchestrator(lifecycle=LifecycleConfig(**config))
+
+
+@pytest.mark.asyncio
+async def test_jobs_report_their_outcome():
+    """Test queued jobs are run by the workers and report success or failure."""
+    orchestrator = orchestrator_with(provisioning_workers=2)
+    provisioning = orchestrator.provisioning
+    jobs = [
+        provisioning.submit("agent1", "backend"),
+        provisioning.submit("agent2", "qa", {"cpu": 1, "memory": 256}),
+        provisioning.submit("agent1", "backend")
+    ]
+    assert [job.status for job in jobs] == [JobStatus.QUEUED] * 3
+    assert provisioning.depth == 3
+
+    await provisioning.join()
+    assert [job.status for job in jobs] == [JobStatus.SUCCEEDED, JobStatus.SUCCEEDED, JobStatus.FAILED]
+    assert jobs[0].agent_id == "backend_agent1" and jobs[1].agent_id == "qa_agent2"
+    assert "already exists" in jobs[2].error
+    assert all(job.started and job.finished for job in jobs)
+    assert provisioning.get(jobs[1].job_id) is jobs[1]
+    await orchestrator.reset()
+
+
+@pytest.mark.asyncio
+async def test_backpressure_at_high_water_mark():
+    """Test submissions are refused once the queue holds its high-water mark."""
+    orchestrator = orchestrator_with(provisioning_workers=1, provisioning_queue_size=2)
+    provisioning = orchestrator.provisioning
+    provisioning.submit("agent1", "backend")
+    provisioning.submit("agent2", "backend")
+    with pytest.raises(QueueFull):
+        provisioning.submit("agent3", "backend")
+    assert len(provisioning.jobs) == 2
+
+    await provisioning.join()
+    assert provisioning.submit("agent3", "backend").status is JobStatus.QUEUED
+    await provisioning.join()
+    assert sorted(orchestrator.snapshot) == ["backend_agent1", "backend_agent2", "backend_agent3"]
+    await orchestrator.reset()
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_dropped_past_history():
+    """Test only the most recent finished jobs are kept for polling."""
+    orchestrator = orchestrator_with(provisioning_job_history=1)
+    provisioning = orchestrator.provisioning
+    first = provisioning.submit("agent1", "backend")
+    await provisioning.join()
+    second = provisioning.submit("agent2", "backend")
+    await provisioning.join()
+    assert provisioning.get(first.job_id) is None
+    assert provisioning.get(second.job_id) is second
+    await orchestrator.reset()
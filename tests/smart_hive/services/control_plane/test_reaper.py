@@ -0,0 +1,131 @@
+"""
+Tests for agent teardown and the reaper
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from smart_hive.configs.lifecycle_config import LifecycleConfig
+from smart_hive.configs.state_config import StateConfig
+from smart_hive.services.control_plane import main
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+from smart_hive.services.control_plane.records import AgentStatus
+from smart_hive.services.control_plane.state_manager import StateManager
+
+
+@pytest.fixture
+def orchestrator():
+    return SmartHiveOrchestrator(lifecycle=LifecycleConfig(reaper_base_backoff=0.05))
+
+
+async def reaped(orchestrator, agent_id):
+    """Wait for the background reaper to remove an agent."""
+    try:
+        while agent_id in orchestrator.snapshot:
+            await asyncio.sleep(0.005)
+    finally:
+        await orchestrator.reaper.close()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_steps_run_after_a_failure(orchestrator, monkeypatch, caplog):
+    """Test every teardown step runs even if an earlier one fails, and the failure is logged."""
+    agent_id = await orchestrator.create_agent("agent1", "backend")
+
+    async def unavailable(subscriber_id):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(main.get_message_queue(), "remove_subscriber", unavailable)
+    assert await orchestrator.destroy_agent(agent_id)
+    assert orchestrator.snapshot[agent_id].status is AgentStatus.TERMINATING
+    assert orchestrator.resource_manager.resource_allocations == {}
+    assert orchestrator.state_manager.states[agent_id].status is AgentStatus.TERMINATING
+    assert str(caplog.records[0].exc_info[1]) == "queue unavailable"
+    await orchestrator.reaper.close()
+
+
+@pytest.mark.asyncio
+async def test_destroy_without_wait(orchestrator):
+    """Test an agent destroyed without waiting stays terminating until reaped."""
+    agent_id = await orchestrator.create_agent("agent1", "qa")
+    assert await orchestrator.destroy_agent(agent_id, wait=False)
+
+    record = orchestrator.snapshot[agent_id]
+    assert record.status is AgentStatus.TERMINATING
+    assert agent_id in orchestrator.resource_manager.resource_allocations
+    assert orchestrator.type_counters.counts == {"qa": 1}
+    with pytest.raises(ValueError, match="already exists"):
+        await orchestrator.create_agent("agent1", "qa")
+
+    await asyncio.wait_for(reaped(orchestrator, agent_id), timeout=5)
+    assert orchestrator.resource_manager.resource_allocations == {}
+    assert orchestrator.state_manager.states == {}
+    assert orchestrator.type_counters.counts == {}
+    assert orchestrator.reaper.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_terminating_survives_restart(tmp_path):
+    """Test an agent destroyed without waiting is reloaded as terminating and reaped after a restart."""
+    config = StateConfig(state_dir=str(tmp_path), durability="sync")
+    orchestrator = SmartHiveOrchestrator(state_manager=StateManager(config=config))
+    agent_id = await orchestrator.create_agent("agent1", "qa")
+    assert await orchestrator.destroy_agent(agent_id, wait=False)
+    await orchestrator.reaper.close()
+    await orchestrator.state_manager.close()
+
+    restarted = SmartHiveOrchestrator(state_manager=StateManager(config=config))
+    await restarted._initialize_from_state()
+    assert restarted.snapshot[agent_id].status is AgentStatus.TERMINATING
+    assert agent_id in restarted.reaper.pending
+
+    await asyncio.wait_for(reaped(restarted, agent_id), timeout=5)
+    assert restarted.state_manager.states == {}
+    await restarted.state_manager.close()
+
+    reloaded = SmartHiveOrchestrator(state_manager=StateManager(config=config))
+    await reloaded._initialize_from_state()
+    assert agent_id not in reloaded.snapshot
+    await reloaded.state_manager.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_cleanup_is_retried_with_backoff(orchestrator, monkeypatch):
+    """Test a failed teardown leaves the agent terminating and is retried after a backoff."""
+    agent_id = await orchestrator.create_agent("agent1", "backend")
+    deallocate_batch = orchestrator.resource_manager.deallocate_batch
+    failures = {"left": 2}
+
+    async def flaky_deallocate_batch(agent_ids):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("ledger unavailable")
+        return await deallocate_batch(agent_ids)
+
+    monkeypatch.setattr(orchestrator.resource_manager, "deallocate_batch", flaky_deallocate_batch)
+    start = time.monotonic()
+    assert await orchestrator.destroy_agent(agent_id)
+    assert orchestrator.snapshot[agent_id].status is AgentStatus.TERMINATING
+    assert orchestrator.reaper.pending[agent_id][0] == 0
+
+    await asyncio.wait_for(reaped(orchestrator, agent_id), timeout=5)
+    # First retry at once, then after a 0.05 second backoff
+    assert failures["left"] == 0
+    assert time.monotonic() - start >= 0.05
+    assert orchestrator.resource_manager.resource_allocations == {}
+    assert orchestrator.reaper.pending == {}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_releases_orphans(orchestrator):
+    """Test allocations and states of agents missing from the fleet are released."""
+    await orchestrator.create_agent("agent1", "backend")
+    await orchestrator.resource_manager.allocate_resources("resource_manager", {"cpu": 1})
+    await orchestrator.resource_manager.allocate_resources("backend_ghost", {"cpu": 1})
+    await orchestrator.state_manager.save_state("qa_ghost", {"type": "qa"})
+
+    assert await orchestrator.reconcile() == 2
+    assert set(orchestrator.resource_manager.resource_allocations) == {"backend_agent1", "resource_manager"}
+    assert set(orchestrator.state_manager.states) == {"backend_agent1"}
@@ -0,0 +1,60 @@
+"""
+Tests for AgentRecord
+"""
+
+import json
+
+import pytest
+
+from smart_hive.configs.state_config import StateConfig
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+from smart_hive.services.control_plane.records import AgentRecord, AgentStatus, AgentType
+from smart_hive.services.control_plane.state_manager import StateManager
+from smart_hive.services.control_plane.storage import _encode_default
+
+LAYOUT = ("cpu", "memory", "storage")
+
+
+def test_record_layout_and_mapping_access():
+    """Test resources are kept as a vector and rendered back as a dict."""
+    record = AgentRecord.from_allocation(
+        "database_db1", "database", None, {"cpu": 2, "memory": 1024, "storage": 5120, "node": "node-0"}, LAYOUT
+    )
+    assert not hasattr(record, "__dict__")
+    assert record.vector == (2, 1024, 5120)
+    assert record.type is AgentType.DATABASE
+    assert record.status is AgentStatus.RUNNING
+    assert record["resources"] == {"cpu": 2, "memory": 1024, "storage": 5120, "node": "node-0"}
+    assert record["status"] == "running"
+    with pytest.raises(KeyError):
+        record["missing"]
+
+
+def test_record_state_round_trip():
+    """Test the persisted form matches the old state dicts and loads back."""
+    record = AgentRecord.from_allocation("qa_t1", "qa", object(), {"cpu": 1, "memory": 512, "node": "n"}, LAYOUT)
+    state = json.loads(json.dumps(record, default=_encode_default))
+    assert state == {"agent": None, "status": "running", "type": "qa", "resources": {"cpu": 1, "memory": 512, "node": "n"}}
+
+    restored = AgentRecord.from_state("qa_t1", state, LAYOUT)
+    assert restored.vector == record.vector
+    assert restored.node == "n"
+
+
+@pytest.mark.asyncio
+async def test_records_shared_with_state_store(tmp_path):
+    """Test the orchestrator and the state store hold the same record, also after a restart."""
+    config = StateConfig(state_dir=str(tmp_path), durability="sync")
+    orchestrator = SmartHiveOrchestrator(state_manager=StateManager(config=config))
+    agent_id = await orchestrator.create_agent("agent1", "backend")
+    assert orchestrator.state_manager.states[agent_id] is orchestrator.snapshot[agent_id]
+    assert await orchestrator.get_agent(agent_id) is orchestrator.snapshot[agent_id]
+    await orchestrator.state_manager.close()
+
+    restarted = SmartHiveOrchestrator(state_manager=StateManager(config=config))
+    await restarted._initialize_from_state()
+    record = restarted.snapshot[agent_id]
+    assert isinstance(record, AgentRecord)
+    assert restarted.state_manager.states[agent_id] is record
+    assert record.resources == {"cpu": 2, "memory": 1024, "node": "node-0"}
+    await restarted.state_manager.close()
@@ -0,0 +1,220 @@
+"""
+Tests for the sharded control plane
+"""
+
+import httpx
+import pytest
+
+from smart_hive.configs.observability_config import ObservabilityConfig
+from smart_hive.services.agents.resource_manager import ResourceManager
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator, create_app
+from smart_hive.services.control_plane.sharding import HashRing, ShardRouter
+
+
+def test_ring_moves_about_one_in_n_keys():
+    """Test adding a fifth shard to four moves about a fifth of the keys, all to the new shard."""
+    keys = [f"backend_agent{i}" for i in range(10000)]
+    ring = HashRing(["a", "b", "c", "d"])
+    before = {key: ring.owner(key) for key in keys}
+    assert HashRing(["d", "c", "b", "a"]).owner(keys[0]) == before[keys[0]]
+
+    ring.add("e")
+    moved = [key for key in keys if ring.owner(key) != before[key]]
+    assert all(ring.owner(key) == "e" for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.25
+
+    ring.remove("e")
+    assert all(ring.owner(key) == before[key] for key in keys)
+
+
+def test_empty_ring():
+    """Test an empty ring owns no keys."""
+    with pytest.raises(LookupError):
+        HashRing().owner("backend_agent1")
+
+
+@pytest.fixture
+def shards():
+    """Three shards in one process, forwarding to each other over ASGI transports."""
+    peers = {shard: f"http://{shard}" for shard in ("a", "b", "c")}
+    orchestrators = {shard: SmartHiveOrchestrator() for shard in peers}
+    apps = {}
+    transports = {shard: httpx.ASGITransport(app=lambda *args, shard=shard: apps[shard](*args)) for shard in peers}
+    for shard in peers:
+        apps[shard] = create_app(
+            ObservabilityConfig(),
+            orchestrator=orchestrators[shard],
+            shards=ShardRouter(shard, peers, transports=transports)
+        )
+    return apps, orchestrators
+
+
+def client_of(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_requests_are_forwarded_to_the_owner(shards):
+    """Test any shard creates, reads and destroys an agent on the shard owning it."""
+    apps, orchestrators = shards
+    router = apps["a"].state.shards
+    async with client_of(apps["a"]) as client:
+        for i in range(8):
+            response = await client.post("/agents/create", json={"name": f"agent{i}", "agent_type": "backend"})
+            assert response.status_code == 200
+
+        owners = {f"backend_agent{i}": router.owner(f"backend_agent{i}") for i in range(8)}
+        assert len(set(owners.values())) > 1
+        for agent_id, owner in owners.items():
+            assert all((agent_id in orchestrators[shard].snapshot) == (shard == owner) for shard in orchestrators)
+
+        agent_id = next(agent_id for agent_id, owner in owners.items() if owner != "a")
+        async with client_of(apps[owners[agent_id]]) as owner:
+            assert (await owner.get(f"/agents/{agent_id}")).status_code == 200
+        assert (await client.get(f"/agents/{agent_id}")).json()["status"] == "running"
+        assert (await client.delete(f"/agents/{agent_id}")).status_code == 200
+        assert agent_id not in orchestrators[owners[agent_id]].snapshot
+        assert (await client.get(f"/agents/{agent_id}")).status_code == 404
+
+    for orchestrator in orchestrators.values():
+        await orchestrator.reset()
+
+
+@pytest.mark.asyncio
+async def test_agents_are_found_after_the_ring_changes(shards):
+    """Test agents left on their shard by a ring change are still read and destroyed from any shard."""
+    apps, orchestrators = shards
+    async with client_of(apps["a"]) as client:
+        for i in range(8):
+            await client.post("/agents/create", json={"name": f"agent{i}", "agent_type": "backend"})
+        held = {
+            shard: [f"backend_agent{i}" for i in range(8) if f"backend_agent{i}" in orchestrators[shard].snapshot]
+            for shard in ("b", "c")
+        }
+        holder, other = ("b", "c") if len(held["b"]) > len(held["c"]) else ("c", "b")
+        stranded = held[holder]
+        assert len(stranded) >= 2
+
+        # The holder leaves the ring but keeps serving the agents it has
+        for app in apps.values():
+            app.state.shards.ring.remove(holder)
+        assert all(apps["a"].state.shards.owner(agent_id) != holder for agent_id in stranded)
+
+        assert (await client.get(f"/agents/{stranded[0]}")).json()["status"] == "running"
+        assert (await client.delete(f"/agents/{stranded[0]}")).status_code == 200
+        assert stranded[0] not in orchestrators[holder].resource_manager.resource_allocations
+        assert (await client.get(f"/agents/{stranded[0]}")).status_code == 404
+    async with client_of(apps[other]) as client:
+        assert (await client.delete(f"/agents/{stranded[1]}")).status_code == 200
+        assert (await client.delete(f"/agents/{stranded[1]}")).status_code == 404
+
+    for orchestrator in orchestrators.values():
+        await orchestrator.reset()
+
+
+def test_shards_split_the_node_capacities(monkeypatch):
+    """Test each shard without a shared ledger admits against its share of the nodes."""
+    monkeypatch.setenv("SMART_HIVE_SHARD_ID", "a")
+    monkeypatch.setenv("SMART_HIVE_SHARDS", "a=http://a,b=http://b")
+    assert ResourceManager().placement.free_capacity("node-0")["cpu"] == 4
+    assert ResourceManager(nodes={"node-0": {"cpu": 8}}).placement.free_capacity("node-0")["cpu"] == 8
+
+
+@pytest.mark.asyncio
+async def test_listing_merges_every_shard(shards):
+    """Test listing the fleet from one shard merges the pages of all of them in id order."""
+    apps, orchestrators = shards
+    async with client_of(apps["b"]) as client:
+        for i in range(10):
+            await client.post("/agents/create", json={"name": f"agent{i}", "agent_type": "backend"})
+
+        response = await client.get("/agents")
+        agent_ids = [agent["agent_id"] for agent in response.json()]
+        assert agent_ids == sorted(f"backend_agent{i}" for i in range(10))
+        assert response.headers["x-fleet-version"].count("=") == 3
+
+        pages, after = [], None
+        while True:
+            response = await client.get("/agents", params={"limit": 4, **({"after": after} if after else {})})
+            pages.append([agent["agent_id"] for agent in response.json()])
+            after = response.headers.get("x-next-cursor")
+            if after is None:
+                break
+        assert [agent_id for page in pages for agent_id in page] == agent_ids
+        assert [len(page) for page in pages] == [4, 4, 2]
+
+        response = await client.get("/agents", params={"limit": 5, "after": agent_ids[4]})
+        assert len(response.json()) == 5
+        assert "x-next-cursor" not in response.headers
+
+        response = await client.get("/agents", headers={"Accept": "application/x-ndjson"})
+        assert len(response.text.splitlines()) == 10
+
+    for orchestrator in orchestrators.values():
+        await orchestrator.reset()
+
+
+@pytest.mark.asyncio
+async def test_batches_must_stay_within_one_shard(shards):
+    """Test a batch is forwarded whole to its shard, and refused if it spans shards."""
+    apps, orchestrators = shards
+    router = apps["a"].state.shards
+    names = {}
+    for i in range(30):
+        names.setdefault(router.owner(f"qa_agent{i}"), []).append(f"agent{i}")
+    remote = next(shard for shard in names if shard != "a")
+
+    async with client_of(apps["a"]) as client:
+        batch = [{"name": name, "agent_type": "qa"} for name in names[remote][:2]]
+        response = await client.post("/agents/batch", json={"agents": batch})
+        assert response.status_code == 200
+        assert all(f"qa_{name}" in orchestrators[remote].snapshot for name in names[remote][:2])
+
+        mixed = [{"name": names[shard][0], "agent_type": "qa"} for shard in names]
+        response = await client.post("/agents/batch", json={"agents": mixed})
+        assert response.status_code == 400
+        assert "spans shards" in response.json()["detail"]
+
+    for orchestrator in orchestrators.values():
+        await orchestrator.reset()
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_polled_on_their_shard(shards):
+    """Test a queued creation is run by the owner and its job can be polled from any shard."""
+    apps, orchestrators = shards
+    router = apps["a"].state.shards
+    name = next(f"agent{i}" for i in range(30) if router.owner(f"backend_agent{i}") != "c")
+    owner = router.owner(f"backend_{name}")
+
+    async with client_of(apps["c"]) as client:
+        response = await client.post("/agents/create", params={"wait": "false"}, json={"name": name, "agent_type": "backend"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert job_id.startswith(f"{owner}.")
+
+        await orchestrators[owner].provisioning.join()
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        assert job["status"] == "succeeded"
+        assert job["agent_id"] == f"backend_{name}"
+
+    for orchestrator in orchestrators.values():
+        await orchestrator.reset()
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_per_shard(shards):
+    """Test /metrics is served by the shard asked and reports only its own agents."""
+    apps, orchestrators = shards
+    router = apps["a"].state.shards
+    name = next(f"agent{i}" for i in range(30) if router.owner(f"backend_agent{i}") != "a")
+    owner = router.owner(f"backend_{name}")
+
+    async with client_of(apps["a"]) as client:
+        await client.post("/agents/create", json={"name": name, "agent_type": "backend"})
+        assert 'smart_hive_agents{agent_type="backend"}' not in (await client.get("/metrics")).text
+    async with client_of(apps[owner]) as client:
+        assert 'smart_hive_agents{agent_type="backend"} 1' in (await client.get("/metrics")).text
+
+    for orchestrator in orchestrators.values():
+        await orchestrator.reset()
@@ -0,0 +1,83 @@
+"""
+Tests for fleet snapshots
+"""
+
+import random
+
+import pytest
+
+from smart_hive.services.control_plane import snapshot as snapshot_module
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+from smart_hive.services.control_plane.records import AgentRecord
+from smart_hive.services.control_plane.snapshot import FleetSnapshot, SortedIds
+
+
+def record(agent_id, agent_type="backend"):
+    return AgentRecord(agent_id, agent_type)
+
+
+def leaves_of(sequence):
+    return [leaf for leaves, _ in sequence.pages for leaf in leaves]
+
+
+def test_sorted_ids_split_and_remove(monkeypatch):
+    """Test ids stay sorted across leaf and page splits and removals, sharing untouched nodes."""
+    monkeypatch.setattr(snapshot_module, "LEAF_SIZE", 4)
+    monkeypatch.setattr(snapshot_module, "PAGE_SIZE", 2)
+    ids = [f"agent{i:03d}" for i in range(200)]
+    shuffled = ids[:]
+    random.Random(0).shuffle(shuffled)
+
+    sequence = SortedIds()
+    for agent_id in shuffled:
+        sequence = sequence.update(added=[agent_id])
+    assert list(sequence) == ids
+    assert len(sequence) == 200
+    assert len(sequence.pages) > 1
+    assert all(len(leaf) <= 8 for leaf in leaves_of(sequence))
+    assert all(len(leaves) <= 4 for leaves, _ in sequence.pages)
+
+    smaller = sequence.update(removed=ids[::2])
+    assert list(smaller) == ids[1::2]
+    assert list(sequence) == ids
+    assert list(smaller.after("agent150")) == [f"agent{i:03d}" for i in range(151, 200, 2)]
+    assert list(smaller.after("agent199")) == []
+
+    grown = sequence.update(added=["agent050a"])
+    assert sum(page in sequence.pages for page in grown.pages) == len(sequence.pages) - 1
+    assert sequence.update(added=["agent050"]) is sequence
+    assert sequence.update(removed=["missing"]) is sequence
+
+
+def test_evolve_keeps_previous_versions():
+    """Test a new version never changes the snapshot it was built from."""
+    first = FleetSnapshot().evolve(added=[record("backend_a"), record("qa_b", "qa")])
+    second = first.evolve(added=[record("backend_c")], removed=["qa_b"])
+
+    assert (first.version, second.version) == (1, 2)
+    assert sorted(first) == ["backend_a", "qa_b"]
+    assert sorted(second) == ["backend_a", "backend_c"]
+    assert first.type_counts() == {"backend": 1, "qa": 1}
+    assert second.type_counts() == {"backend": 2}
+    assert "qa_b" in first and "qa_b" not in second
+    assert FleetSnapshot.build({r.agent_id: r for r in second.values()}) == second
+
+
+@pytest.mark.asyncio
+async def test_readers_see_a_consistent_view():
+    """Test a snapshot taken before changes keeps serving the old fleet."""
+    orchestrator = SmartHiveOrchestrator()
+    await orchestrator.create_agent("agent1", "backend")
+    await orchestrator.create_agent("agent2", "backend")
+    before = orchestrator.snapshot
+
+    walk = orchestrator.iter_agents()
+    first = await walk.__anext__()
+    await orchestrator.destroy_agent("backend_agent2")
+    await orchestrator.create_agent("agent0", "backend")
+    rest = [agent async for agent in walk]
+
+    assert [first.agent_id] + [agent.agent_id for agent in rest] == ["backend_agent1", "backend_agent2"]
+    assert sorted(before) == ["backend_agent1", "backend_agent2"]
+    assert sorted(orchestrator.snapshot) == ["backend_agent0", "backend_agent1"]
+    assert orchestrator.snapshot.version > before.version
@@ -2,6 +2,7 @@
 Tests for StateManager
 """
 
+import asyncio
 import pytest
 import tempfile
 from pathlib import Path
@@ -12,6 +13,7 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../../"))
 from mocks.llama_agents import AgentService
 
+from smart_hive.configs.state_config import StateConfig
 from smart_hive.services.control_plane.state_manager import StateManager
 
 @pytest.fixture
@@ -92,3 +94,70 @@ async def test_state_persistence(temp_state_dir):
     manager2 = StateManager(state_dir=temp_state_dir)
     loaded_state = await manager2.load_state(agent_id)
     assert loaded_state == test_state, "El estado debe persistir entre instancias"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("durability", ["sync", "batched", "async"])
+async def test_durability_modes(temp_state_dir, durability):
+    """Verificar que cada modo de durabilidad persiste los cambios."""
+    config = StateConfig(durability=durability)
+    manager = StateManager(state_dir=temp_state_dir, config=config)
+    await manager.save_states({"agent1": {"status": "running"}, "agent2": {"status": "running"}})
+    await manager.delete_state("agent2")
+    await manager.close()
+
+    reloaded = StateManager(state_dir=temp_state_dir, config=config)
+    assert await reloaded.list_states() == {"agent1": {"status": "running"}}
+    await reloaded.close()
+
+@pytest.mark.asyncio
+async def test_write_behind_batches(temp_state_dir):
+    """Verificar que los cambios concurrentes se agrupan en una sola transacción."""
+    manager = StateManager(state_dir=temp_state_dir, config=StateConfig(durability="batched", batch_size=50))
+    writes = []
+    original_write = manager.storage.write_batch
+    manager.storage.write_batch = lambda upserts, deletes: writes.append(len(upserts)) or original_write(upserts, deletes)
+
+    await asyncio.gather(*(manager.save_state(f"agent{i}", {"status": "running"}) for i in range(50)))
+    assert writes == [50], "Los 50 cambios deben escribirse en una sola transacción"
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_async_durability_returns_before_flush(temp_state_dir):
+    """Verificar que el modo async no espera la escritura."""
+    manager = StateManager(state_dir=temp_state_dir, config=StateConfig(durability="async", flush_interval=60))
+    await manager.save_state("agent1", {"status": "running"})
+    assert manager._pending == {"agent1": {"status": "running"}}
+    assert await manager.load_state("agent1") == {"status": "running"}
+    await manager.flush()
+    assert manager.storage.load_all() == {"agent1": {"status": "running"}}
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_live_objects_not_persisted(temp_state_dir):
+    """Verificar que los objetos no serializables se guardan como null."""
+    manager = StateManager(state_dir=temp_state_dir, config=StateConfig(durability="sync"))
+    await manager.save_state("agent1", {"agent": AgentService(), "status": "running"})
+    assert manager.storage.load_all() == {"agent1": {"agent": None, "status": "running"}}
+    await manager.close()
+
+@pytest.mark.asyncio
+async def test_in_memory_without_state_dir():
+    """Verificar que sin directorio el estado solo vive en memoria."""
+    manager = StateManager(config=StateConfig())
+    assert manager.storage is None
+    await manager.save_state("agent1", {"status": "running"})
+    assert await manager.load_state("agent1") == {"status": "running"}
+
+@pytest.mark.asyncio
+async def test_journal_snapshot(temp_state_dir):
+    """Verificar que el StateManager compacta el journal cuando corresponde."""
+    config = StateConfig(backend="journal", durability="sync", snapshot_every=10)
+    manager = StateManager(state_dir=temp_state_dir, config=config)
+    for i in range(25):
+        await manager.save_state(f"agent{i}", {"status": "running"})
+    assert manager.storage.snapshot_seq == 20
+    await manager.close()
+
+    reloaded = StateManager(state_dir=temp_state_dir, config=config)
+    assert len(await reloaded.list_states()) == 25
+    await reloaded.close()
@@ -0,0 +1,79 @@
+"""
+Tests for state storage backends
+"""
+
+import json
+import os
+import tempfile
+
+import pytest
+
+from smart_hive.services.control_plane.storage import JournalStorage, SQLiteStorage
+
+@pytest.fixture
+def temp_state_dir():
+    """Fixture para crear un directorio temporal para estados."""
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        yield tmpdirname
+
+def test_sqlite_write_batch(temp_state_dir):
+    """Verificar que un lote aplica altas y bajas en una transacción."""
+    storage = SQLiteStorage(os.path.join(temp_state_dir, "states.db"))
+    storage.write_batch({"agent1": {"status": "running"}, "agent2": {"status": "running"}}, [])
+    storage.write_batch({"agent3": {"status": "running"}}, ["agent1"])
+    assert set(storage.load_all()) == {"agent2", "agent3"}
+    storage.close()
+
+def test_journal_replay(temp_state_dir):
+    """Verificar que el journal se reproduce al reabrir el almacenamiento."""
+    storage = JournalStorage(temp_state_dir)
+    storage.write_batch({"agent1": {"status": "running"}, "agent2": {"status": "running"}}, [])
+    storage.write_batch({}, ["agent1"])
+    assert storage.seq == 3
+    storage.close()
+
+    reopened = JournalStorage(temp_state_dir)
+    assert reopened.load_all() == {"agent2": {"status": "running"}}
+    assert reopened.seq == 3
+    reopened.close()
+
+def test_journal_snapshot_compacts(temp_state_dir):
+    """Verificar que el snapshot trunca el journal y solo se reproduce la cola."""
+    storage = JournalStorage(temp_state_dir, snapshot_every=2)
+    storage.write_batch({"agent1": {"status": "running"}, "agent2": {"status": "running"}}, [])
+    assert storage.snapshot_due()
+    storage.snapshot({"agent1": {"status": "running"}, "agent2": {"status": "running"}}, storage.seq)
+    assert not storage.snapshot_due()
+    storage.write_batch({"agent3": {"status": "running"}}, ["agent2"])
+    storage.close()
+
+    with open(storage.journal_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["seq"] for record in records] == [3, 4], "Solo debe quedar la cola del journal"
+
+    reopened = JournalStorage(temp_state_dir)
+    assert reopened.load_all() == {"agent1": {"status": "running"}, "agent3": {"status": "running"}}
+    reopened.close()
+
+def test_journal_torn_write(temp_state_dir):
+    """Verificar que un registro incompleto al final del journal se ignora."""
+    storage = JournalStorage(temp_state_dir)
+    storage.write_batch({"agent1": {"status": "running"}}, [])
+    storage.close()
+    with open(storage.journal_path, "a") as f:
+        f.write('{"seq": 2, "op": "sa')
+
+    reopened = JournalStorage(temp_state_dir)
+    assert reopened.load_all() == {"agent1": {"status": "running"}}
+    reopened.close()
+
+def test_journal_clear(temp_state_dir):
+    """Verificar que limpiar deja el almacenamiento vacío."""
+    storage = JournalStorage(temp_state_dir)
+    storage.write_batch({"agent1": {"status": "running"}}, [])
+    storage.clear()
+    storage.close()
+
+    reopened = JournalStorage(temp_state_dir)
+    assert reopened.load_all() == {}
+    reopened.close()
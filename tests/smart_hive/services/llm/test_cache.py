@@ -0,0 +1,126 @@
+"""
+Tests for the LLM response cache
+"""
+
+import sqlite3
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from smart_hive.configs.openai_config import OpenAIConfig
+from smart_hive.services.llm import cache as cache_module
+from smart_hive.services.llm.cache import MISSING, LLMResponseCache, decode_response, encode_response, make_key
+from smart_hive.services.llm.provider import LLMProvider
+
+
+def test_key_normalizes_prompt():
+    """Test only whitespace at the ends is ignored, and model and temperature count."""
+    key = make_key("gpt-4", 0.0, "\nPlan the deployment ")
+    assert key == make_key("gpt-4", 0.0, "Plan the deployment")
+    assert key != make_key("gpt-4", 0.0, "Plan  the deployment")
+    assert key != make_key("gpt-4", 0.5, "Plan the deployment")
+    assert key != make_key("gpt-3.5", 0.0, "Plan the deployment")
+
+
+def test_lru_eviction_and_ttl():
+    """Test the memory tier evicts the least recently used entry and expires old ones."""
+    cache = LLMResponseCache(max_entries=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is MISSING
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Test responses are served from SQLite by a new cache instance."""
+    path = str(tmp_path / "llm_cache.db")
+    cache = LLMResponseCache(path=path)
+    cache.put("key", {"text": "cached"})
+    cache.close()
+
+    cache = LLMResponseCache(path=path)
+    assert cache.get("key") == {"text": "cached"}
+    assert cache.get("key") == {"text": "cached"}
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_stores_json(tmp_path):
+    """Test the file holds JSON text, read off the event loop, and other values stay in memory."""
+    path = str(tmp_path / "llm_cache.db")
+    cache = LLMResponseCache(path=path)
+    await cache.aput("key", {"text": "cached"})
+    await cache.aput("object", object())
+    cache.close()
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT key, value FROM llm_responses").fetchall() == [
+            ("key", '{"value": {"text": "cached"}}')
+        ]
+    conn.close()
+
+    cache = LLMResponseCache(path=path)
+    assert await cache.aget("key") == {"text": "cached"}
+    assert await cache.aget("object") is MISSING
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_provider_caches_completions():
+    """Test identical prompts reach the client once when the cache is enabled."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key", cache_enabled=True))
+    llm = provider.lazy()
+
+    first = await llm.acomplete("Plan the deployment")
+    second = llm.complete(" Plan the deployment\n")
+
+    assert first == second == "response: Plan the deployment"
+    assert provider.get_llm().calls == 1
+    assert provider.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sampled_responses_are_not_cached():
+    """Test calls above temperature 0 always reach the client unless sampled caching is on."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key", cache_enabled=True, temperature=0.7))
+    llm = provider.lazy()
+    await llm.acomplete("Plan the deployment")
+    await llm.acomplete("Plan the deployment")
+    assert provider.get_llm().calls == 2
+    assert provider.cache.stats()["entries"] == 0
+
+    provider = LLMProvider(OpenAIConfig(api_key="test-key", cache_enabled=True, temperature=0.7, cache_sampled=True))
+    llm = provider.lazy()
+    await llm.acomplete("Plan the deployment")
+    await llm.acomplete("Plan the deployment")
+    assert provider.get_llm().calls == 1
+
+
+class Completion(BaseModel):
+    text: str
+
+
+def test_models_are_rebuilt_from_trusted_modules_only(monkeypatch):
+    """Test a stored pydantic response is rebuilt only if its module is trusted."""
+    text = encode_response(Completion(text="cached"))
+    assert decode_response(text) is MISSING
+
+    monkeypatch.setattr(cache_module, "TRUSTED_MODEL_MODULES", (Completion.__module__,))
+    assert decode_response(text) == Completion(text="cached")
+
+
+def test_cache_disabled_by_default():
+    """Test the client is not wrapped unless the cache is enabled."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key"))
+    provider.get_llm()
+    assert provider.cache is None
@@ -0,0 +1,125 @@
+"""
+Tests for LLM request coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from smart_hive.configs.openai_config import OpenAIConfig
+from smart_hive.services.llm.coalescer import MicroBatcher, SingleFlight
+from smart_hive.services.llm.provider import LLMProvider
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result():
+    """Test concurrent identical calls run once and every waiter gets the result."""
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "plan"
+
+    results = await asyncio.gather(*[flights.do("key", call) for _ in range(10)])
+
+    assert results == ["plan"] * 10
+    assert len(calls) == 1
+    assert flights.stats() == {"calls": 1, "shared": 9, "in_flight": 0}
+
+    # Once finished, the next call runs again
+    assert await flights.do("key", call) == "plan"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors():
+    """Test waiters get the error of the shared call."""
+    flights = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    results = await asyncio.gather(*[flights.do("key", call) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller():
+    """Test cancelling the first caller leaves the others waiting for the shared call."""
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "plan"
+
+    first = asyncio.ensure_future(flights.do("key", call))
+    await asyncio.sleep(0)
+    others = [asyncio.ensure_future(flights.do("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await asyncio.gather(*others) == ["plan"] * 3
+    assert first.cancelled()
+    assert len(calls) == 1
+
+    # Once every caller is cancelled the call is abandoned
+    lone = asyncio.ensure_future(flights.do("key", call))
+    await asyncio.sleep(0)
+    lone.cancel()
+    await asyncio.sleep(0)
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_micro_batching():
+    """Test items submitted within the window go out as one deduplicated batch."""
+    batches = []
+
+    async def embed(texts):
+        batches.append(texts)
+        return [len(text) for text in texts]
+
+    batcher = MicroBatcher(embed, window=0.01, max_batch_size=4)
+    results = await asyncio.gather(*[batcher.submit(text) for text in ["a", "bb", "a", "ccc", "dddd", "e"]])
+
+    assert results == [1, 2, 1, 3, 4, 1]
+    assert batches == [["a", "bb", "ccc"], ["dddd", "e"]]
+    assert batcher.stats() == {"items": 6, "batches": 2, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_provider_coalesces_fan_out():
+    """Test fan-out of identical prompts and embeddings reaches the provider once."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key", coalesce_enabled=True))
+    llm = provider.lazy()
+    embedding = provider.get_embedding()
+
+    answers = await asyncio.gather(*[llm.acomplete("Plan the deployment") for _ in range(20)])
+    vectors = await asyncio.gather(*[embedding.aget_text_embedding(f"agent {i}") for i in range(20)])
+
+    assert set(answers) == {"response: Plan the deployment"}
+    assert provider.get_llm().calls == 1
+    assert vectors[0] == [7.0]
+    assert len(embedding.batch_calls) == 1
+    await provider.aclose()
+
+
+@pytest.mark.asyncio
+async def test_micro_batch_with_missing_results():
+    """Test every waiter fails when the batch call returns too few results."""
+    async def embed(texts):
+        return [len(text) for text in texts[:-1]]
+
+    batcher = MicroBatcher(embed, window=0.01)
+    results = await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit(text) for text in ["a", "bb", "ccc"]], return_exceptions=True), timeout=1
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert "2 results for 3 items" in str(results[0])
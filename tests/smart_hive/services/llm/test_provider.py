@@ -0,0 +1,53 @@
+"""
+Tests for the LLM provider
+"""
+
+import pytest
+
+from smart_hive.configs.openai_config import OpenAIConfig
+from smart_hive.services.llm.provider import LLMProvider, get_llm_provider, set_llm_provider
+from smart_hive.services.control_plane.main import SmartHiveOrchestrator
+
+
+@pytest.fixture
+def provider():
+    """Install a fresh process-wide provider for the test."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key", model="gpt-4", temperature=0.3))
+    set_llm_provider(provider)
+    yield provider
+    set_llm_provider(None)
+
+
+def test_client_built_on_first_use(provider):
+    """Test the client is only built when the lazy stand-in is used."""
+    llm = provider.lazy()
+    assert provider.clients_built == 0
+
+    assert llm.kwargs["model"] == "gpt-4"
+    assert llm.kwargs["temperature"] == 0.3
+    assert llm.kwargs["api_key"] == "test-key"
+    assert provider.clients_built == 1
+
+
+def test_client_shared(provider):
+    """Test every stand-in shares one client."""
+    first, second = provider.lazy(), provider.lazy()
+    assert first.kwargs is second.kwargs
+    assert provider.get_llm() is provider.get_llm()
+    assert provider.clients_built == 1
+
+
+def test_orchestrator_builds_no_client(provider):
+    """Test bookkeeping paths never build an LLM client."""
+    orchestrator = SmartHiveOrchestrator()
+    assert provider.clients_built == 0
+    assert orchestrator.llm.kwargs["model"] == "gpt-4"
+    assert orchestrator.resource_manager.llm.kwargs is orchestrator.state_manager.llm.kwargs
+    assert provider.clients_built == 1
+
+
+def test_process_wide_provider():
+    """Test the process-wide provider is created once."""
+    set_llm_provider(None)
+    assert get_llm_provider() is get_llm_provider()
+    set_llm_provider(None)
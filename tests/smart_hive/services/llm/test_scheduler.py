@@ -0,0 +1,168 @@
+"""
+Tests for the LLM request scheduler
+"""
+
+import asyncio
+
+import pytest
+
+from smart_hive.configs.openai_config import OpenAIConfig
+from smart_hive.services.llm.provider import LLMProvider
+from smart_hive.services.llm.scheduler import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    LLMScheduler,
+    ScheduledLLM,
+    TokenBucket,
+)
+
+
+class RateLimitError(Exception):
+    """Stand-in for the provider's throttling error."""
+    status_code = 429
+
+
+class FakeLLM:
+    """Fake LLM that records concurrency and can fail the first calls."""
+
+    def __init__(self, delay: float = 0.01, failures: int = 0):
+        self.delay = delay
+        self.failures = failures
+        self.active = 0
+        self.peak = 0
+        self.order = []
+
+    async def acomplete(self, prompt, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                raise RateLimitError("slow down")
+            self.order.append(prompt)
+            return f"response: {prompt}"
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    """Test no more than max_concurrency calls run at once."""
+    scheduler = LLMScheduler(max_concurrency=3)
+    llm = ScheduledLLM(FakeLLM(), scheduler, "gpt-4")
+
+    results = await asyncio.gather(*[llm.acomplete(f"p{i}") for i in range(12)])
+
+    assert len(results) == 12
+    assert llm._llm.peak == 3
+    stats = scheduler.stats()["gpt-4"]
+    assert stats["completed"] == 12
+    assert stats["in_flight"] == 0
+    assert stats["queued"] == 0
+    assert stats["wait_ms_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_priority_lanes():
+    """Test queued high-priority calls run before queued low-priority ones."""
+    scheduler = LLMScheduler(max_concurrency=1)
+    fake = FakeLLM()
+    background = ScheduledLLM(fake, scheduler, "gpt-4", PRIORITY_LOW)
+    planning = ScheduledLLM(fake, scheduler, "gpt-4", PRIORITY_HIGH)
+
+    first = asyncio.create_task(background.acomplete("first"))
+    await asyncio.sleep(0)
+    queued = [asyncio.create_task(background.acomplete(f"low{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["gpt-4"]["queued_by_priority"] == {PRIORITY_LOW: 3}
+    urgent = asyncio.create_task(planning.acomplete("plan"))
+    await asyncio.gather(first, urgent, *queued)
+
+    assert fake.order == ["first", "plan", "low0", "low1", "low2"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_wait_keeps_priority():
+    """Test a call waiting for tokens holds no slot and is overtaken by higher priority."""
+    scheduler = LLMScheduler(max_concurrency=1, tokens_per_minute=6000)
+    lane = scheduler.lane("gpt-4")
+    lane.tokens.tokens = 0
+    fake = FakeLLM()
+
+    low = asyncio.create_task(scheduler.run("gpt-4", lambda: fake.acomplete("low"), PRIORITY_LOW, tokens=20))
+    await asyncio.sleep(0)
+    assert lane.stats()["in_flight"] == 0
+    assert lane.stats()["queued_by_priority"] == {PRIORITY_LOW: 1}
+    high = asyncio.create_task(scheduler.run("gpt-4", lambda: fake.acomplete("plan"), PRIORITY_HIGH, tokens=1))
+    await asyncio.gather(low, high)
+
+    assert fake.order == ["plan", "low"]
+    assert lane.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    """Test cancelling a queued call drops it from the queue counters."""
+    scheduler = LLMScheduler(max_concurrency=1)
+    llm = ScheduledLLM(FakeLLM(delay=0.05), scheduler, "gpt-4")
+
+    first = asyncio.create_task(llm.acomplete("first"))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(llm.acomplete("second"))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["gpt-4"]["queued"] == 1
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+    assert scheduler.stats()["gpt-4"]["queued"] == 0
+    assert await first == "response: first"
+    assert scheduler.stats()["gpt-4"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_with_backoff():
+    """Test throttled calls are retried and other errors are not."""
+    scheduler = LLMScheduler(max_retries=3, retry_base_delay=0.001, retry_max_delay=0.01)
+    llm = ScheduledLLM(FakeLLM(failures=2), scheduler, "gpt-4")
+
+    assert await llm.acomplete("hi") == "response: hi"
+    assert scheduler.stats()["gpt-4"]["retries"] == 2
+
+    llm = ScheduledLLM(FakeLLM(failures=5), scheduler, "gpt-4")
+    with pytest.raises(RateLimitError):
+        await llm.acomplete("hi")
+
+    async def broken():
+        raise ValueError("bad prompt")
+    with pytest.raises(ValueError):
+        await scheduler.run("gpt-4", broken)
+    assert scheduler.stats()["gpt-4"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests():
+    """Test a bucket makes callers wait once its budget is spent."""
+    bucket = TokenBucket(per_minute=600)
+    bucket.tokens = 0
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await bucket.acquire(1)
+    assert loop.time() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_provider_priority_lanes():
+    """Test the provider routes each priority through the shared scheduler."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key", scheduler_enabled=True, cache_enabled=True))
+
+    high, low = provider.lazy(PRIORITY_HIGH), provider.lazy(PRIORITY_LOW)
+    assert await high.acomplete("plan") == "response: plan"
+    assert await low.acomplete("plan") == "response: plan"
+
+    assert provider.get_llm(PRIORITY_HIGH)._llm.priority == PRIORITY_HIGH
+    assert provider.scheduler.stats()["gpt-4-1106-preview"]["completed"] == 1
+    assert provider.cache.stats()["hits"] == 1
+    await provider.aclose()
@@ -0,0 +1,81 @@
+"""
+Tests for the shared HTTP transport
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from smart_hive.configs.openai_config import OpenAIConfig
+from smart_hive.services.llm.provider import LLMProvider
+from smart_hive.services.llm.transport import HTTPTransport
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a fixed JSON body and records the client port."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.ports.add(self.client_address[1])
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Local stub of the LLM API."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.ports = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.mark.asyncio
+async def test_connections_reused(stub_server):
+    """Test sequential requests share one keep-alive connection."""
+    transport = HTTPTransport(OpenAIConfig())
+    url = f"http://127.0.0.1:{stub_server.server_address[1]}/v1/chat/completions"
+
+    for _ in range(5):
+        response = await transport.async_client.post(url, json={"prompt": "hi"})
+        assert response.json() == {"ok": True}
+
+    assert len(stub_server.ports) == 1
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pool_limits(stub_server):
+    """Test the pool never opens more connections than configured."""
+    transport = HTTPTransport(OpenAIConfig(http_max_connections=2))
+    url = f"http://127.0.0.1:{stub_server.server_address[1]}/v1/chat/completions"
+
+    await asyncio.gather(*[transport.async_client.post(url, json={}) for _ in range(10)])
+
+    assert len(stub_server.ports) <= 2
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_provider_injects_shared_clients():
+    """Test the LLM client gets the process-wide pooled clients."""
+    provider = LLMProvider(OpenAIConfig(api_key="test-key"))
+    llm = provider.get_llm()
+
+    assert llm.kwargs["http_client"] is provider.transport.client
+    assert llm.kwargs["async_http_client"] is provider.transport.async_client
+    await provider.aclose()
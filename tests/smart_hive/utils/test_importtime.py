@@ -0,0 +1,70 @@
+"""
+Tests for the import-time report and the control plane import path
+"""
+
+import os
+import subprocess
+import sys
+
+from smart_hive.main import main
+from smart_hive.utils.importtime import build_report, measure_cold_start, parse_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+CHILD_PATH = [os.path.join(ROOT, "src"), os.path.join(ROOT, "tests", "mocks")]
+
+# Budget for SmartHive's own import path with llama-agents and llama-index replaced by
+# tests/mocks. The real llama-agents stack is not measured, so this is not a cold-start guard.
+MOCKED_STARTUP_BUDGET_MS = float(os.getenv("SMART_HIVE_MOCKED_STARTUP_BUDGET_MS", "3000"))
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        300 |     fastapi.params
+import time:       200 |        500 |   fastapi
+import time:        50 |        670 | smart_hive.main
+"""
+
+
+def test_parse_importtime():
+    """Test -X importtime output is parsed into entries."""
+    entries = parse_importtime(SAMPLE)
+
+    assert [entry["module"] for entry in entries] == ["_io", "fastapi.params", "fastapi", "smart_hive.main"]
+    assert entries[1] == {"module": "fastapi.params", "self_us": 300, "cumulative_us": 300, "depth": 2}
+
+
+def test_build_report():
+    """Test the report aggregates self time per top-level package."""
+    report = build_report("smart_hive.main", parse_importtime(SAMPLE), wall_ms=10.0)
+
+    assert report["import_ms"] == 0.67
+    assert report["packages"] == {"fastapi": 0.5, "_io": 0.12, "smart_hive": 0.05}
+    assert report["entries"][0]["module"] == "smart_hive.main"
+
+
+def test_importtime_budget_exceeded(capsys):
+    """Test the CLI exits with status 1 when the import exceeds the budget."""
+    assert main(["importtime", "json", "--json", "--budget-ms", "0"]) == 1
+    assert "budget is 0.0 ms" in capsys.readouterr().out
+
+
+def test_heavy_modules_not_loaded_on_import():
+    """Test importing the control plane does not execute numpy or sqlite3."""
+    code = (
+        "import sys; import smart_hive.services.control_plane.main; "
+        "print(','.join(sorted(type(sys.modules[name]).__name__ for name in ('numpy', 'sqlite3'))))"
+    )
+    # pytest-cov starts coverage in subprocesses through these variables, and coverage imports sqlite3
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("COV_CORE_", "COVERAGE_"))}
+    env["PYTHONPATH"] = os.pathsep.join(CHILD_PATH)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+
+    assert result.stdout.strip() == "_LazyModule,_LazyModule"
+
+
+def test_startup_budget_with_mocked_llama_agents():
+    """Test creating the app against the llama-agents mocks stays within the mocked startup budget."""
+    elapsed = measure_cold_start(extra_path=CHILD_PATH)
+
+    assert elapsed < MOCKED_STARTUP_BUDGET_MS, (
+        f"Startup with mocked llama-agents took {elapsed:.0f} ms, budget is {MOCKED_STARTUP_BUDGET_MS:.0f} ms"
+    )
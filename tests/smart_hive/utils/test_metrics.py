@@ -0,0 +1,46 @@
+"""
+Tests for the metrics registry
+"""
+
+from smart_hive.utils.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_rendering():
+    """Test counters and callback gauges render in the Prometheus text format."""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests.", ["route"])
+    counter.labels("/agents").inc()
+    counter.labels("/agents").inc(2)
+    registry.gauge("fleet", "Fleet size.", ["type"], callback=lambda: [(("backend",), 3)])
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/agents"} 3',
+        "# HELP fleet Fleet size.",
+        "# TYPE fleet gauge",
+        'fleet{type="backend"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test histogram buckets, sum and count."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.labels().observe(value)
+    with histogram.labels().time():
+        pass
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 3' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 4' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 5' in lines
+    assert "latency_seconds_count 5" in lines
+    assert any(line.startswith("latency_seconds_sum 2.65") for line in lines)
+
+
+def test_register_returns_existing_metric():
+    """Test registering a name twice returns the first metric."""
+    registry = MetricsRegistry()
+    assert registry.counter("a_total", "A.") is registry.counter("a_total", "A.")
@@ -0,0 +1,106 @@
+"""
+Tests for tracing spans and the sampling profiler
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from smart_hive.utils.profiler import SamplingProfiler
+from smart_hive.utils.tracing import TRACER, configure_tracing, traced
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Export spans to a temporary file for the duration of a test."""
+    path = tmp_path / "spans.jsonl"
+    configure_tracing(str(path))
+    yield path
+    configure_tracing(None)
+
+
+def read_spans(path):
+    TRACER.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@traced("inner")
+async def inner(fail=False):
+    if fail:
+        raise ValueError("boom")
+    return "ok"
+
+
+@traced("outer", component="test")
+async def outer():
+    return await inner()
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_and_export_otlp_json(trace_file):
+    """Test child spans share the trace and point at their parent."""
+    assert await outer() == "ok"
+
+    spans = {span["name"]: span for span in read_spans(trace_file)}
+    assert set(spans) == {"outer", "inner"}
+    assert spans["inner"]["traceId"] == spans["outer"]["traceId"]
+    assert spans["inner"]["parentSpanId"] == spans["outer"]["spanId"]
+    assert "parentSpanId" not in spans["outer"]
+    assert spans["outer"]["attributes"] == [{"key": "component", "value": {"stringValue": "test"}}]
+    assert int(spans["outer"]["endTimeUnixNano"]) >= int(spans["inner"]["endTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_errors_set_span_status(trace_file):
+    """Test a raising call is exported with an error status."""
+    with pytest.raises(ValueError):
+        await inner(fail=True)
+
+    (span,) = read_spans(trace_file)
+    assert span["status"] == {"code": 2, "message": "ValueError: boom"}
+
+
+@pytest.mark.asyncio
+async def test_sampling_skips_whole_traces(tmp_path):
+    """Test an unsampled root span suppresses its children too."""
+    path = tmp_path / "spans.jsonl"
+    configure_tracing(str(path), sample_rate=0.0)
+    try:
+        await outer()
+        TRACER.flush()
+    finally:
+        configure_tracing(None)
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_disabled_tracing_calls_through():
+    """Test traced functions run untouched while tracing is off."""
+    assert TRACER.exporter is None
+    assert await outer() == "ok"
+
+
+def test_profiler_collects_collapsed_stacks():
+    """Test the profiler samples another thread into collapsed stacks."""
+    done = threading.Event()
+
+    def busy_worker():
+        while not done.is_set():
+            sum(range(1000))
+
+    worker = threading.Thread(target=busy_worker)
+    worker.start()
+    profiler = SamplingProfiler(worker.ident, interval=0.001)
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+    done.set()
+    worker.join()
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("busy_worker (test_tracing.py" in line for line in lines)